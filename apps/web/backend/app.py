@@ -1,29 +1,164 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
+import logging
+import os
+import random
 import sys
+import time
+import uuid
 from pathlib import Path
 
 # Ensure project root is on sys.path (so `engine` can be imported when running from apps/web/backend)
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Literal, Optional
+from typing import Annotated, Any, Dict, List, Literal, Optional, Tuple, Union
 
-from fastapi import FastAPI, Query
-from fastapi.responses import HTMLResponse, Response, JSONResponse
+from fastapi import Body, FastAPI, Query, Request
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel, Field, NonNegativeInt, StringConstraints, ValidationError
 
-from engine.add.render import render_svg as render_add_svg
-from engine.div.core import render_division_svg, calculate_egel_huvaah
-from engine.sub.render import render_svg as render_sub_svg
-from engine.sub.algo import compute_egel_subtraction
-from engine.mul.render import render_svg as render_mul_svg
-from engine.mul.algo import compute_egel_multiplication
+from engine.api import (
+    ENGINE_VERSION,
+    STAGES,
+    RenderParams,
+    compute_trace,
+    compute_trace_bytes,
+    iter_render,
+    layout_params,
+    normalize_render_params,
+    render,
+    render_display_json,
+    render_stages,
+    sized,
+)
+from engine.bank import LEVELS, ProblemBank, sample_problem
+from engine.budget import OVER_BUDGET_MODES, OverBudget, budgets_from_env, check as check_budget
+from engine.common.cache import LRUCache
+from engine.common.digits import Operand, decimal, ndigits, operand
+from engine.common.encoding import available_encodings, compress, negotiate
+from engine.common.grid import GRID_MODES
+from engine.common.metrics import Counter, Histogram
+from engine.common.pool import PoolBusy, PoolTimeout, WorkerPool
+from engine.common.serialize import dumps
+from engine.common.timing import PHASE_BUCKETS, Instrumented, server_timing
+from engine.common.viewbox import iter_resize_root
 
 BASE_DIR = Path(__file__).resolve().parent
 STATIC_DIR = BASE_DIR.parent / "static"
 
+# Bounded LRU in front of /api/render, keyed on RenderParams.
+# EGEL_RENDER_CACHE_SIZE=0 disables it.
+RENDER_CACHE = LRUCache(
+    maxsize=int(os.environ.get("EGEL_RENDER_CACHE_SIZE", "4096")),
+    max_bytes=int(os.environ.get("EGEL_RENDER_CACHE_BYTES", str(64 * 1024 * 1024))),
+)
+
+# /api/trace bodies (UTF-8 JSON bytes), keyed on (op, a, b, extra addends,
+# summary, layout); not engine.mul.algo.TRACE_CACHE, which holds the mul
+# trace dicts those bodies are written from. Traces do not depend on any
+# render option, so one entry serves every view of a problem.
+# EGEL_TRACE_CACHE_SIZE=0 disables it.
+TRACE_BYTES_CACHE = LRUCache(
+    maxsize=int(os.environ.get("EGEL_TRACE_CACHE_SIZE", "4096")),
+    max_bytes=int(os.environ.get("EGEL_TRACE_CACHE_BYTES", str(32 * 1024 * 1024))),
+)
+
+# Streamed renders are copied into RENDER_CACHE only up to this size, so a
+# huge streamed SVG is never held in memory as a whole.
+STREAM_CACHE_LIMIT = 1024 * 1024
+
+# Where renders/traces actually run (cache hits never reach the pool):
+#   EGEL_EXECUTOR=inline|thread|process, EGEL_WORKERS, EGEL_MAX_QUEUE,
+#   EGEL_RENDER_TIMEOUT (seconds per request, 0 = no limit)
+# A full queue is answered with 429 + Retry-After (admission control).
+RENDER_POOL = WorkerPool(
+    mode=os.environ.get("EGEL_EXECUTOR", "thread"),
+    max_workers=int(os.environ.get("EGEL_WORKERS", str(os.cpu_count() or 2))),
+    max_queue=int(os.environ.get("EGEL_MAX_QUEUE", "64")),
+    timeout=float(os.environ.get("EGEL_RENDER_TIMEOUT", "10")),
+)
+
+# Dispatcher threads for POST /api/batch items (the work itself goes to RENDER_POOL).
+BATCH_WORKERS = int(os.environ.get("EGEL_BATCH_WORKERS", str(os.cpu_count() or 2)))
+BATCH_MAX_ITEMS = int(os.environ.get("EGEL_BATCH_MAX_ITEMS", "500"))
+BATCH_POOL = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="egel-batch")
+
+# Addition takes N addends (`a=..&a=..`, `b` last); more than this is refused.
+MAX_ADDENDS = int(os.environ.get("EGEL_MAX_ADDENDS", "1000"))
+DEFAULT_A, DEFAULT_B = 8541, 1973
+
+# Operands are digit strings (`a=000123` is 123) of at most
+# EGEL_MAX_OPERAND_DIGITS digits, parsed by engine.common.digits rather than
+# int(). JSON and ETags write long ints with engine.common.digits.decimal as
+# well, so CPython's own int <-> str limit (4300 digits) stays as it is.
+MAX_OPERAND_DIGITS = int(os.environ.get("EGEL_MAX_OPERAND_DIGITS", "20000"))
+DigitString = Annotated[str, StringConstraints(pattern=r"^[0-9]+$", max_length=MAX_OPERAND_DIGITS)]
+
+# Complexity budgets (engine/budget.py), checked before any cache or pool work:
+#   EGEL_BUDGET_ADD / _SUB / _MUL / _DIV  e.g. "digits=1000,blocks=20000,steps=25000"
+#                      (measures not named keep their default; 0 = unlimited)
+#   EGEL_OVER_BUDGET   what happens above the budget: "summary" (default) serves
+#                      the summary render/trace (engine/summary.py), "reject"
+#                      answers 413 with the measures and the budget
+BUDGETS = budgets_from_env()
+OVER_BUDGET = os.environ.get("EGEL_OVER_BUDGET", "summary")
+if OVER_BUDGET not in OVER_BUDGET_MODES:
+    raise RuntimeError(f"EGEL_OVER_BUDGET must be one of {', '.join(OVER_BUDGET_MODES)}")
+OVER_BUDGET_TOTAL = Counter(
+    "egel_over_budget_total", "Problems over their op's complexity budget.", label=("op", "action")
+)
+
+# Grid drawing used when a request does not pass `grid`:
+#   lines (one <line> per edge), path (one <path>), pattern (one tiled <rect>)
+GRID_DEFAULT = os.environ.get("EGEL_GRID_DEFAULT", "lines")
+if GRID_DEFAULT not in GRID_MODES:
+    raise RuntimeError(f"EGEL_GRID_DEFAULT must be one of {', '.join(GRID_MODES)}")
+
+# HTTP caching. Renders, stages and traces are pure functions of their
+# normalized parameters, so their ETag is a hash of those plus ENGINE_VERSION
+# and a matching If-None-Match is answered 304 without rendering anything.
+#   EGEL_HTTP_MAX_AGE    seconds browsers/proxies may reuse a response without
+#                        revalidating (default 1 day; 0 = always revalidate)
+#   EGEL_PRECOMPRESS     encodings kept precompressed in RENDER_CACHE next to
+#                        the SVG (default "br,gzip"; br needs `pip install
+#                        brotli`; empty = always send identity)
+HTTP_MAX_AGE = int(os.environ.get("EGEL_HTTP_MAX_AGE", "86400"))
+CACHE_CONTROL = f"public, max-age={HTTP_MAX_AGE}, immutable" if HTTP_MAX_AGE > 0 else "no-cache"
+PRECOMPRESS = available_encodings(os.environ.get("EGEL_PRECOMPRESS", "br,gzip").split(","))
+PRECOMPRESS_MIN_BYTES = 512
+
+# Play-mode problem bank built by `python -m engine.bank` (see engine/bank.py).
+# Without it /api/problem still works but samples problems on the fly.
+PROBLEM_BANK_PATH = os.environ.get("EGEL_PROBLEM_BANK", str(PROJECT_ROOT / "data" / "problem_bank.bin"))
+PROBLEM_BANK: Optional[ProblemBank] = None
+if os.path.exists(PROBLEM_BANK_PATH):
+    try:
+        PROBLEM_BANK = ProblemBank(PROBLEM_BANK_PATH)
+    except ValueError as e:
+        logging.getLogger(__name__).warning("Problem bank not loaded: %s", e)
+
+# Per-phase timing of renders that reach RENDER_POOL (engine/common/timing.py):
+#   EGEL_PROFILE_PHASES=1  time trace / layout / emit / serialize / compact
+#                          (and compress) per op; responses get a
+#                          Server-Timing header and /metrics gets
+#                          egel_render_phase_seconds{op,phase} histograms
+#   EGEL_PROFILE_SAMPLE    fraction (0..1) of those pool calls to also run
+#                          under cProfile, dumped as .prof files into
+#                          EGEL_PROFILE_DIR (default data/profiles)
+# Off by default; when off the hooks cost one ContextVar lookup per phase.
+PROFILE_PHASES = os.environ.get("EGEL_PROFILE_PHASES", "0").strip().lower() in ("1", "true", "yes", "on")
+PROFILE_SAMPLE = max(0.0, min(1.0, float(os.environ.get("EGEL_PROFILE_SAMPLE", "0"))))
+PROFILE_DIR = os.environ.get("EGEL_PROFILE_DIR", str(PROJECT_ROOT / "data" / "profiles"))
+PHASE_SECONDS = Histogram(
+    "egel_render_phase_seconds", "Time spent per render pipeline phase.", label=("op", "phase"), buckets=PHASE_BUCKETS
+)
+
 app = FastAPI(title="Egel Engine Unified v2 (ADD + SUB + MUL + DIV)")
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
@@ -37,11 +172,155 @@ def _bool(v: bool) -> bool:
     return bool(v)
 
 
+def _operand(x: Operand) -> int:
+    if ndigits(x) > MAX_OPERAND_DIGITS:
+        raise ValueError(f"Operands may have at most {MAX_OPERAND_DIGITS} digits.")
+    return operand(x)
+
+
+def _operands(
+    op: str, a: Union[Operand, List[Operand]], b: Optional[Operand]
+) -> Tuple[int, int, Tuple[int, ...]]:
+    """(a, b, extra_addends) from the request's `a` (possibly repeated) and `b`,
+    each an int or a digit string.
+
+    For add every `a` is an addend, then `b` if given; a lone `a` without `b`
+    is added to the default b. Other ops take exactly one `a`.
+    """
+    xs = [_operand(x) for x in (a if isinstance(a, list) else [a])]
+    b = None if b is None else _operand(b)
+    if op != "add":
+        if len(xs) != 1:
+            raise ValueError(f"Only add takes several `a` values, not {op}.")
+        return xs[0], DEFAULT_B if b is None else b, ()
+    if b is not None:
+        xs.append(b)
+    elif len(xs) == 1:
+        xs.append(DEFAULT_B)
+    if len(xs) > MAX_ADDENDS:
+        raise ValueError(f"Too many addends ({len(xs)}); at most {MAX_ADDENDS}.")
+    return xs[0], xs[1], tuple(xs[2:])
+
+
+def _summarize(op: str, a: int, b: int, extra: Tuple[int, ...]) -> bool:
+    """True if the problem is over its budget and gets the summary form;
+    raises OverBudget instead when EGEL_OVER_BUDGET=reject."""
+    over = check_budget(op, a, b, extra, BUDGETS)
+    if over is None:
+        return False
+    OVER_BUDGET_TOTAL.inc((op, OVER_BUDGET))
+    if OVER_BUDGET == "reject":
+        raise over
+    return True
+
+
+def _summary_headers(summary: bool) -> Dict[str, str]:
+    return {"X-Egel-Summary": "1"} if summary else {}
+
+
+def _key_text(key: Any) -> str:
+    # repr(key), but ints (the operands) through decimal(): repr refuses
+    # ints past the interpreter's int <-> str limit
+    if isinstance(key, tuple):
+        return f"{type(key).__name__}({', '.join(map(_key_text, key))})"
+    if isinstance(key, int) and not isinstance(key, bool):
+        return decimal(key) if key >= 0 else "-" + decimal(-key)
+    return repr(key)
+
+
+def _etag(kind: str, key: Any) -> str:
+    text = f"{ENGINE_VERSION}|{kind}|{_key_text(key)}"
+    digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:24]
+    return f'"{digest}"'
+
+
+def _variant_etag(etag: str, encoding: Optional[str]) -> str:
+    # each Content-Encoding is a different byte sequence, so it gets its own
+    # strong validator; a 304 needs the tag of the one being served
+    return f'"{etag[1:-1]}-{encoding}"' if encoding else etag
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def _cache_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+
+def _instrumented(op: str, fn: Any, whole: Optional[str] = None) -> Any:
+    """`fn` as given, or wrapped in Instrumented when phase timing is on or
+    this call was sampled for a cProfile dump."""
+    profile_path = None
+    if PROFILE_SAMPLE > 0 and random.random() < PROFILE_SAMPLE:
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{op}-{getattr(fn, '__name__', 'task')}-{uuid.uuid4().hex[:8]}.prof"
+        profile_path = os.path.join(PROFILE_DIR, name)
+    if not PROFILE_PHASES and profile_path is None:
+        return fn
+    return Instrumented(fn, whole=whole, profile_path=profile_path)
+
+
+def _unwrap(op: str, task: Any, result: Any, timings: Optional[Dict[str, float]]) -> Any:
+    # Instrumented calls return (result, {phase: seconds})
+    if not isinstance(task, Instrumented):
+        return result
+    result, seconds = result
+    if PROFILE_PHASES:
+        for name, s in seconds.items():
+            PHASE_SECONDS.observe((op, name), s)
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + s
+    return result
+
+
+async def _arun(timings: Optional[Dict[str, float]], op: str, fn: Any, *args: Any, whole: Optional[str] = None) -> Any:
+    """RENDER_POOL.arun(fn, *args) with phase timing / profiling when enabled."""
+    task = _instrumented(op, fn, whole)
+    return _unwrap(op, task, await RENDER_POOL.arun(task, *args), timings)
+
+
+def _run(op: str, fn: Any, *args: Any) -> Any:
+    """Blocking form of _arun (for /api/batch)."""
+    task = _instrumented(op, fn)
+    return _unwrap(op, task, RENDER_POOL.run(task, *args, block=True), None)
+
+
+def _timing_headers(timings: Optional[Dict[str, float]], started: float) -> Dict[str, str]:
+    if timings is None:
+        return {}
+    return {"Server-Timing": server_timing({**timings, "total": time.perf_counter() - started})}
+
+
+def _error_response(e: Exception) -> JSONResponse:
+    if isinstance(e, PoolBusy):
+        # admission control: shed load early instead of queueing without bound
+        return JSONResponse(
+            {"error": str(e)}, status_code=429, headers={"Retry-After": str(RENDER_POOL.retry_after())}
+        )
+    if isinstance(e, PoolTimeout):
+        return JSONResponse({"error": str(e)}, status_code=504)
+    if isinstance(e, OverBudget):
+        return JSONResponse(e.to_dict(), status_code=413)
+    return JSONResponse({"error": str(e)}, status_code=400)
+
+
 @app.get("/api/render")
-def api_render(
+async def api_render(
+    request: Request,
     op: Literal["add", "sub", "mul", "div"] = Query("add"),
-    a: int = Query(8541, ge=0),
-    b: int = Query(1973, ge=0),
+    a: List[DigitString] = Query([str(DEFAULT_A)]),
+    b: Optional[DigitString] = Query(None),
     unit: int = Query(56, ge=28, le=96),
     stage: int = Query(3, ge=0, le=3),
     show_grid: bool = Query(True),
@@ -50,101 +329,541 @@ def api_render(
     align: Literal["left", "right"] = Query("right"),
     sub_pos: Literal["top", "side", "none"] = Query("top"),
     show_remainder: bool = Query(True),
+    grid: Optional[Literal["lines", "path", "pattern"]] = Query(None),
+    compact: bool = Query(False),
+    precision: int = Query(1, ge=0, le=3),
+    stream: bool = Query(False),
+    slots: bool = Query(False),
+    from_stage: Optional[int] = Query(None, ge=0, le=2),
+    viewbox: bool = Query(False),
 ):
     """
     Unified SVG renderer.
 
-    - add: a+b using "Эгэл нэмэх" (stage is mapped to add-stage 1..5)
+    - add: a+b using "Эгэл нэмэх" (stage is mapped to add-stage 1..5);
+      repeat `a` for more addends (a=..&a=..&a=..), `b`, if given, comes last
     - div: a/b using "Эгэл багтаах" (a=dividend, b=divisor)
+
+    Output is a pure function of the normalized parameters, so repeat
+    requests are served from RENDER_CACHE without touching the renderers.
+    Misses are offloaded to RENDER_POOL; the event loop never renders.
+
+    grid=lines|path|pattern picks how the grid is drawn (default
+    EGEL_GRID_DEFAULT); path/pattern emit one element instead of one <line>
+    per edge.
+
+    compact=true returns a minified SVG (shared CSS classes instead of
+    per-element font/color attributes, coordinates rounded to `precision`
+    decimals); it draws the same picture in a fraction of the bytes. It is
+    a post-pass over the SVG text and makes a cache-miss render several
+    times slower, while the br/gzip copies are about as small either way,
+    so it is opt-in (the UI does not ask for it).
+
+    stream=true sends a cache miss as a chunked response while it is being
+    generated (constant time-to-first-byte, bounded memory for huge problems).
+
+    Responses carry an ETag and Cache-Control; If-None-Match is answered
+    with 304 before any cache or pool work. With Accept-Encoding br/gzip the
+    body comes from a precompressed copy kept in RENDER_CACHE.
+
+    With EGEL_PROFILE_PHASES=1 non-streamed responses carry a Server-Timing
+    header (per-phase milliseconds of the work done for this request).
+
+    Stage deltas (engine/common/slots.py): slots=true adds an empty
+    <g data-slot="r"/> where each run of a later stage goes; from_stage=F
+    (below `stage`) returns only <g data-slot="r">...</g> groups for what
+    stages F+1..stage add, inside the <svg> tag of `stage`. The client fills
+    each placeholder with its group instead of re-parsing a whole SVG.
+
+    viewbox=true lays the drawing out at the default unit in integer user
+    units and lets `unit` set only the root's width/height
+    (engine/common/viewbox.py): every zoom level is served from one cached
+    body.
+
+    Problems over their op's budget (EGEL_BUDGET_*) get the summary SVG
+    (operand rows and result, marked by an X-Egel-Summary: 1 header) or a
+    413, per EGEL_OVER_BUDGET.
     """
+    started = time.perf_counter()
+    timings: Optional[Dict[str, float]] = {} if PROFILE_PHASES else None
     try:
-        if op == "add":
-            # map unified stage 0..3 => add stage 2..5 (so it always reveals useful parts)
-            add_stage = max(1, min(5, stage + 2))
-            svg, _data = render_add_svg(
-                addends=[int(a), int(b)],
-                cell=int(unit),
-                pad=int(unit * 0.42),
-                show_grid=_bool(show_grid),
-                show_underlines=_bool(show_marks),
-                show_carry=_bool(show_marks),
-                stage=int(add_stage),
-            )
-            return Response(content=svg, media_type="image/svg+xml")
-
+        a, b, extra = _operands(op, a, b)
+        if op == "div" and b <= 0:
+            return JSONResponse({"error": "Divisor (b) must be >= 1 for division."}, status_code=400)
+        summary = _summarize(op, a, b, extra)
 
-        if op == "sub":
-            svg, _data = render_sub_svg(
-                a=int(a),
-                b=int(b),
-                unit=int(unit),
-                stage=int(stage),
-                show_grid=_bool(show_grid),
-                show_marks=_bool(show_marks),
+        params = normalize_render_params(
+            op=op,
+            a=a,
+            b=b,
+            extra_addends=extra,
+            unit=unit,
+            stage=stage,
+            show_grid=_bool(show_grid),
+            show_marks=_bool(show_marks),
+            color_mode=color_mode,
+            align=align,
+            sub_pos=sub_pos,
+            show_remainder=_bool(show_remainder),
+            grid=grid or GRID_DEFAULT,
+            compact=_bool(compact),
+            precision=precision,
+            summary=summary,
+            slots=_bool(slots),
+            from_stage=from_stage,
+            viewbox=_bool(viewbox),
+        )
+        etag = _etag("render", params)
+        encoding = negotiate(request.headers.get("accept-encoding", ""), PRECOMPRESS)
+        headers = {**_cache_headers(_variant_etag(etag, encoding)), **_summary_headers(summary)}
+        identity = {**_cache_headers(etag), **_summary_headers(summary)}
+        # The encoded tag only ever goes out with a body of at least
+        # PRECOMPRESS_MIN_BYTES, which this request would get encoded too.
+        # The identity tag under an encoding needs the body size (below).
+        if _not_modified(request, _variant_etag(etag, encoding)):
+            return Response(status_code=304, headers={**headers, **_timing_headers(timings, started)})
+        if encoding:
+            body = RENDER_CACHE.get((params, encoding))
+            if body is not None:
+                return Response(
+                    content=body,
+                    media_type="image/svg+xml",
+                    headers={**headers, "Content-Encoding": encoding, **_timing_headers(timings, started)},
+                )
+        # viewbox renders of every unit share the body cached under layout
+        body_params = layout_params(params)
+        svg = RENDER_CACHE.get(body_params)
+        if svg is None and stream:
+            # streamed bodies go out uncompressed; a later request is served
+            # from the cache and gets the encoded copy
+            if encoding and _not_modified(request, etag):
+                return Response(status_code=304, headers=identity)
+            chunks = _stream_into_cache(body_params)
+            return StreamingResponse(
+                iter_resize_root(chunks, params.unit) if params.viewbox else chunks,
+                media_type="image/svg+xml",
+                headers=identity,
             )
-            return Response(content=svg, media_type="image/svg+xml")
-
-        if op == "mul":
-            svg, _data = render_mul_svg(
-                a=int(a),
-                b=int(b),
-                unit=int(unit),
-                stage=int(stage),
-                show_grid=_bool(show_grid),
-                show_marks=_bool(show_marks),
-                color_mode=int(color_mode),
+        if svg is None:
+            svg = await _arun(timings, op, render, body_params)
+            RENDER_CACHE.put(body_params, svg)
+        data = sized(svg, params).encode("utf-8")
+        if not encoding or len(data) < PRECOMPRESS_MIN_BYTES:
+            if encoding and _not_modified(request, etag):
+                return Response(status_code=304, headers={**identity, **_timing_headers(timings, started)})
+            return Response(
+                content=data,
+                media_type="image/svg+xml",
+                headers={**identity, **_timing_headers(timings, started)},
             )
-            return Response(content=svg, media_type="image/svg+xml")
+        body = await _arun(timings, op, compress, data, encoding, whole="compress")
+        RENDER_CACHE.put((params, encoding), body)
+        return Response(
+            content=body,
+            media_type="image/svg+xml",
+            headers={**headers, "Content-Encoding": encoding, **_timing_headers(timings, started)},
+        )
+    except Exception as e:
+        return _error_response(e)
 
-        # div
-        if int(b) <= 0:
+
+def _stream_into_cache(params: RenderParams):
+    # Sync generator: Starlette pulls it from its threadpool, so the render
+    # work runs off the event loop. Small results are still cached.
+    kept: Optional[list[str]] = []
+    size = 0
+    for chunk in iter_render(params):
+        if kept is not None:
+            size += len(chunk)
+            if size <= STREAM_CACHE_LIMIT:
+                kept.append(chunk)
+            else:
+                kept = None
+        yield chunk
+    if kept is not None:
+        RENDER_CACHE.put(params, "".join(kept))
+
+
+@app.get("/api/stages")
+async def api_stages(
+    request: Request,
+    op: Literal["add", "sub", "mul", "div"] = Query("add"),
+    a: List[DigitString] = Query([str(DEFAULT_A)]),
+    b: Optional[DigitString] = Query(None),
+    unit: int = Query(56, ge=28, le=96),
+    show_grid: bool = Query(True),
+    show_marks: bool = Query(True),
+    color_mode: int = Query(1, ge=0, le=3),
+    align: Literal["left", "right"] = Query("right"),
+    sub_pos: Literal["top", "side", "none"] = Query("top"),
+    show_remainder: bool = Query(True),
+    grid: Optional[Literal["lines", "path", "pattern"]] = Query(None),
+    compact: bool = Query(False),
+    precision: int = Query(1, ge=0, le=3),
+    viewbox: bool = Query(False),
+):
+    """
+    Every stage (0..3) of one problem in a single response:
+    {"op": ..., "stages": {"0": "<svg...>", ..., "3": "<svg...>"}}
+
+    The trace and layout are computed once; the per-stage SVGs are also
+    stored in RENDER_CACHE so later /api/render calls for them are hits.
+    ETag / If-None-Match, Server-Timing and the budget work as for
+    /api/render; a summary response has "summary": true and one SVG for
+    every stage. viewbox=true as for /api/render.
+    """
+    started = time.perf_counter()
+    timings: Optional[Dict[str, float]] = {} if PROFILE_PHASES else None
+    try:
+        a, b, extra = _operands(op, a, b)
+        if op == "div" and b <= 0:
             return JSONResponse({"error": "Divisor (b) must be >= 1 for division."}, status_code=400)
+        summary = _summarize(op, a, b, extra)
 
-        svg, _data = render_division_svg(
-            dividend=int(a),
-            divisor=int(b),
-            unit=int(unit),
-            stage=int(stage),
+        base = normalize_render_params(
+            op=op,
+            a=a,
+            b=b,
+            extra_addends=extra,
+            unit=unit,
             show_grid=_bool(show_grid),
-            color_mode=int(color_mode),
-            align_mode=str(align),
-            sub_pos=str(sub_pos),
-            black=False,
+            show_marks=_bool(show_marks),
+            color_mode=color_mode,
+            align=align,
+            sub_pos=sub_pos,
             show_remainder=_bool(show_remainder),
+            grid=grid or GRID_DEFAULT,
+            compact=_bool(compact),
+            precision=precision,
+            summary=summary,
+            viewbox=_bool(viewbox),
+        )
+        etag = _etag("stages", base)
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers=_cache_headers(etag))
+        body_base = layout_params(base)
+        keys = {st: body_base._replace(stage=st) for st in STAGES}
+        svgs = {st: RENDER_CACHE.get(key) for st, key in keys.items()}
+        if any(svg is None for svg in svgs.values()):
+            svgs = await _arun(timings, op, render_stages, body_base)
+            for st, key in keys.items():
+                RENDER_CACHE.put(key, svgs[st])
+        payload: Dict[str, Any] = {"op": op, "stages": {str(st): sized(svg, base) for st, svg in svgs.items()}}
+        if summary:
+            payload["summary"] = True
+        return JSONResponse(
+            payload,
+            headers={**_cache_headers(etag), **_timing_headers(timings, started)},
         )
-        return Response(content=svg, media_type="image/svg+xml")
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=400)
+        return _error_response(e)
 
 
-@app.get("/api/trace")
-def api_trace(
+@app.get("/api/display")
+async def api_display(
+    request: Request,
     op: Literal["add", "sub", "mul", "div"] = Query("add"),
-    a: int = Query(8541, ge=0),
-    b: int = Query(1973, ge=0),
+    a: List[DigitString] = Query([str(DEFAULT_A)]),
+    b: Optional[DigitString] = Query(None),
+    unit: int = Query(56, ge=28, le=96),
+    stage: int = Query(3, ge=0, le=3),
+    show_grid: bool = Query(True),
+    show_marks: bool = Query(True),
+    color_mode: int = Query(1, ge=0, le=3),
+    align: Literal["left", "right"] = Query("right"),
+    sub_pos: Literal["top", "side", "none"] = Query("top"),
+    show_remainder: bool = Query(True),
 ):
     """
-    Unified trace endpoint (JSON).
+    The problem's display list as JSON, for drawing on a client-side canvas:
+    {"sizes": [[min_stage, w, h], ...], "items": [[min_stage, kind, ...], ...]}
+    with the items of stages 0..stage (see engine/common/display.py). It is
+    a pass over the same cached layout the SVG renders use.
+
+    ETag / If-None-Match and Server-Timing work as for /api/render. There is
+    no summary display list: problems over their budget always get a 413.
     """
+    started = time.perf_counter()
+    timings: Optional[Dict[str, float]] = {} if PROFILE_PHASES else None
     try:
-        if op == "add":
-            # use renderer to produce trace in same format as original add app
-            _svg, data = render_add_svg(addends=[int(a), int(b)])
-            return JSONResponse(data["trace"])
+        a, b, extra = _operands(op, a, b)
+        if op == "div" and b <= 0:
+            return JSONResponse({"error": "Divisor (b) must be >= 1 for division."}, status_code=400)
+        over = check_budget(op, a, b, extra, BUDGETS)
+        if over is not None:
+            OVER_BUDGET_TOTAL.inc((op, "reject"))
+            raise over
 
+        params = normalize_render_params(
+            op=op,
+            a=a,
+            b=b,
+            extra_addends=extra,
+            unit=unit,
+            stage=stage,
+            show_grid=_bool(show_grid),
+            show_marks=_bool(show_marks),
+            color_mode=color_mode,
+            align=align,
+            sub_pos=sub_pos,
+            show_remainder=_bool(show_remainder),
+        )
+        etag = _etag("display", params)
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers=_cache_headers(etag))
+        body = await _arun(timings, op, render_display_json, params)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={**_cache_headers(etag), **_timing_headers(timings, started)},
+        )
+    except Exception as e:
+        return _error_response(e)
 
-        if op == "sub":
-            return JSONResponse(compute_egel_subtraction(int(a), int(b)))
 
-        if op == "mul":
-            return JSONResponse(compute_egel_multiplication(int(a), int(b)))
+@app.get("/api/problem")
+def api_problem(
+    request: Request,
+    op: Literal["add", "sub", "mul", "div"] = Query("add"),
+    level: int = Query(1, ge=LEVELS[0], le=LEVELS[-1]),
+    remainder: bool = Query(False),
+    unit: int = Query(56, ge=28, le=96),
+    show_grid: bool = Query(True),
+    show_marks: bool = Query(True),
+    color_mode: int = Query(1, ge=0, le=3),
+    align: Literal["left", "right"] = Query("right"),
+    sub_pos: Literal["top", "side", "none"] = Query("top"),
+    show_remainder: bool = Query(True),
+    grid: Optional[Literal["lines", "path", "pattern"]] = Query(None),
+    compact: bool = Query(False),
+    precision: int = Query(1, ge=0, le=3),
+):
+    """
+    A random play-mode problem for (op, level):
+    {"op", "level", "a", "b"[, "trace", "stages": {"0": svg, ...}]}
 
-        if int(b) <= 0:
+    remainder=true lets division problems (level >= 4) have a remainder.
+    From the problem bank this is one random pick and a slice of the mapped
+    file, already gzipped; "trace" and "stages" are included when the
+    render options match those the bank was built with. Without a bank the
+    problem is sampled on the fly and the client fetches /api/stages.
+    The render options only decide whether stages can be included. A plain
+    `def`, since a cold page of the mapped file may have to be read from disk.
+    """
+    no_store = {"Cache-Control": "no-store"}
+    try:
+        params = normalize_render_params(
+            op=op,
+            a=0,
+            b=0,
+            unit=unit,
+            show_grid=_bool(show_grid),
+            show_marks=_bool(show_marks),
+            color_mode=color_mode,
+            align=align,
+            sub_pos=sub_pos,
+            show_remainder=_bool(show_remainder),
+            grid=grid or GRID_DEFAULT,
+            compact=_bool(compact),
+            precision=precision,
+        )
+        bank = PROBLEM_BANK
+        idx = bank.pick(op, level, _bool(remainder)) if bank is not None else None
+        if idx is None:
+            a, b = sample_problem(op, level, random, _bool(remainder))
+            return JSONResponse({"op": op, "level": level, "a": a, "b": b}, headers=no_store)
+        if not bank.serves(params):
+            a, b = bank.problem(idx)
+            return JSONResponse({"op": op, "level": level, "a": a, "b": b}, headers=no_store)
+        body = bank.payload_gzip(idx)
+        if negotiate(request.headers.get("accept-encoding", ""), ("gzip",)):
+            return Response(
+                content=body,
+                media_type="application/json",
+                headers={**no_store, "Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+            )
+        return Response(content=gzip.decompress(body), media_type="application/json", headers=no_store)
+    except Exception as e:
+        return _error_response(e)
+
+
+@app.get("/api/trace")
+async def api_trace(
+    request: Request,
+    op: Literal["add", "sub", "mul", "div"] = Query("add"),
+    a: List[DigitString] = Query([str(DEFAULT_A)]),
+    b: Optional[DigitString] = Query(None),
+    layout: Literal["rows", "columns"] = Query("rows"),
+):
+    """
+    Unified trace endpoint (JSON). Cacheable like /api/render (ETag + 304)
+    and kept in TRACE_BYTES_CACHE. For mul this is the full Egel trace (blocks,
+    column sums, underlines, carries), see engine/mul/algo.py. Over the
+    budget: operands and result only, with "summary": true (or a 413).
+    layout=columns sends each table as parallel arrays (see
+    engine.common.serialize.columnar).
+    """
+    started = time.perf_counter()
+    timings: Optional[Dict[str, float]] = {} if PROFILE_PHASES else None
+    try:
+        a, b, extra = _operands(op, a, b)
+        if op == "div" and b <= 0:
             return JSONResponse({"error": "Divisor (b) must be >= 1 for division."}, status_code=400)
+        summary = _summarize(op, a, b, extra)
 
-        return JSONResponse(calculate_egel_huvaah(int(a), int(b)))
+        key = (op, a, b, extra, summary, layout)
+        etag = _etag("trace", key)
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers=_cache_headers(etag))
+        body = TRACE_BYTES_CACHE.get(key)
+        if body is None:
+            body = await _arun(timings, op, compute_trace_bytes, op, a, b, extra, summary, layout)
+            TRACE_BYTES_CACHE.put(key, body)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={**_cache_headers(etag), **_timing_headers(timings, started)},
+        )
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=400)
+        return _error_response(e)
+
+
+class BatchItem(BaseModel):
+    """One /api/batch entry; fields and bounds mirror the /api/render query."""
+
+    op: Literal["add", "sub", "mul", "div"] = "add"
+    # ints or digit strings, like the query's `a` / `b`
+    a: Union[NonNegativeInt, DigitString, List[Union[NonNegativeInt, DigitString]]] = DEFAULT_A
+    b: Optional[Union[NonNegativeInt, DigitString]] = None
+    kind: Literal["render", "trace"] = "render"
+    unit: int = Field(56, ge=28, le=96)
+    stage: int = Field(3, ge=0, le=3)
+    show_grid: bool = True
+    show_marks: bool = True
+    color_mode: int = Field(1, ge=0, le=3)
+    align: Literal["left", "right"] = "right"
+    sub_pos: Literal["top", "side", "none"] = "top"
+    show_remainder: bool = True
+    grid: Optional[Literal["lines", "path", "pattern"]] = None
+    compact: bool = False
+    precision: int = Field(1, ge=0, le=3)
+    viewbox: bool = False
+
+
+def _run_batch_item(raw: Any) -> Dict[str, Any]:
+    """Render or trace one batch item; errors are returned, never raised."""
+    try:
+        if not isinstance(raw, dict):
+            raise ValueError("Batch item must be an object.")
+        item = BatchItem(**raw)
+        a, b, extra = _operands(item.op, item.a, item.b)
+        summary = _summarize(item.op, a, b, extra)
+        if item.kind == "trace":
+            return {"ok": True, "trace": _run(item.op, compute_trace, item.op, a, b, extra, summary)}
+        params = normalize_render_params(
+            op=item.op,
+            a=a,
+            b=b,
+            extra_addends=extra,
+            unit=item.unit,
+            stage=item.stage,
+            show_grid=item.show_grid,
+            show_marks=item.show_marks,
+            color_mode=item.color_mode,
+            align=item.align,
+            sub_pos=item.sub_pos,
+            show_remainder=item.show_remainder,
+            grid=item.grid or GRID_DEFAULT,
+            compact=item.compact,
+            precision=item.precision,
+            summary=summary,
+            viewbox=item.viewbox,
+        )
+        body_params = layout_params(params)
+        svg = RENDER_CACHE.get_or_compute(body_params, lambda: _run(params.op, render, body_params))
+        return {"ok": True, "svg": sized(svg, params)}
+    except ValidationError as e:
+        return {"ok": False, "error": "; ".join(
+            f"{'.'.join(str(x) for x in err['loc'])}: {err['msg']}" for err in e.errors()
+        )}
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+
+
+@app.post("/api/batch")
+def api_batch(items: List[Any] = Body(..., embed=True)):
+    """
+    Render/trace many problems in one call (worksheet generation).
+
+    Body: {"items": [{"op": "div", "a": 100, "b": 7, "kind": "render"|"trace", ...options}, ...]}
+    Response: {"results": [{"ok": true, "svg": "..."} | {"ok": true, "trace": {...}}
+                           | {"ok": false, "error": "..."}, ...]} in input order.
+
+    Items are dispatched from BATCH_POOL to RENDER_POOL, waiting for queue
+    slots rather than being rejected; a bad item (e.g. divisor 0) or a timeout
+    only fails its own slot. This handler stays a plain `def` so those waits
+    block a Starlette threadpool thread, never the event loop.
+    """
+    if len(items) > BATCH_MAX_ITEMS:
+        return JSONResponse(
+            {"error": f"Too many items ({len(items)}); at most {BATCH_MAX_ITEMS} per batch."},
+            status_code=413,
+        )
+    # traces of long operands hold ints past CPython's int -> str limit
+    results = list(BATCH_POOL.map(_run_batch_item, items))
+    return Response(content=dumps({"results": results}), media_type="application/json")
+
+
+def _prometheus_cache_lines(name: str, cache: LRUCache) -> list[str]:
+    st = cache.stats()
+    lines = []
+    for key, kind, help_text in (
+        ("hits", "counter", "Cache lookups served from the cache."),
+        ("misses", "counter", "Cache lookups that had to compute the value."),
+        ("evictions", "counter", "Entries dropped to stay within the size limits."),
+        ("entries", "gauge", "Entries currently held."),
+        ("bytes", "gauge", "Approximate payload bytes currently held."),
+    ):
+        metric = f"egel_{name}_cache_{key}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.append(f"{metric} {st[key]}")
+    return lines
+
+
+def _prometheus_pool_lines(pool: WorkerPool) -> list[str]:
+    st = pool.stats()
+    lines = [
+        "# HELP egel_pool_info Render execution mode.",
+        "# TYPE egel_pool_info gauge",
+        f'egel_pool_info{{mode="{st["mode"]}"}} 1',
+    ]
+    for key, kind, help_text in (
+        ("workers", "gauge", "Configured render workers."),
+        ("capacity", "gauge", "Maximum unfinished tasks (workers + queue)."),
+        ("pending", "gauge", "Tasks queued or running."),
+        ("completed", "counter", "Tasks finished."),
+        ("rejected", "counter", "Tasks refused because the queue was full."),
+        ("timeouts", "counter", "Requests that gave up waiting for a task."),
+    ):
+        metric = f"egel_pool_{key}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        lines.append(f"{metric} {st[key]}")
+    lines += pool.queue_wait.prometheus_lines()
+    lines += pool.compute.prometheus_lines()
+    return lines
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> str:
+    """Prometheus text exposition of server counters."""
+    lines = _prometheus_cache_lines("render", RENDER_CACHE)
+    lines += _prometheus_cache_lines("trace", TRACE_BYTES_CACHE)
+    lines += _prometheus_pool_lines(RENDER_POOL)
+    lines += PHASE_SECONDS.prometheus_lines()
+    lines += OVER_BUDGET_TOTAL.prometheus_lines()
+    return "\n".join(lines) + "\n"
 
 
 if __name__ == "__main__":
@@ -182,10 +182,33 @@
     return {a: dividend, b: divisor, q, r};
   }
 
-  function newProblem(){
+  // Play mode takes problems from the server's precomputed bank: one request
+  // returns the numbers together with all stages and the trace, so stepping
+  // through hints never renders anything. Falls back to local generation.
+  async function fetchBankProblem(lvl){
+    const params = getRenderParams();
+    ["a", "b", "stage"].forEach(k => params.delete(k));
+    params.set("level", String(lvl));
+    if(state.op==="div" && state.allowRemainder) params.set("remainder", "true");
+    try{
+      const res = await fetch(`/api/problem?${params.toString()}`);
+      if(!res.ok) return null;
+      const p = await res.json();
+      return (p && p.op === state.op) ? p : null;
+    }catch(_){
+      return null;
+    }
+  }
+
+  async function newProblem(){
     const lvl = state.level[state.op] || 1;
+    const op = state.op;
+    const banked = (state.mode==="play") ? await fetchBankProblem(lvl) : null;
+    if(op !== state.op) return;  // tab switched while waiting
 
-    if(state.op==="div"){
+    if(banked){
+      state.a = banked.a; state.b = banked.b;
+    } else if(state.op==="div"){
       const p = makeDivProblem(lvl);
       state.a = p.a; state.b = p.b;
       state.correct_q = p.q; state.correct_r = p.r;
@@ -205,6 +228,14 @@
       state.a = randNDigits(spec.aDigits, true);
       state.b = randNDigits(spec.bDigits, true);
     }
+    if(banked && banked.stages){
+      const params = getRenderParams();
+      params.delete("stage");
+      stageCache = { key: params.toString(), stages: banked.stages };
+    }
+    if(banked && banked.trace){
+      traceCache = { key: `${state.op}:${state.a}:${state.b}`, trace: banked.trace };
+    }
 
     computeCorrect();
     state.stage = 0;
@@ -290,8 +321,76 @@
     return params;
   }
 
+  // Play mode steps through stages 0..3 of the same problem. Bank problems
+  // arrive with all stages (kept here, stepping is local); otherwise the
+  // shown SVG is "slotted" (empty <g data-slot> placeholders where later
+  // stages go) and each step fetches only the delta and fills them in.
+  let stageCache = { key: null, stages: null };
+  let traceCache = { key: null, trace: null };
+  let liveSvg = { key: null, stage: -1 };
+
+  // Fill the placeholders of the shown SVG from a delta response
+  // (/api/render?from_stage=..); false if it does not fit what is shown.
+  function applyDelta(text){
+    const svg = svgHost.querySelector("svg");
+    const root = new DOMParser().parseFromString(text, "image/svg+xml").documentElement;
+    if(!svg || root.nodeName !== "svg") return false;
+    const nodes = Array.from(root.children);
+    const targets = nodes.map(n => n.hasAttribute("data-slot")
+      ? svg.querySelector(`g[data-slot="${n.getAttribute("data-slot")}"]`) : svg);
+    if(targets.some(t => !t)) return false;
+    ["width", "height", "viewBox"].forEach(k => {
+      if(root.hasAttribute(k)) svg.setAttribute(k, root.getAttribute(k));
+    });
+    nodes.forEach((n, i) => {
+      const node = document.importNode(n, true);
+      // slot groups replace their placeholder; anything else (compact's <style>) is appended
+      if(targets[i] === svg) svg.appendChild(node); else targets[i].replaceWith(node);
+    });
+    return true;
+  }
+
+  async function renderStep(params){
+    const stage = state.stage;
+    params.delete("stage");
+    const key = params.toString();
+    if(stageCache.key === key){
+      svgHost.innerHTML = stageCache.stages[String(stage)];
+      liveSvg = { key: null, stage: -1 };
+      return;
+    }
+    if(liveSvg.key === key && liveSvg.stage === stage) return;
+    if(liveSvg.key === key && liveSvg.stage < stage){
+      const res = await fetch(`/api/render?${key}&stage=${stage}&from_stage=${liveSvg.stage}`);
+      if(!res.ok) throw new Error(await res.text());
+      const text = await res.text();
+      if(stage !== state.stage || liveSvg.key !== key) return;
+      if(!res.headers.get("X-Egel-Summary") && applyDelta(text)){
+        liveSvg.stage = stage;
+        return;
+      }
+    }
+    const res = await fetch(`/api/render?${key}&stage=${stage}&slots=true`);
+    if(!res.ok) throw new Error(await res.text());
+    const text = await res.text();
+    if(stage !== state.stage) return;
+    svgHost.innerHTML = text;
+    // a summary (problem over the server's budget) looks the same at every stage
+    liveSvg = { key, stage: res.headers.get("X-Egel-Summary") ? 3 : stage };
+  }
+
   async function render(){
     const params = getRenderParams();
+    if(state.mode==="play"){
+      try{
+        await renderStep(params);
+      }catch(err){
+        liveSvg = { key: null, stage: -1 };
+        svgHost.innerHTML = `<div class="placeholder">⚠️ Алдаа: ${String(err)}</div>`;
+      }
+      return;
+    }
+    liveSvg = { key: null, stage: -1 };
     const url = `/api/render?${params.toString()}`;
     svgHost.innerHTML = `<div class="placeholder">⏳ Зурж байна…</div>`;
     try{
@@ -311,9 +410,14 @@
     params.set("b", String(state.b));
     const url = `/api/trace?${params.toString()}`;
     try{
-      const res = await fetch(url);
-      if(!res.ok) throw new Error(await res.text());
-      const data = await res.json();
+      let data;
+      if(traceCache.key === `${state.op}:${state.a}:${state.b}`){
+        data = traceCache.trace;
+      } else {
+        const res = await fetch(url);
+        if(!res.ok) throw new Error(await res.text());
+        data = await res.json();
+      }
       $("tracePanel").style.display = "block";
       $("traceBox").textContent = JSON.stringify(data, null, 2);
     }catch(err){
@@ -0,0 +1,180 @@
+"""Benchmark cases: engine kernels, full renders and the HTTP endpoint.
+
+Operands are drawn from a seeded RNG, so a case name ("add.trace[n=3,d=8]")
+always means the same inputs and results from different runs compare.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+from bench import reference
+from bench.harness import Case, measure_async
+from engine.add import algo as add_algo
+from engine.add.algo import compute_egel_addition, compute_egel_addition_batch, compute_egel_addition_compact
+from engine.api import LAYOUT_CACHE, compute_trace_bytes, normalize_render_params, render, render_display_json
+from engine.common.digits import decimal, parse
+from engine.div.core import calculate_egel_huvaah
+from engine.mul.algo import compute_egel_multiplication
+from engine.mul.render import multiply_digits, parse_digits_units_first, render_svg_lua_match
+from engine.sub.algo import compute_egel_subtraction, compute_egel_subtraction_batch
+
+# render option variants swept for every op and size
+RENDER_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "compact": {"compact": True},
+    "path": {"grid": "path"},
+}
+
+# problems per *.batch case
+BATCH_PROBLEMS = 100
+
+
+def operand(rng: random.Random, digits: int) -> int:
+    if digits <= 1:
+        return rng.randint(1, 9)
+    return rng.randint(10 ** (digits - 1), 10**digits - 1)
+
+
+def _json_bytes(value: Any) -> int:
+    return len(json.dumps(value, default=lambda o: o.__dict__, separators=(",", ":")))
+
+
+def _text_bytes(value: str) -> int:
+    return len(value.encode("utf-8"))
+
+
+def engine_cases(digits: Sequence[int], addends: Sequence[int], seed: int = 1) -> Iterator[Case]:
+    """The arithmetic kernels alone (no layout, no SVG)."""
+    for d in digits:
+        rng = random.Random(f"{seed}:engine:{d}")
+        batch_rng = random.Random(f"{seed}:batch:{d}")  # keeps rng's draws as they were
+        for n in addends:
+            xs = [operand(rng, d) for _ in range(n)]
+            yield Case(f"add.trace[n={n},d={d}]", lambda xs=xs: compute_egel_addition(xs, "scalar"), _json_bytes)
+            yield Case(
+                f"add.trace.compact[n={n},d={d}]",
+                lambda xs=xs: compute_egel_addition_compact(xs).to_json(),
+                _text_bytes,
+            )
+            if n <= add_algo.TABLE_MAX_ADDENDS:
+                yield Case(f"add.trace.table[n={n},d={d}]", lambda xs=xs: compute_egel_addition(xs, "table"), _json_bytes)
+                batch = [[operand(batch_rng, d) for _ in range(n)] for _ in range(BATCH_PROBLEMS)]
+                yield Case(f"add.batch[n={n},d={d}]", lambda batch=batch: compute_egel_addition_batch(batch))
+            if add_algo.np is not None:
+                yield Case(f"add.trace.vector[n={n},d={d}]", lambda xs=xs: compute_egel_addition(xs, "vector"), _json_bytes)
+        a, b = operand(rng, d), operand(rng, d)
+        a, b = max(a, b), min(a, b)
+        yield Case(f"sub.trace[d={d}]", lambda a=a, b=b: compute_egel_subtraction(a, b), _json_bytes)
+        pairs = [(operand(batch_rng, d), operand(batch_rng, d)) for _ in range(BATCH_PROBLEMS)]
+        yield Case(f"sub.batch[d={d}]", lambda pairs=pairs: compute_egel_subtraction_batch(pairs))
+        A, B = parse_digits_units_first(a), parse_digits_units_first(b)
+        yield Case(f"mul.multiply_digits[d={d}]", lambda A=A, B=B: multiply_digits(A, B))
+        yield Case(f"mul.trace[d={d}]", lambda a=a, b=b: compute_egel_multiplication(a, b), _json_bytes)
+        yield Case(f"mul.render_svg_lua_match[d={d}]", lambda a=a, b=b: render_svg_lua_match(a, b), _text_bytes)
+        yield Case(f"digits.decimal[d={d}]", lambda a=a: decimal(a), _text_bytes)
+        yield Case(f"digits.parse[d={d}]", lambda s=decimal(a): parse(s))
+        # divisor at most 4 digits, as in play mode; the dividend carries the size
+        divisor = operand(rng, min(d, 4))
+        yield Case(f"div.trace[d={d}]", lambda a=a, q=divisor: calculate_egel_huvaah(a, q), _json_bytes)
+        # /api/trace bodies in both layouts (mul traces are cached: mostly the encoder)
+        for op in ("add", "sub", "mul", "div"):
+            bb = divisor if op == "div" else b
+            for layout in ("rows", "columns"):
+                yield Case(f"trace_json.{op}.{layout}[d={d}]", lambda op=op, a=a, b=bb, layout=layout: compute_trace_bytes(op, a, b, layout=layout), len)
+
+
+# "<case>.reference[...]" cases time bench/reference.py on the inputs of
+# "<case>[...]"; bench/run.py reports the ratio of the two
+REFERENCE = ".reference"
+
+
+def mul_shape_cases(shapes: Sequence[Tuple[int, int]], seed: int = 1) -> Iterator[Case]:
+    """Multiplication trace and render for m x n digit operands (scaling
+    runs), and the trace of the earlier per-column dict/sort pass."""
+    for m, n in shapes:
+        rng = random.Random(f"{seed}:mul:{m}x{n}")
+        a, b = operand(rng, m), operand(rng, n)
+        yield Case(f"mul.trace[m={m},n={n}]", lambda a=a, b=b: compute_egel_multiplication(a, b), _json_bytes)
+        yield Case(f"mul.trace{REFERENCE}[m={m},n={n}]", lambda a=a, b=b: reference.egel_multiplication(a, b), _json_bytes)
+        yield Case(f"mul.render_svg_lua_match[m={m},n={n}]", lambda a=a, b=b: render_svg_lua_match(a, b), _text_bytes)
+
+
+def _cold(fn, p):
+    # every repetition lays the problem out again instead of reusing LAYOUT_CACHE
+    LAYOUT_CACHE.clear()
+    return fn(p)
+
+
+def render_cases(digits: Sequence[int], seed: int = 1, options: Sequence[str] = tuple(RENDER_OPTIONS)) -> Iterator[Case]:
+    """engine.api.render end to end (trace + layout + SVG text), per option
+    set, and the JSON display list ("display.<op>") for comparison."""
+    for d in digits:
+        rng = random.Random(f"{seed}:render:{d}")
+        a, b = operand(rng, d), operand(rng, d)
+        a, b = max(a, b), min(a, b)
+        for op in ("add", "sub", "mul", "div"):
+            bb = operand(rng, min(d, 4)) if op == "div" else b
+            for opt in options:
+                p = normalize_render_params(op=op, a=a, b=bb, **RENDER_OPTIONS[opt])
+                yield Case(f"render.{op}.{opt}[d={d}]", lambda p=p: _cold(render, p), _text_bytes)
+            p = normalize_render_params(op=op, a=a, b=bb)
+            yield Case(f"display.{op}[d={d}]", lambda p=p: _cold(render_display_json, p), _text_bytes)
+
+
+def load_app(mode: str = "thread"):
+    """Import apps/web/backend/app.py as a module; EGEL_EXECUTOR, if set, wins over `mode`."""
+    os.environ.setdefault("EGEL_EXECUTOR", mode)
+    path = Path(__file__).resolve().parents[1] / "apps" / "web" / "backend" / "app.py"
+    spec = importlib.util.spec_from_file_location("egel_bench_app", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def http_cases(
+    digits: Sequence[int], requests: int, concurrency: int, executor: str = "thread", seed: int = 1
+) -> List[Dict[str, Any]]:
+    """/api/render through the ASGI app in-process (no sockets).
+
+    Needs httpx and the web dependencies; returns [] without them. "hot"
+    repeats one URL (cache hits), "cold" makes every URL unique so each
+    request renders on the app's RENDER_POOL.
+    """
+    try:
+        import httpx
+
+        app_mod = load_app(executor)
+    except ImportError as e:
+        print(f"http suite skipped: {e}", file=sys.stderr)
+        return []
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app_mod.app), base_url="http://bench")
+    out = []
+    try:
+        for d in digits:
+            rng = random.Random(f"{seed}:http:{d}")
+            for op in ("add", "sub", "mul", "div"):
+                a = operand(rng, d)
+                b = operand(rng, min(d, 4))
+                for kind in ("hot", "cold"):
+                    app_mod.RENDER_CACHE.clear()
+
+                    async def request(i: int, op=op, a=a, b=b, kind=kind) -> int:
+                        q = {"op": op, "a": a + (i if kind == "cold" else 0), "b": b}
+                        r = await client.get("/api/render", params=q)
+                        r.raise_for_status()
+                        return len(r.content)
+
+                    res = measure_async(request, requests, concurrency)
+                    out.append({"name": f"http.render.{op}.{kind}[d={d}]", **res})
+    finally:
+        asyncio.run(client.aclose())
+        app_mod.RENDER_POOL.shutdown()
+    return out
@@ -0,0 +1,208 @@
+"""Timing, allocation and baseline machinery for bench/run.py."""
+from __future__ import annotations
+
+import asyncio
+import fnmatch
+import gc
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+# Relative growth tolerated before a metric counts as a regression. Keys are
+# metric names; "lower" metrics regress when they grow, ops_per_sec when it
+# shrinks. Overridden by bench/thresholds.json and the CLI.
+DEFAULT_THRESHOLDS: Dict[str, float] = {
+    "ops_per_sec": 0.25,
+    "p50_us": 0.25,
+    "alloc_peak_bytes": 0.25,
+    "output_bytes": 0.05,
+}
+HIGHER_IS_BETTER = frozenset(("ops_per_sec",))
+
+
+class Case(NamedTuple):
+    """One benchmark: `fn()` is timed; `size(result)` gives output bytes."""
+
+    name: str
+    fn: Callable[[], Any]
+    size: Optional[Callable[[Any], int]] = None
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    # nearest-rank on an already sorted list
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def _summary(samples: List[float], total: float) -> Dict[str, float]:
+    samples.sort()
+    return {
+        "rounds": len(samples),
+        "ops_per_sec": len(samples) / total if total > 0 else 0.0,
+        "mean_us": 1e6 * total / len(samples),
+        "min_us": 1e6 * samples[0],
+        "p50_us": 1e6 * _percentile(samples, 0.50),
+        "p90_us": 1e6 * _percentile(samples, 0.90),
+        "p99_us": 1e6 * _percentile(samples, 0.99),
+        "max_us": 1e6 * samples[-1],
+    }
+
+
+def measure(case: Case, min_time: float = 0.2, min_rounds: int = 5, max_rounds: int = 100_000, warmup: int = 2) -> Dict[str, Any]:
+    """Time `case.fn` call by call until both `min_time` and `min_rounds` are reached.
+
+    The garbage collector is paused while timing so a collection triggered
+    by an earlier case does not land in this one's percentiles. Allocations
+    are measured on one extra call under tracemalloc (which slows it down,
+    so it is kept out of the timings).
+    """
+    fn = case.fn
+    result = None
+    for _ in range(warmup):
+        result = fn()
+
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    samples: List[float] = []
+    clock = time.perf_counter
+    total = 0.0
+    try:
+        while (total < min_time or len(samples) < min_rounds) and len(samples) < max_rounds:
+            t0 = clock()
+            fn()
+            dt = clock() - t0
+            samples.append(dt)
+            total += dt
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    out: Dict[str, Any] = _summary(samples, total)
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        kept = fn()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    out["alloc_peak_bytes"] = max(0, peak - before)
+    out["alloc_retained_bytes"] = max(0, after - before)
+    del kept
+
+    if case.size is not None and result is not None:
+        out["output_bytes"] = case.size(result)
+    return out
+
+
+def measure_async(
+    request: Callable[[int], Awaitable[int]],
+    total_requests: int,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """Throughput of `request(i)` (returns response bytes) with `concurrency`
+    requests in flight; latencies are per request, wall time for ops/sec."""
+
+    async def main() -> Dict[str, Any]:
+        samples: List[float] = []
+        sizes: List[int] = []
+        next_i = 0
+
+        async def worker() -> None:
+            nonlocal next_i
+            while next_i < total_requests:
+                i = next_i
+                next_i += 1
+                t0 = time.perf_counter()
+                sizes.append(await request(i))
+                samples.append(time.perf_counter() - t0)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+        out = _summary(samples, sum(samples))
+        out["ops_per_sec"] = len(samples) / wall if wall > 0 else 0.0
+        out["concurrency"] = concurrency
+        out["output_bytes"] = sum(sizes) // max(1, len(sizes))
+        return out
+
+    return asyncio.run(main())
+
+
+def meta() -> Dict[str, Any]:
+    from engine.api import ENGINE_VERSION
+    from engine.common.serialize import ENCODER
+
+    return {
+        "engine_version": ENGINE_VERSION,
+        "json_encoder": ENCODER,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def save(path: str, results: Dict[str, Dict[str, Any]], argv: List[str]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"meta": {**meta(), "argv": argv}, "results": results}, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def load_thresholds(path: Optional[str]) -> Dict[str, Any]:
+    """{"default": {metric: tolerance}, "cases": {glob: {metric: tolerance}}}"""
+    cfg: Dict[str, Any] = {"default": dict(DEFAULT_THRESHOLDS), "cases": {}}
+    if path:
+        with open(path, encoding="utf-8") as f:
+            user = json.load(f)
+        cfg["default"].update(user.get("default", {}))
+        cfg["cases"].update(user.get("cases", {}))
+    return cfg
+
+
+def _limits(name: str, cfg: Dict[str, Any]) -> Dict[str, float]:
+    limits = dict(cfg["default"])
+    for pattern, override in cfg["cases"].items():
+        if fnmatch.fnmatchcase(name, pattern):
+            limits.update(override)
+    return limits
+
+
+def compare(
+    current: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    cfg: Dict[str, Any],
+) -> List[str]:
+    """Human-readable regressions of `current` against `baseline`.
+
+    Only cases present in both are compared; a tolerance of null/negative
+    switches a metric off for the matching cases.
+    """
+    problems = []
+    for name in sorted(set(current) & set(baseline)):
+        cur, base = current[name], baseline[name]
+        for metric, tol in _limits(name, cfg).items():
+            if tol is None or tol < 0 or metric not in cur or metric not in base:
+                continue
+            old, new = float(base[metric]), float(cur[metric])
+            if old <= 0:
+                continue
+            change = (new - old) / old
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if worse > tol:
+                problems.append(f"{name}: {metric} {old:.6g} -> {new:.6g} ({change:+.1%}, limit {tol:.0%})")
+    return problems
@@ -0,0 +1,72 @@
+"""Earlier implementations kept as benchmark references.
+
+Each one returns exactly what the engine function it stands for returns
+(tests check that), so bench/run.py can report the engine's speed as a
+ratio against it on the same inputs.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+
+def egel_multiplication(a: int, b: int) -> Dict[str, Any]:
+    """engine.mul.algo.compute_egel_multiplication with the Egel-add pass of
+    the original render_svg_lua_match: cells gathered into per-column lists
+    of dicts, each column sorted by row, underlines counted in nested
+    y -> x dicts."""
+    A = [int(ch) for ch in reversed(str(a))]
+    B = [int(ch) for ch in reversed(str(b))]
+    m, n = len(A), len(B)
+    Bms = B[::-1]
+
+    blocks = []
+    for i in range(m):
+        for j in range(n):
+            t, u = divmod(A[i] * Bms[j], 10)
+            blocks.append({"i": i, "j": j, "x": j - i, "y": 2 + i + j, "t": t, "u": u})
+
+    x_min, x_max = 1 - m, n
+    digits_by_col: Dict[int, List[Dict[str, int]]] = {x: [] for x in range(x_min, x_max + 1)}
+    for b0 in blocks:
+        digits_by_col[b0["x"]].append({"x": b0["x"], "y": b0["y"], "d": b0["t"]})
+        digits_by_col[b0["x"] + 1].append({"x": b0["x"] + 1, "y": b0["y"], "d": b0["u"]})
+
+    columns = []
+    underline: Dict[int, Dict[int, int]] = {}
+    carries = []
+    carry_in = 0
+    for x in range(x_max, x_min - 1, -1):
+        s = carry_in
+        tens = 0
+        col_list = digits_by_col[x]
+        col_list.sort(key=lambda it: it["y"])  # top -> bottom
+        for it in col_list:
+            s += it["d"]
+            if s >= 10:
+                produced = s // 10
+                tens += produced
+                s %= 10
+                underline.setdefault(it["y"], {})
+                underline[it["y"]][x] = underline[it["y"]].get(x, 0) + produced
+        columns.append({
+            "x": x, "place": n - x, "carry_in": carry_in, "rows": [it["y"] for it in col_list],
+            "digits": [it["d"] for it in col_list], "result_digit": s, "carry_out": tens,
+        })
+        if tens > 0:
+            carries.append({"x": x - 1, "value": tens, "src": x})
+        carry_in = tens
+
+    product = (str(carry_in) if carry_in else "") + "".join(str(c["result_digit"]) for c in reversed(columns))
+    return {
+        "op": "mul",
+        "a": a,
+        "b": b,
+        "result": a * b,
+        "a_digits": A,
+        "b_digits": Bms,
+        "blocks": blocks,
+        "columns": columns,
+        "underlines": [{"x": x, "y": y, "count": cnt} for y, marks in underline.items() for x, cnt in marks.items()],
+        "carries": carries,
+        "product": product.lstrip("0") or "0",
+    }
@@ -0,0 +1,151 @@
+"""Benchmark the engines, the renderers and /api/render.
+
+    python -m bench.run                               # all suites, digits 1..64
+    python -m bench.run --suite engine --max-digits 256
+    python -m bench.run --suite engine --addends 1000 --digits 50 --filter 'add.*'
+    python -m bench.run --suite engine --mul-shapes 10x10,30x30,10x100,100x100 --filter 'mul.*[m=*'
+                                                      # + speedup over bench/reference.py
+    python -m bench.run --save bench/baselines/main.json
+    python -m bench.run --compare bench/baselines/main.json   # exit 1 on regression
+
+Each case reports ops/sec, latency percentiles (µs), tracemalloc peak and
+retained bytes of one call, and output bytes (trace JSON / SVG text).
+Regression limits come from bench/thresholds.json (see harness.compare).
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from bench import cases
+from bench.harness import compare, load, load_thresholds, measure, save
+
+SUITES = ("engine", "render", "http")
+THRESHOLDS = Path(__file__).resolve().parent / "thresholds.json"
+
+
+def _digits(max_digits: int) -> List[int]:
+    # 1, 2, 4, ... and max_digits itself
+    out, d = [], 1
+    while d < max_digits:
+        out.append(d)
+        d *= 2
+    return out + [max_digits]
+
+
+def _ints(text: str) -> List[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def _shapes(text: str) -> List[Tuple[int, int]]:
+    # "10x10,30x100" -> [(10, 10), (30, 100)]
+    out = []
+    for item in text.split(","):
+        if item.strip():
+            m, _, n = item.strip().lower().partition("x")
+            out.append((int(m), int(n or m)))
+    return out
+
+
+def _row(name: str, r: Dict[str, Any]) -> str:
+    out = r.get("output_bytes")
+    alloc = r.get("alloc_peak_bytes")
+    return (
+        f"{name:44} {r['ops_per_sec']:>11.1f} {r['p50_us']:>10.1f} {r['p90_us']:>10.1f} {r['p99_us']:>10.1f}"
+        f" {'' if alloc is None else alloc:>11} {'' if out is None else out:>9}"
+    )
+
+
+def _reference_ratios(results: Dict[str, Dict[str, Any]]) -> List[str]:
+    # "x.reference[k]" against "x[k]": p50 of the reference over p50 of the engine
+    lines = []
+    for name, ref in results.items():
+        base, sep, params = name.partition(cases.REFERENCE + "[")
+        case = f"{base}[{params}"
+        cur = results.get(case)
+        if not sep or cur is None or not cur["p50_us"]:
+            continue
+        cur["reference_ratio"] = ratio = ref["p50_us"] / cur["p50_us"]
+        lines.append(f"{case:48} {ratio:>6.2f}x  ({ref['p50_us']:.1f} -> {cur['p50_us']:.1f} µs p50)")
+    return lines
+
+
+def main(argv: List[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--suite", default=",".join(SUITES), help="comma list of " + ", ".join(SUITES))
+    ap.add_argument("--max-digits", type=int, default=64, help="sweep 1, 2, 4, ... up to this many digits")
+    ap.add_argument("--digits", type=_ints, help="explicit digit counts (overrides --max-digits)")
+    ap.add_argument("--addends", type=_ints, default=[2, 3, 5, 10], help="addend counts for add.trace")
+    ap.add_argument("--mul-shapes", type=_shapes, default=[], help="m x n digit shapes for mul.trace/render, e.g. 30x30,100x100")
+    ap.add_argument("--options", default=",".join(cases.RENDER_OPTIONS), help="render option sets")
+    ap.add_argument("--filter", default="*", help="only cases whose name matches this glob")
+    ap.add_argument("--min-time", type=float, default=0.2, help="seconds of timing per case")
+    ap.add_argument("--http-requests", type=int, default=200)
+    ap.add_argument("--http-concurrency", type=int, default=8)
+    ap.add_argument("--http-digits", type=_ints, default=[4, 16])
+    ap.add_argument("--executor", default="thread", help="EGEL_EXECUTOR for the http suite")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--save", help="write results as a JSON baseline")
+    ap.add_argument("--compare", help="baseline JSON to check against")
+    ap.add_argument("--thresholds", default=str(THRESHOLDS))
+    ap.add_argument("--json", action="store_true", help="print results as JSON instead of a table")
+    args = ap.parse_args(argv)
+
+    suites = [s.strip() for s in args.suite.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        ap.error(f"unknown suite(s): {', '.join(sorted(unknown))}")
+    digits = args.digits or _digits(args.max_digits)
+
+    todo = []
+    if "engine" in suites:
+        todo += list(cases.engine_cases(digits, args.addends, args.seed))
+        todo += list(cases.mul_shape_cases(args.mul_shapes, args.seed))
+    if "render" in suites:
+        todo += list(cases.render_cases(digits, args.seed, [o for o in args.options.split(",") if o]))
+    todo = [c for c in todo if fnmatch.fnmatchcase(c.name, args.filter)]
+
+    results: Dict[str, Dict[str, Any]] = {}
+    if not args.json:
+        print(f"{'case':44} {'ops/s':>11} {'p50 µs':>10} {'p90 µs':>10} {'p99 µs':>10} {'alloc B':>11} {'out B':>9}")
+    for case in todo:
+        results[case.name] = r = measure(case, min_time=args.min_time)
+        if not args.json:
+            print(_row(case.name, r), flush=True)
+    if "http" in suites:
+        for r in cases.http_cases(args.http_digits, args.http_requests, args.http_concurrency, args.executor, args.seed):
+            name = r.pop("name")
+            if fnmatch.fnmatchcase(name, args.filter):
+                results[name] = r
+                if not args.json:
+                    print(_row(name, r), flush=True)
+    ratios = _reference_ratios(results)
+    if ratios and not args.json:
+        print("\nspeedup over bench/reference.py:")
+        for line in ratios:
+            print("  " + line)
+    if args.json:
+        print(json.dumps(results, indent=2, sort_keys=True))
+
+    if args.save:
+        Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+        save(args.save, results, argv)
+        print(f"saved {len(results)} results to {args.save}", file=sys.stderr)
+    if args.compare:
+        problems = compare(results, load(args.compare), load_thresholds(args.thresholds))
+        if problems:
+            print(f"\n{len(problems)} regression(s) against {args.compare}:", file=sys.stderr)
+            for line in problems:
+                print("  " + line, file=sys.stderr)
+            return 1
+        print(f"no regressions against {args.compare}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
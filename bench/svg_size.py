@@ -0,0 +1,64 @@
+"""Payload size of /api/render output, default vs compact, per op.
+
+    python bench/svg_size.py              # table for the built-in problem set
+    python bench/svg_size.py --precision 0 --grid path
+
+Sizes are raw bytes (what a client without gzip receives) and gzip -6 bytes
+for reference.
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from engine.api import normalize_render_params, render  # noqa: E402
+
+# (op, a, b): a typical worksheet problem and a large one per op
+PROBLEMS = (
+    ("add", 8541, 1973),
+    ("add", 98765432109876, 1234567890123),
+    ("sub", 8541, 1973),
+    ("sub", 98765432109876, 1234567890123),
+    ("mul", 123, 45),
+    ("mul", 98765432, 12345678),
+    ("div", 1000, 7),
+    ("div", 987654321987, 37),
+)
+
+
+def _size(svg: str) -> tuple[int, int]:
+    raw = svg.encode("utf-8")
+    return len(raw), len(gzip.compress(raw, 6))
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--precision", type=int, default=1)
+    ap.add_argument("--grid", choices=("lines", "path", "pattern"), default="lines")
+    ap.add_argument("--stage", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    print(f"{'op':4} {'a':>16} {'b':>14} {'bytes':>8} {'compact':>8} {'ratio':>6} {'gz':>7} {'gz compact':>10}")
+    totals = {}
+    for op, a, b in PROBLEMS:
+        base = normalize_render_params(op=op, a=a, b=b, stage=args.stage, grid=args.grid)
+        full, full_gz = _size(render(base))
+        small, small_gz = _size(render(base._replace(compact=True, precision=args.precision)))
+        t = totals.setdefault(op, [0, 0])
+        t[0] += full
+        t[1] += small
+        print(f"{op:4} {a:>16} {b:>14} {full:>8} {small:>8} {full / small:>5.2f}x {full_gz:>7} {small_gz:>10}")
+    print()
+    for op, (full, small) in totals.items():
+        print(f"{op}: {full} -> {small} bytes ({full / small:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
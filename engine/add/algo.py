@@ -1,7 +1,35 @@
 from __future__ import annotations
 
+import json
+from array import array
 from dataclasses import dataclass
-from typing import List, Tuple, Optional, Dict
+from functools import lru_cache
+from itertools import accumulate
+from operator import add
+from typing import Any, List, Tuple, Optional, Dict, Sequence
+
+from engine.common.bytetables import DIGIT_ASCII, DIGIT_VALUES, PAIR_DIFF, TIMES10, byte_table
+from engine.common.digits import Operand, decimal, operand
+from engine.common.timing import timed_phase
+
+try:  # optional: `pip install numpy` enables the vectorized column pass
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+# compute_egel_addition(mode=...):
+#   scalar  walk each column digit by digit
+#   table   every column at once through byte lookup tables (up to
+#           TABLE_MAX_ADDENDS addends; falls back to scalar above that)
+#   vector  column sums and ten-completion rows for all columns at once from
+#           a digit matrix (needs numpy; falls back to scalar without it)
+#   auto    table for up to TABLE_MAX_ADDENDS addends of at least
+#           TABLE_MIN_DIGITS digits, else vector for inputs of at least
+#           VECTOR_MIN_CELLS digits
+ADD_MODES = ("auto", "scalar", "table", "vector")
+VECTOR_MIN_CELLS = 2048
+TABLE_MAX_ADDENDS = 7
+TABLE_MIN_DIGITS = 8
 
 
 @dataclass(frozen=True)
@@ -37,48 +65,199 @@ class EgelAddTrace:
     warnings: List[str]
 
 
-def _digits(n: int) -> List[int]:
-    if n == 0:
-        return [0]
-    out: List[int] = []
-    while n > 0:
-        out.append(n % 10)
-        n //= 10
-    return out  # least significant first
+# Underline is frozen, so equal marks can share one instance; constructing
+# a frozen dataclass costs far more than the pass that finds it.
+_underline = lru_cache(maxsize=1 << 16)(Underline)
 
+class CompactAddTrace:
+    """Array-backed form of EgelAddTrace: no object per column or underline.
 
-def compute_egel_addition(addends: List[int]) -> EgelAddTrace:
-    """Compute an 'Эгэл нэмэх' trace for the given non-negative integers."""
+    With n = len(addends), column c (0 = units; the last one is the
+    synthetic final-carry column when there is a final carry) is
 
-    if not addends:
-        raise ValueError("At least one addend is required")
+      digits[c*n:(c+1)*n]                   addend digits, top to bottom (bytes)
+      carry_in[c], carry_out[c], result_digit[c]
+      ul_row[ul_start[c]:ul_start[c+1]]     rows of its underlines, in order
+                                            (-1 = the carry-in cell)
 
-    if any((not isinstance(x, int)) for x in addends):
-        raise TypeError("All addends must be integers")
+    The EgelAddTrace attributes are available too; `columns` is built on
+    first access and to_dataclass() returns the frozen dataclass itself.
+    to_dict(), to_columns() and to_json() read the arrays directly.
+    """
+
+    __slots__ = (
+        "addends", "sum_value", "max_digits", "warnings",
+        "digits", "carry_in", "carry_out", "result_digit", "ul_start", "ul_row",
+        "_columns",
+    )
+
+    def __init__(
+        self,
+        addends: List[int],
+        sum_value: int,
+        max_digits: int,
+        warnings: List[str],
+        digits: bytes,
+        carry_in: Sequence[int],
+        carry_out: Sequence[int],
+        result_digit: Sequence[int],
+        ul_start: Sequence[int],
+        ul_row: Sequence[int],
+    ) -> None:
+        self.addends = addends
+        self.sum_value = sum_value
+        self.max_digits = max_digits
+        self.warnings = warnings
+        self.digits = digits
+        self.carry_in = carry_in
+        self.carry_out = carry_out
+        self.result_digit = result_digit
+        self.ul_start = ul_start
+        self.ul_row = ul_row
+        self._columns: Optional[List[ColumnTrace]] = None
+
+    def column_digits(self, col: int) -> bytes:
+        n = len(self.addends)
+        return self.digits[col * n : (col + 1) * n]
+
+    def underline_rows(self, col: int) -> Sequence[int]:
+        return self.ul_row[self.ul_start[col] : self.ul_start[col + 1]]
+
+    @property
+    def columns(self) -> List[ColumnTrace]:
+        if self._columns is None:
+            self._columns = [
+                ColumnTrace(
+                    col=c,
+                    digits=list(self.column_digits(c)),
+                    carry_in=self.carry_in[c],
+                    carry_out=self.carry_out[c],
+                    result_digit=self.result_digit[c],
+                    underlines=[_underline(r, c) for r in self.underline_rows(c)],
+                )
+                for c in range(self.max_digits)
+            ]
+        return self._columns
+
+    def to_dataclass(self) -> EgelAddTrace:
+        return EgelAddTrace(
+            addends=self.addends,
+            sum_value=self.sum_value,
+            max_digits=self.max_digits,
+            columns=self.columns,
+            warnings=self.warnings,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Same as trace_to_dict(self.to_dataclass()), without the dataclasses."""
+        return {
+            "addends": list(self.addends),
+            "sum_value": self.sum_value,
+            "max_digits": self.max_digits,
+            "columns": [
+                {
+                    "col": c,
+                    "digits": list(self.column_digits(c)),
+                    "carry_in": self.carry_in[c],
+                    "carry_out": self.carry_out[c],
+                    "result_digit": self.result_digit[c],
+                    "underlines": [{"row": r, "col": c} for r in self.underline_rows(c)],
+                }
+                for c in range(self.max_digits)
+            ],
+            "warnings": list(self.warnings),
+        }
+
+    def to_columns(self) -> Dict[str, Any]:
+        """to_dict() with "columns" as parallel arrays, one entry per column.
+        A column's underlines are the list of their rows (the col is implied)."""
+        m = self.max_digits
+        return {
+            "addends": list(self.addends),
+            "sum_value": self.sum_value,
+            "max_digits": m,
+            "columns": {
+                "col": list(range(m)),
+                "digits": [list(self.column_digits(c)) for c in range(m)],
+                "carry_in": list(self.carry_in),
+                "carry_out": list(self.carry_out),
+                "result_digit": list(self.result_digit),
+                "underlines": [list(self.underline_rows(c)) for c in range(m)],
+            },
+            "warnings": list(self.warnings),
+        }
+
+    def to_json(self) -> str:
+        """json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":")),
+        written straight from the arrays (no intermediate dicts or lists)."""
+        n = len(self.addends)
+        # every digit as its ASCII character, column after column
+        text = self.digits.translate(DIGIT_ASCII).decode("ascii")
+        parts = [
+            '{"addends":[', ",".join(map(decimal, self.addends)),
+            '],"sum_value":', decimal(self.sum_value),
+            ',"max_digits":', str(self.max_digits),
+            ',"columns":[',
+        ]
+        for c in range(self.max_digits):
+            if c:
+                parts.append(",")
+            parts += (
+                '{"col":', str(c),
+                ',"digits":[', ",".join(text[c * n : (c + 1) * n]),
+                '],"carry_in":', str(self.carry_in[c]),
+                ',"carry_out":', str(self.carry_out[c]),
+                ',"result_digit":', str(self.result_digit[c]),
+                ',"underlines":[', ",".join(f'{{"row":{r},"col":{c}}}' for r in self.underline_rows(c)),
+                "]}",
+            )
+        parts += ('],"warnings":', json.dumps(self.warnings, ensure_ascii=False, separators=(",", ":")), "}")
+        return "".join(parts)
+
+
+def _carry_warning(col: int, carry_out: int) -> str:
+    return (
+        f"Column {col} produced carry_out={carry_out} (>=10). "
+        "For primary grades, prefer fewer addends / smaller digits."
+    )
 
-    if any(x < 0 for x in addends):
-        raise ValueError("Only non-negative integers are supported")
 
-    add_digits = [_digits(x) for x in addends]
-    max_digits = max(len(d) for d in add_digits)
+class _Columns:
+    """Column arrays while a trace is being built."""
 
-    warnings: List[str] = []
-    columns: List[ColumnTrace] = []
+    def __init__(self) -> None:
+        self.digits = bytearray()
+        self.carry_in = array("q")
+        self.carry_out = array("q")
+        self.result_digit = array("q")
+        self.ul_start = array("q", [0])
+        self.ul_row = array("q")
+        self.warnings: List[str] = []
 
+
+def _columns_scalar(addends: List[int]) -> _Columns:
+    # column digits are slices of the zero-padded decimal strings
+    texts = [decimal(x) for x in addends]
+    width = max(map(len, texts))
+    text = "".join(t.zfill(width) for t in texts).encode("ascii")
+    column = lambda col: text[width - 1 - col :: width].translate(DIGIT_VALUES)  # noqa: E731
+
+    out = _Columns()
+    ul_row = out.ul_row
     carry_in = 0
 
-    for col in range(max_digits):
-        digits_here = [d[col] if col < len(d) else 0 for d in add_digits]
+    for col in range(width):
+        digits_here = column(col)
+        out.digits += digits_here
 
         s = 0
         carry_out = 0
-        underlines: List[Underline] = []
 
         # Add addend digits from top to bottom.
         for r, dig in enumerate(digits_here):
             s += dig
             if s >= 10:
-                underlines.append(Underline(row=r, col=col))
+                ul_row.append(r)
                 s -= 10
                 carry_out += 1
 
@@ -86,71 +265,302 @@ def compute_egel_addition(addends: List[int]) -> EgelAddTrace:
         if carry_in:
             s += carry_in
             if s >= 10:
-                underlines.append(Underline(row=-1, col=col))
+                ul_row.append(-1)
                 s -= 10
                 carry_out += 1
 
-        result_digit = s
-
         if carry_out >= 10:
-            warnings.append(
-                f"Column {col} produced carry_out={carry_out} (>=10). "
-                "For primary grades, prefer fewer addends / smaller digits."
-            )
+            out.warnings.append(_carry_warning(col, carry_out))
 
-        columns.append(
-            ColumnTrace(
-                col=col,
-                digits=digits_here,
-                carry_in=carry_in,
-                carry_out=carry_out,
-                result_digit=result_digit,
-                underlines=underlines,
-            )
-        )
+        out.carry_in.append(carry_in)
+        out.carry_out.append(carry_out)
+        out.result_digit.append(s)
+        out.ul_start.append(len(ul_row))
+        carry_in = carry_out
 
+    return out
+
+
+# Lookup tables for _columns_table, indexed by one byte (pair keys, see
+# engine.common.bytetables). The carry-in is PAIR_DIFF of (sum digit, column rest).
+_FOLD_REST = byte_table(lambda k: (k // 10 + k % 10) % 10)  # running sum s, digit d -> (s + d) % 10
+# running sum s, digit d of row r -> bit r if s + d completes a ten (bit 7: the carry-in row)
+_CROSS_BIT = [byte_table(lambda k, r=r: 1 << r if k // 10 + k % 10 >= 10 else 0) for r in range(8)]
+# underline bits -> rows in trace order (addend rows top to bottom, then -1 as 0xFF)
+_BIT_ROWS = [bytes([r for r in range(7) if m >> r & 1] + ([0xFF] if m & 0x80 else [])) for m in range(256)]
+_BIT_COUNT = byte_table(lambda m: bin(m).count("1"))
+
+
+def _columns_table(problems: List[List[int]]) -> List[_Columns]:
+    """_columns_scalar for many problems at once, all with the same number
+    of addends (at most TABLE_MAX_ADDENDS).
+
+    Row r of every problem is one bytes object of digit values (units first,
+    problems one after another), and a column step is a byte-table lookup on
+    10 * running sum + digit, so each row costs a few C-level passes over
+    all columns of all problems instead of a Python loop per digit:
+      - fold the rows top to bottom: rest = (s + d) % 10, and row r is
+        underlined where s + d >= 10 (collected as bit r of a per-column byte)
+      - with fewer than 11 addends no carry reaches 10, so the carry-in of a
+        column is (sum digit - column rest) % 10, with the digits of the
+        problem's sum as the sum digits; the carry-in row is underlined where
+        rest + carry-in >= 10 (bit 7), and the result digit is the sum digit
+    The columns of one problem do not depend on another's, so concatenating
+    problems changes nothing but the offsets.
+    """
+    n = len(problems[0])
+    rows: List[List[str]] = [[] for _ in range(n)]
+    sums: List[str] = []
+    widths: List[int] = []
+    finals: List[int] = []
+    for addends in problems:
+        texts = [decimal(x) for x in addends]
+        width = max(map(len, texts))
+        for r, t in enumerate(texts):
+            rows[r].append(t.zfill(width)[::-1])
+        total = decimal(sum(addends))  # at least `width` digits
+        sums.append(total[: -width - 1 : -1])
+        finals.append(int(total[:-width] or 0))
+        widths.append(width)
+
+    digits = ["".join(r).encode("ascii").translate(DIGIT_VALUES) for r in rows]
+    sum_digits = "".join(sums).encode("ascii").translate(DIGIT_VALUES)
+    rest = digits[0]
+    bits = bytes(len(rest))
+    for r in range(1, n):
+        key = bytes(map(add, rest.translate(TIMES10), digits[r]))
+        rest = key.translate(_FOLD_REST)
+        bits = bytes(map(add, bits, key.translate(_CROSS_BIT[r])))
+    carry = bytes(map(add, sum_digits.translate(TIMES10), rest)).translate(PAIR_DIFF)
+    bits = bytes(map(add, bits, bytes(map(add, rest.translate(TIMES10), carry)).translate(_CROSS_BIT[7])))
+
+    out: List[_Columns] = []
+    start = 0
+    for width, final in zip(widths, finals):
+        end = start + width
+        cols = _Columns()
+        matrix = bytearray(n * width)  # column after column, rows top to bottom
+        for r in range(n):
+            matrix[r::n] = digits[r][start:end]
+        cols.digits = matrix
+        cols.carry_in = array("b", carry[start:end])
+        cols.carry_out = array("b", carry[start + 1 : end])
+        cols.carry_out.append(final)
+        cols.result_digit = array("b", sum_digits[start:end])
+        col_bits = bits[start:end]
+        cols.ul_row = array("b", b"".join(map(_BIT_ROWS.__getitem__, col_bits)))
+        cols.ul_start = array("q", accumulate(col_bits.translate(_BIT_COUNT), initial=0))
+        out.append(cols)
+        start = end
+    return out
+
+
+def _columns_vector(addends: List[int]) -> _Columns:
+    """_columns_scalar computed on a digit matrix.
+
+    Within a column the running sum only ever drops by 10 right after it
+    reaches 10, and a digit adds at most 9, so with P = the prefix sums of
+    the column's digits (top to bottom):
+      - row r is underlined  <=>  P[r] // 10 > P[r-1] // 10
+      - the digits alone carry P[-1] // 10 and leave P[-1] % 10
+    None of that depends on the carry-in, so every column is done at once;
+    only the carry-in step (which underlines row -1 at most once, even for a
+    carry-in >= 10) is applied column by column.
+    """
+    texts = [decimal(x) for x in addends]
+    width = max(map(len, texts))
+    text = "".join(t.zfill(width) for t in texts).encode("ascii")
+    # rows = addends, columns = places, units first
+    D = (np.frombuffer(text, dtype=np.uint8).reshape(len(addends), width) - 48)[:, ::-1]
+    P = np.cumsum(D, axis=0, dtype=np.int64)
+    tens = P // 10
+    crossed = np.diff(tens, axis=0, prepend=0) > 0
+    # (col, row) of every underline, ordered by column, then row
+    ul_cols, ul_rows = np.nonzero(crossed.T)
+    bounds = np.searchsorted(ul_cols, np.arange(width + 1))
+    col_carry = tens[-1].tolist()
+    col_rest = (P[-1] % 10).tolist()
+
+    out = _Columns()
+    out.digits += np.ascontiguousarray(D.T).tobytes()
+    carry_cell = []  # columns whose carry-in completes a ten
+    carry_in = 0
+    for col in range(width):
+        s = col_rest[col]
+        carry_out = col_carry[col]
+        if carry_in:
+            s += carry_in
+            if s >= 10:
+                carry_cell.append(col)
+                s -= 10
+                carry_out += 1
+        if carry_out >= 10:
+            out.warnings.append(_carry_warning(col, carry_out))
+        out.carry_in.append(carry_in)
+        out.carry_out.append(carry_out)
+        out.result_digit.append(s)
         carry_in = carry_out
 
+    # the carry-in underline comes after the column's addend rows
+    cells = np.asarray(carry_cell, dtype=np.int64)
+    rows = np.insert(ul_rows.astype(np.int64), bounds[cells + 1], -1)
+    shift = np.zeros(width + 1, dtype=np.int64)
+    shift[cells + 1] = 1
+    out.ul_row = array("q", rows.tobytes())
+    out.ul_start = array("q", (bounds + np.cumsum(shift)).astype(np.int64).tobytes())
+    return out
+
+
+def _use_table(mode: str, addends: List[int]) -> bool:
+    if len(addends) > TABLE_MAX_ADDENDS or mode in ("scalar", "vector"):
+        return False
+    return mode == "table" or max(addends).bit_length() * 0.30103 + 1 >= TABLE_MIN_DIGITS
+
+
+def _use_vector(mode: str, addends: List[int]) -> bool:
+    if mode in ("scalar", "table") or np is None:
+        return False
+    # decimal digits of the largest addend, from its bit length (no str())
+    digits = max(addends).bit_length() * 0.30103 + 1
+    return mode == "vector" or len(addends) * digits >= VECTOR_MIN_CELLS
+
+
+def _checked_addends(addends: Sequence[Operand]) -> List[int]:
+    if not addends:
+        raise ValueError("At least one addend is required")
+
+    addends = [operand(x) if isinstance(x, str) else x for x in addends]
+    if any((not isinstance(x, int)) for x in addends):
+        raise TypeError("All addends must be integers")
+
+    if any(x < 0 for x in addends):
+        raise ValueError("Only non-negative integers are supported")
+    return addends
+
+
+def _check_mode(mode: str) -> None:
+    if mode not in ADD_MODES:
+        raise ValueError(f"Unknown addition mode: {mode!r} (expected one of {', '.join(ADD_MODES)})")
+
+
+@timed_phase("trace")
+def compute_egel_addition_compact(addends: Sequence[Operand], mode: str = "auto") -> CompactAddTrace:
+    """Compute an 'Эгэл нэмэх' trace as a CompactAddTrace.
+
+    `mode` picks the column pass (see ADD_MODES); the trace is the same.
+    Addends may be ints or strings of decimal digits.
+    """
+    addends = _checked_addends(addends)
+    _check_mode(mode)
+    if _use_table(mode, addends):
+        cols = _columns_table([addends])[0]
+    elif _use_vector(mode, addends):
+        cols = _columns_vector(addends)
+    else:
+        cols = _columns_scalar(addends)
+    return _compact_trace(addends, cols)
+
+
+@timed_phase("trace")
+def compute_egel_addition_batch(problems: Sequence[Sequence[Operand]], mode: str = "auto") -> List[CompactAddTrace]:
+    """compute_egel_addition_compact for many problems (worksheets, bulk
+    traces); the result is the same list, problem by problem.
+
+    Problems the table pass takes (see _use_table) go through it together,
+    one pass per addend count, so short problems share its per-call cost.
+    """
+    _check_mode(mode)
+    checked = [_checked_addends(addends) for addends in problems]
+    out: List[Optional[CompactAddTrace]] = [None] * len(checked)
+    groups: Dict[int, List[int]] = {}
+    for i, addends in enumerate(checked):
+        if mode != "scalar" and mode != "vector" and len(addends) <= TABLE_MAX_ADDENDS:
+            groups.setdefault(len(addends), []).append(i)
+        else:
+            out[i] = compute_egel_addition_compact(addends, mode)
+    for indices in groups.values():
+        group = [checked[i] for i in indices]
+        for i, cols in zip(indices, _columns_table(group)):
+            out[i] = _compact_trace(checked[i], cols)
+    return out
+
+
+def _compact_trace(addends: List[int], cols: _Columns) -> CompactAddTrace:
+    max_digits = len(cols.carry_in)
+    carry_in = cols.carry_out[-1]
+
     # After the last existing digit column, carry_in becomes the most significant part.
     # We keep it as an integer and let renderers decide how to display it.
     sum_value = sum(addends)
 
     if carry_in:
         # Represent the final carry as an extra synthetic column for better visualization.
-        col = max_digits
-        digits_here = [0 for _ in addends]
-        s = 0
-        carry_out = 0
-        underlines: List[Underline] = []
-
-        # Only carry-in exists here.
-        s += carry_in
         # If carry_in >= 10, it conceptually spans multiple digits. We'll warn and show it.
-        if s >= 10:
-            warnings.append(
+        if carry_in >= 10:
+            cols.warnings.append(
                 f"Final carry_in={carry_in} is multi-digit. It will be shown as a number in the carry row."
             )
         # For result digits, we take the ones digit; remaining part stays as 'carry_out' (not typical for grade 1).
-        result_digit = s % 10
-        carry_out = s // 10
-
-        columns.append(
-            ColumnTrace(
-                col=col,
-                digits=digits_here,
-                carry_in=carry_in,
-                carry_out=carry_out,
-                result_digit=result_digit,
-                underlines=underlines,
-            )
-        )
-
+        cols.digits += bytes(len(addends))
+        cols.carry_in.append(carry_in)
+        cols.carry_out.append(carry_in // 10)
+        cols.result_digit.append(carry_in % 10)
+        cols.ul_start.append(cols.ul_start[-1])
         max_digits = max_digits + 1
 
-    return EgelAddTrace(
+    return CompactAddTrace(
         addends=addends,
         sum_value=sum_value,
         max_digits=max_digits,
-        columns=columns,
-        warnings=warnings,
+        warnings=cols.warnings,
+        digits=bytes(cols.digits),
+        carry_in=cols.carry_in,
+        carry_out=cols.carry_out,
+        result_digit=cols.result_digit,
+        ul_start=cols.ul_start,
+        ul_row=cols.ul_row,
     )
+
+
+def compute_egel_addition(addends: Sequence[Operand], mode: str = "auto") -> EgelAddTrace:
+    """Compute an 'Эгэл нэмэх' trace for the given non-negative integers.
+
+    The dataclass form of compute_egel_addition_compact(); prefer that one
+    for large inputs.
+    """
+    return compute_egel_addition_compact(addends, mode).to_dataclass()
+
+
+def trace_to_dict(trace: Any) -> Dict[str, Any]:
+    """JSON-ready form of a trace; same shape as dataclasses.asdict(trace),
+    built directly instead of through asdict's recursive deep copy.
+    Accepts an EgelAddTrace or a CompactAddTrace."""
+    if isinstance(trace, CompactAddTrace):
+        return trace.to_dict()
+    return {
+        "addends": list(trace.addends),
+        "sum_value": trace.sum_value,
+        "max_digits": trace.max_digits,
+        "columns": [
+            {
+                "col": ct.col,
+                "digits": list(ct.digits),
+                "carry_in": ct.carry_in,
+                "carry_out": ct.carry_out,
+                "result_digit": ct.result_digit,
+                "underlines": [{"row": ul.row, "col": ul.col} for ul in ct.underlines],
+            }
+            for ct in trace.columns
+        ],
+        "warnings": list(trace.warnings),
+    }
+
+
+def compute_egel_addition_dict(addends: Sequence[Operand], mode: str = "auto") -> Dict[str, Any]:
+    """compute_egel_addition(...) as a JSON-ready dict (what /api/trace returns)."""
+    return compute_egel_addition_compact(addends, mode).to_dict()
+
+
+def compute_egel_addition_json(addends: Sequence[Operand], mode: str = "auto") -> str:
+    """compute_egel_addition_dict(...) already serialized (compact JSON)."""
+    return compute_egel_addition_compact(addends, mode).to_json()
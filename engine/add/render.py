@@ -1,19 +1,13 @@
 from __future__ import annotations
 
-from dataclasses import asdict
-from typing import List, Dict, Any, Tuple
+from typing import Dict, Any, List, Sequence, Tuple
 
-from engine.add.algo import EgelAddTrace, Underline, compute_egel_addition
+from engine.add.algo import compute_egel_addition_compact
+from engine.common.digits import Operand, units_first
+from engine.common.display import CellSvg, DisplayList, Grid, Item, Rect, Rule, SvgBackend, Text
+from engine.common.timing import timed_phase
 
-
-def _xml_escape(s: str) -> str:
-    return (
-        s.replace("&", "&amp;")
-        .replace("<", "&lt;")
-        .replace(">", "&gt;")
-        .replace('"', "&quot;")
-        .replace("'", "&apos;")
-    )
+_FONT = "ui-sans-serif, system-ui, Segoe UI, Arial"
 
 
 def _palette(idx: int) -> str:
@@ -29,43 +23,62 @@ def _palette(idx: int) -> str:
     return colors[idx % len(colors)]
 
 
-def render_svg(
-    addends: List[int],
-    cell: int = 42,
-    pad: int = 18,
-    show_grid: bool = True,
-    show_underlines: bool = True,
-    show_carry: bool = True,
-    stage: int = 5,
-) -> Tuple[str, Dict[str, Any]]:
-    """Return (svg_string, debug_data).
+class _AddLayout:
+    __slots__ = ("addends", "trace", "cell", "pad", "cols", "rows", "width", "height",
+                 "r_first_add", "r_carry", "r_sep", "r_result")
 
-    stage:
-      1 -> only grid
-      2 -> + numbers
-      3 -> + underline marks
-      4 -> + carry row digits
-      5 -> + result row digits
-    """
 
-    trace: EgelAddTrace = compute_egel_addition(addends)
+@timed_phase("layout")
+def _layout(addends: Sequence[Operand], cell: int, pad: int) -> _AddLayout:
+    L = _AddLayout()
+    L.trace = compute_egel_addition_compact(addends)
+    L.addends = L.trace.addends  # as ints, also when given as digit strings
+    L.cell = cell
+    L.pad = pad
     n_add = len(addends)
 
     # Layout
     # Columns: trace.max_digits (includes possible extra carry column)
-    cols = trace.max_digits + 1  # +1 for a left margin column (for '+')
+    L.cols = L.trace.max_digits + 1  # +1 for a left margin column (for '+')
     # Rows: addend rows + carry row (placed just above the separator) + separator + result
     # NOTE: In this “Эгэл нэмэх” visualization, carry is intentionally written
     # on the row right above the long separator line (instead of the very top),
     # matching the TeX layout you shared.
-    r_first_add = 0
-    r_carry = r_first_add + n_add
-    r_sep = r_carry + 1
-    r_result = r_sep + 1
-    rows = r_result + 1
-
-    width = pad * 2 + cols * cell
-    height = pad * 2 + rows * cell
+    L.r_first_add = 0
+    L.r_carry = L.r_first_add + n_add
+    L.r_sep = L.r_carry + 1
+    L.r_result = L.r_sep + 1
+    L.rows = L.r_result + 1
+
+    L.width = pad * 2 + L.cols * cell
+    L.height = pad * 2 + L.rows * cell
+    return L
+
+
+class _AddSvg(CellSvg):
+    sep = ""
+
+    def grid_line(self, x1, y1, x2, y2, g):
+        return f"<line x1='{x1}' y1='{y1}' x2='{x2}' y2='{y2}' stroke='{g.stroke}' stroke-width='{g.width}' />"
+
+
+@timed_phase("layout")
+def _display(
+    L: _AddLayout,
+    show_grid: bool,
+    show_underlines: bool,
+    show_carry: bool,
+) -> DisplayList:
+    """The drawing as a display list; stages 1..5 as in render_svg."""
+    trace = L.trace
+    addends = L.addends
+    cell, pad = L.cell, L.pad
+    cols, rows = L.cols, L.rows
+    width, height = L.width, L.height
+    n_add = len(addends)
+    r_first_add, r_carry, r_sep, r_result = L.r_first_add, L.r_carry, L.r_sep, L.r_result
+    items: List[Item] = []
+    add = items.append
 
     def cell_xy(col_idx: int, row_idx: int) -> Tuple[int, int]:
         x = pad + col_idx * cell
@@ -79,140 +92,137 @@ def render_svg(
         # place 0 (units) sits at rightmost digit column
         return digit_right_col - place
 
-    # Begin SVG
-    parts: List[str] = []
-    parts.append(
-        f"<svg xmlns='http://www.w3.org/2000/svg' width='{width}' height='{height}' viewBox='0 0 {width} {height}'>"
-    )
-
     # Background
-    parts.append(f"<rect x='0' y='0' width='{width}' height='{height}' fill='white'/>")
-
-    # Grid
-    if show_grid and stage >= 1:
-        # outer
-        x0, y0 = pad, pad
-        w, h = cols * cell, rows * cell
-        parts.append(
-            f"<rect x='{x0}' y='{y0}' width='{w}' height='{h}' fill='none' stroke='#b3d1ff' stroke-width='2'/>"
-        )
-        # vertical lines
-        for c in range(1, cols):
-            x = x0 + c * cell
-            parts.append(f"<line x1='{x}' y1='{y0}' x2='{x}' y2='{y0+h}' stroke='#cfe3ff' stroke-width='2' />")
-        # horizontal lines
-        for r in range(1, rows):
-            y = y0 + r * cell
-            parts.append(f"<line x1='{x0}' y1='{y}' x2='{x0+w}' y2='{y}' stroke='#cfe3ff' stroke-width='2' />")
+    add((0, Rect(0, 0, width, height, fill="white")))
+
+    # Grid (outer border + interior lines)
+    if show_grid:
+        add((1, Grid(pad, pad, cols, rows, cell, stroke="#cfe3ff", width=2, edges=False,
+                     border="#b3d1ff", border_width=2)))
 
     # Column color bands (very light)
     for place in range(trace.max_digits):
         col = digit_col_for_place(place)
         x, y = cell_xy(col, 0)
-        parts.append(
-            f"<rect x='{x}' y='{pad}' width='{cell}' height='{rows*cell}' fill='{_palette(place)}' opacity='0.06'/>"
-        )
+        add((0, Rect(x, pad, cell, rows * cell, fill=_palette(place), opacity=0.06)))
 
-    # Helper: draw centered text in a cell
-    def draw_text(col_idx: int, row_idx: int, text: str, size: int = 22, color: str = "#111"):
+    # Helper: centered text in a cell
+    def draw_text(col_idx: int, row_idx: int, text: str, size: int = 22, color: str = "#111") -> Text:
         x, y = cell_xy(col_idx, row_idx)
         cx = x + cell / 2
         cy = y + cell / 2 + 8
-        parts.append(
-            f"<text x='{cx}' y='{cy}' text-anchor='middle' font-family='ui-sans-serif, system-ui, Segoe UI, Arial' font-size='{size}' fill='{color}'>{_xml_escape(text)}</text>"
-        )
+        return Text(cx, cy, text, size, fill=color, family=_FONT)
 
     # '+' sign (aligned with the last addend row)
-    if stage >= 2:
-        plus_row = r_first_add + (n_add - 1) if n_add >= 1 else r_first_add
-        draw_text(0, plus_row, "+", size=26, color="#111")
+    plus_row = r_first_add + (n_add - 1) if n_add >= 1 else r_first_add
+    add((2, draw_text(0, plus_row, "+", size=26, color="#111")))
 
     # Addend digits
-    if stage >= 2:
-        for r, n in enumerate(addends):
-            digs = _int_to_digits(n)
-            for place, dig in enumerate(digs):
-                col = digit_col_for_place(place)
-                draw_text(col, r_first_add + r, str(dig), size=24, color=_palette(place))
+    for r, n in enumerate(addends):
+        digs = units_first(n)
+        for place, dig in enumerate(digs):
+            col = digit_col_for_place(place)
+            add((2, draw_text(col, r_first_add + r, str(dig), size=24, color=_palette(place))))
 
     # Separator line
-    if stage >= 2:
-        x1, y1 = cell_xy(0, r_sep)
-        x2 = pad + cols * cell
-        y = y1
-        parts.append(f"<line x1='{x1}' y1='{y}' x2='{x2}' y2='{y}' stroke='#222' stroke-width='3'/>")
+    x1, y1 = cell_xy(0, r_sep)
+    x2 = pad + cols * cell
+    add((2, Rule(x1, y1, x2, y1, stroke="#222", width=3)))
 
     # Underlines (10-completion marks)
-    if show_underlines and stage >= 3:
-        for ct in trace.columns:
-            place = ct.col
-            if place >= trace.max_digits:
-                continue
+    if show_underlines:
+        for place in range(trace.max_digits):
             col = digit_col_for_place(place)
-            for ul in ct.underlines:
-                if ul.row == -1:
+            for ul_row in trace.underline_rows(place):
+                if ul_row == -1:
                     row = r_carry
                 else:
-                    row = r_first_add + ul.row
+                    row = r_first_add + ul_row
                 x, y = cell_xy(col, row)
                 y_ul = y + cell - 10
-                parts.append(
-                    f"<line x1='{x+8}' y1='{y_ul}' x2='{x+cell-8}' y2='{y_ul}' stroke='{_palette(place)}' stroke-width='5' stroke-linecap='round'/>"
-                )
+                add((3, Rule(x + 8, y_ul, x + cell - 8, y_ul, stroke=_palette(place), width=5, cap="round")))
 
     # Carry digits (carry_out goes to next column)
-    if show_carry and stage >= 4:
-        for ct in trace.columns:
-            place = ct.col
+    if show_carry:
+        for place, carry in enumerate(trace.carry_out):
             if place + 1 >= trace.max_digits:
                 continue
-            carry = ct.carry_out
             if carry == 0:
                 continue
             col = digit_col_for_place(place + 1)
-            draw_text(col, r_carry, str(carry), size=18, color=_palette(place + 1))
+            add((4, draw_text(col, r_carry, str(carry), size=18, color=_palette(place + 1))))
 
     # Result digits (use actual sum for correctness)
-    if stage >= 5:
-        res = sum(addends)
-        digs = _int_to_digits(res)
-        for place, dig in enumerate(digs):
-            col = digit_col_for_place(place)
-            draw_text(col, r_result, str(dig), size=26, color=_palette(place))
+    res = sum(addends)
+    digs = units_first(res)
+    for place, dig in enumerate(digs):
+        col = digit_col_for_place(place)
+        add((5, draw_text(col, r_result, str(dig), size=26, color=_palette(place))))
 
     # Warnings
     if trace.warnings:
         msg = " | ".join(trace.warnings)
-        parts.append(
-            f"<text x='{pad}' y='{height - 10}' text-anchor='start' font-family='ui-sans-serif, system-ui, Segoe UI, Arial' font-size='14' fill='#b71c1c'>{_xml_escape(msg)}</text>"
-        )
+        add((0, Text(pad, height - 10, msg, 14, fill="#b71c1c", anchor="start", family=_FONT)))
 
-    parts.append("</svg>")
+    return DisplayList(tuple(items), ((0, width, height),))
 
-    data = {
-        "trace": asdict(trace),
+
+def display_list(
+    addends: Sequence[Operand],
+    cell: int = 42,
+    pad: int = 18,
+    show_grid: bool = True,
+    show_underlines: bool = True,
+    show_carry: bool = True,
+) -> DisplayList:
+    """The drawing behind render_svg (all stages 1..5), for any backend."""
+    return _display(_layout(addends, cell, pad), show_grid, show_underlines, show_carry)
+
+
+def svg_backend(grid_mode: str = "lines", integer: bool = False) -> SvgBackend:
+    """The SVG writer for addition display lists."""
+    return _AddSvg(grid_mode, integer)
+
+
+def _debug_data(L: _AddLayout) -> Dict[str, Any]:
+    return {
+        "trace": L.trace.to_dict(),
         "layout": {
-            "cell": cell,
-            "pad": pad,
-            "cols": cols,
-            "rows": rows,
+            "cell": L.cell,
+            "pad": L.pad,
+            "cols": L.cols,
+            "rows": L.rows,
             "row_index": {
-                "carry": r_carry,
-                "first_add": r_first_add,
-                "sep": r_sep,
-                "result": r_result,
+                "carry": L.r_carry,
+                "first_add": L.r_first_add,
+                "sep": L.r_sep,
+                "result": L.r_result,
             },
         },
     }
 
-    return "".join(parts), data
 
+def render_svg(
+    addends: Sequence[Operand],
+    cell: int = 42,
+    pad: int = 18,
+    show_grid: bool = True,
+    show_underlines: bool = True,
+    show_carry: bool = True,
+    stage: int = 5,
+    grid_mode: str = "lines",
+) -> Tuple[str, Dict[str, Any]]:
+    """Return (svg_string, debug_data).
 
-def _int_to_digits(n: int) -> List[int]:
-    if n == 0:
-        return [0]
-    out: List[int] = []
-    while n > 0:
-        out.append(n % 10)
-        n //= 10
-    return out
+    stage:
+      1 -> only grid
+      2 -> + numbers
+      3 -> + underline marks
+      4 -> + carry row digits
+      5 -> + result row digits
+
+    grid_mode: "lines" | "path" | "pattern" (see engine.common.grid)
+    """
+    L = _layout(addends, cell, pad)
+    svg = _AddSvg(grid_mode).render(_display(L, show_grid, show_underlines, show_carry), stage)
+    return svg, _debug_data(L)
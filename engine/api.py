@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from engine.add.algo import compute_egel_addition_compact, compute_egel_addition_dict
+from engine.add.render import display_list as add_display_list, svg_backend as add_svg_backend
+from engine.common.cache import LRUCache
+from engine.common.compact import DEFAULT_PRECISION, compact_svg, iter_compact
+from engine.common.digits import Operand, digit_scope, operand
+from engine.common.display import DisplayList, SvgBackend, to_json
+from engine.common.grid import GRID_MODES
+from engine.common.serialize import TRACE_LAYOUTS, columnar, dumps
+from engine.common.stream import DEFAULT_CHUNK_SIZE
+from engine.common.timing import phase
+from engine.common.viewbox import LAYOUT_UNIT, integer_units, iter_resize_root, resize_root
+from engine.div.core import TRACE_TABLES as DIV_TABLES, calculate_egel_huvaah, division_display_list, division_svg_backend
+from engine.mul.algo import TRACE_TABLES as MUL_TABLES, cached_egel_multiplication
+from engine.mul.render import display_list as mul_display_list, svg_backend as mul_svg_backend
+from engine.sub.algo import TRACE_TABLES as SUB_TABLES, compute_egel_subtraction
+from engine.summary import render_summary_svg, summary_trace
+from engine.sub.render import display_list as sub_display_list, svg_backend as sub_svg_backend
+
+# Part of every HTTP ETag: bump it whenever the SVG or trace produced for the
+# same parameters changes, so browsers and proxies drop their old copies.
+ENGINE_VERSION = "2.2"
+
+OPS = ("add", "sub", "mul", "div")
+STAGES = (0, 1, 2, 3)
+
+
+class RenderParams(NamedTuple):
+    """Normalized /api/render parameters.
+
+    Instances are hashable and two requests that produce the same SVG compare
+    equal, so they can be used directly as cache keys.
+    """
+
+    op: str
+    a: int
+    b: int
+    unit: int = 56
+    stage: int = 3
+    show_grid: bool = True
+    show_marks: bool = True
+    color_mode: int = 1
+    align: str = "right"
+    sub_pos: str = "top"
+    show_remainder: bool = True
+    grid: str = "lines"
+    compact: bool = False
+    precision: int = DEFAULT_PRECISION
+    # add only: addends after a and b, top to bottom
+    extra_addends: Tuple[int, ...] = ()
+    # summary form (engine/summary.py) instead of the worked layout, for
+    # problems over their complexity budget (engine/budget.py)
+    summary: bool = False
+    # stage deltas (engine/common/slots.py): slots=True leaves a placeholder
+    # for every later-stage run; from_stage=F renders only what stages F+1
+    # ..stage add, to be filled into those placeholders
+    slots: bool = False
+    from_stage: Optional[int] = None
+    # unit-independent SVG (engine/common/viewbox.py): laid out at
+    # LAYOUT_UNIT in integer user units, `unit` only sets the root's
+    # width/height
+    viewbox: bool = False
+
+    @property
+    def addends(self) -> List[int]:
+        return [self.a, self.b, *self.extra_addends]
+
+
+_DEFAULTS = RenderParams(op="add", a=0, b=0)
+
+
+def normalize_render_params(
+    op: str,
+    a: Operand,
+    b: Operand,
+    unit: int = 56,
+    stage: int = 3,
+    show_grid: bool = True,
+    show_marks: bool = True,
+    color_mode: int = 1,
+    align: str = "right",
+    sub_pos: str = "top",
+    show_remainder: bool = True,
+    grid: str = "lines",
+    compact: bool = False,
+    precision: int = DEFAULT_PRECISION,
+    extra_addends: Iterable[Operand] = (),
+    summary: bool = False,
+    slots: bool = False,
+    from_stage: Optional[int] = None,
+    viewbox: bool = False,
+) -> RenderParams:
+    """Coerce types and reset options the op ignores to their defaults.
+
+    e.g. `align` only matters for division, so an addition request with
+    align=left maps to the same key as one with align=right. Operands may be
+    given as strings of decimal digits.
+    """
+    if op not in OPS:
+        raise ValueError(f"Unknown op: {op!r}")
+    if grid not in GRID_MODES:
+        raise ValueError(f"Unknown grid mode: {grid!r}")
+    p = RenderParams(
+        op=op,
+        a=operand(a),
+        b=operand(b),
+        unit=int(unit),
+        stage=max(0, min(3, int(stage))),
+        show_grid=bool(show_grid),
+        show_marks=bool(show_marks),
+        color_mode=int(color_mode),
+        align=str(align),
+        sub_pos=str(sub_pos),
+        show_remainder=bool(show_remainder),
+        grid=str(grid),
+        compact=bool(compact),
+        precision=max(0, min(3, int(precision))),
+        extra_addends=tuple(operand(x) for x in extra_addends),
+        summary=bool(summary),
+        slots=bool(slots) or from_stage is not None,
+        from_stage=None if from_stage is None else max(0, min(3, int(from_stage))),
+        viewbox=bool(viewbox),
+    )
+    if not p.show_grid:
+        p = p._replace(grid=_DEFAULTS.grid)
+    if not p.compact:
+        p = p._replace(precision=_DEFAULTS.precision)
+    if op != "add":
+        p = p._replace(extra_addends=_DEFAULTS.extra_addends)
+    elif any(x < 0 for x in p.extra_addends):
+        raise ValueError("Addends must be non-negative.")
+    if op != "div":
+        p = p._replace(align=_DEFAULTS.align, sub_pos=_DEFAULTS.sub_pos, show_remainder=_DEFAULTS.show_remainder)
+    if op in ("add", "sub"):
+        p = p._replace(color_mode=_DEFAULTS.color_mode)
+    if op == "div":
+        p = p._replace(show_marks=_DEFAULTS.show_marks)
+    if p.summary:
+        # the summary draws no grid, marks or colors and has no stages
+        p = p._replace(
+            stage=_DEFAULTS.stage,
+            show_grid=_DEFAULTS.show_grid,
+            grid=_DEFAULTS.grid,
+            show_marks=_DEFAULTS.show_marks,
+            color_mode=_DEFAULTS.color_mode,
+            align=_DEFAULTS.align,
+            sub_pos=_DEFAULTS.sub_pos,
+            slots=_DEFAULTS.slots,
+            from_stage=_DEFAULTS.from_stage,
+            viewbox=_DEFAULTS.viewbox,
+        )
+    if p.from_stage is not None and p.from_stage >= p.stage:
+        raise ValueError("from_stage must be below stage.")
+    return p
+
+
+def layout_params(p: RenderParams) -> RenderParams:
+    """The params whose SVG `p` is drawn from: for a viewbox render those at
+    LAYOUT_UNIT (the body is the same for every unit; cache it under this
+    key and apply sized()), otherwise `p` itself."""
+    return p._replace(unit=LAYOUT_UNIT) if p.viewbox else p
+
+
+def sized(svg: str, p: RenderParams) -> str:
+    """The SVG of layout_params(p) as the SVG of `p` (root size set for
+    p.unit for viewbox renders)."""
+    return resize_root(svg, p.unit) if p.viewbox else svg
+
+
+def _add_stage(stage: int) -> int:
+    # map unified stage 0..3 => add stage 2..5 (so it always reveals useful parts)
+    return max(1, min(5, stage + 2))
+
+
+# addition's stages 1..5 (and 0 for what every stage shows) as unified ones
+_ADD_UNIFIED = {0: 0, 1: 0, 2: 0, 3: 1, 4: 2, 5: 3}
+
+_SVG_BACKENDS = {"add": add_svg_backend, "sub": sub_svg_backend, "mul": mul_svg_backend, "div": division_svg_backend}
+
+
+def _display_size(dl: DisplayList) -> int:
+    # rough bytes held by a list: a tuple and a few strings per primitive
+    return 250 * len(dl.items)
+
+
+# Display lists (engine/common/display.py) hold the layout of one problem for
+# every stage, grid mode, stage delta and output format, so re-renders of a
+# problem (play-mode steps, compact, other grids) skip the layout. Per process.
+LAYOUT_CACHE = LRUCache(maxsize=256, max_bytes=32 * 1024 * 1024, sizeof=_display_size)
+
+
+def _layout_key(p: RenderParams) -> RenderParams:
+    # the options that only pick stages or shape the SVG text, reset; viewbox
+    # lists are the LAYOUT_UNIT one in integer units
+    p = p._replace(
+        stage=_DEFAULTS.stage, grid=_DEFAULTS.grid, compact=False, precision=_DEFAULTS.precision,
+        slots=False, from_stage=None,
+    )
+    return p._replace(unit=LAYOUT_UNIT) if p.viewbox else p
+
+
+def _build_display(p: RenderParams) -> DisplayList:
+    if p.viewbox:
+        return integer_units(_display(p._replace(viewbox=False)))
+    if p.op == "add":
+        return add_display_list(
+            addends=p.addends,
+            cell=p.unit,
+            pad=int(p.unit * 0.42),
+            show_grid=p.show_grid,
+            show_underlines=p.show_marks,
+            show_carry=p.show_marks,
+        )
+    if p.op == "sub":
+        return sub_display_list(a=p.a, b=p.b, unit=p.unit, show_grid=p.show_grid, show_marks=p.show_marks)
+    if p.op == "mul":
+        return mul_display_list(
+            a=p.a,
+            b=p.b,
+            unit=p.unit,
+            show_grid=p.show_grid,
+            show_marks=p.show_marks,
+            color_mode=p.color_mode,
+        )
+    if p.b <= 0:
+        raise ValueError("Divisor (b) must be >= 1 for division.")
+    return division_display_list(
+        dividend=p.a,
+        divisor=p.b,
+        unit=p.unit,
+        show_grid=p.show_grid,
+        color_mode=p.color_mode,
+        align_mode=p.align,
+        sub_pos=p.sub_pos,
+        black=False,
+        show_remainder=p.show_remainder,
+    )
+
+
+def _display(p: RenderParams) -> DisplayList:
+    """The op's display list for `p` (its own stage numbering), through LAYOUT_CACHE."""
+    return LAYOUT_CACHE.get_or_compute(_layout_key(p), lambda: _build_display(p))
+
+
+def _op_stage(p: RenderParams, stage: int) -> int:
+    return _add_stage(stage) if p.op == "add" else stage
+
+
+def _backend(p: RenderParams) -> SvgBackend:
+    return _SVG_BACKENDS[p.op](p.grid, p.viewbox)
+
+
+@digit_scope
+def render(p: RenderParams) -> str:
+    """Render one problem to an SVG string."""
+    svg = _render(p)
+    if p.compact:
+        with phase("compact"):
+            svg = compact_svg(svg, p.precision)
+    return sized(svg, p)
+
+
+def _render(p: RenderParams) -> str:
+    if p.summary:
+        return _render_summary(p)
+    if p.slots:
+        return _render_slots(p)
+    return _backend(p).render(_display(p), _op_stage(p, p.stage))
+
+
+def _render_summary(p: RenderParams) -> str:
+    if p.op == "div" and p.b <= 0:
+        raise ValueError("Divisor (b) must be >= 1 for division.")
+    return render_summary_svg(p.op, p.a, p.b, p.extra_addends, unit=p.unit, show_remainder=p.show_remainder)
+
+
+def _render_slots(p: RenderParams) -> str:
+    from_stage = None if p.from_stage is None else _op_stage(p, p.from_stage)
+    return _backend(p).render_slots(_display(p), _op_stage(p, p.stage), from_stage)
+
+
+def iter_render(p: RenderParams, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Streaming form of render(): yields the same SVG text in chunks.
+
+    The result is lazy: no trace or layout work happens until the first
+    chunk is pulled (e.g. by the response writer's thread).
+    """
+    chunks = _iter_render(p, chunk_size)
+    if p.compact:
+        chunks = iter_compact(chunks, p.precision)
+    return iter_resize_root(chunks, p.unit) if p.viewbox else chunks
+
+
+def _iter_render(p: RenderParams, chunk_size: int) -> Iterator[str]:
+    if p.summary:
+        # linear in the digits and small; no point in streaming it piecewise
+        yield _render_summary(p)
+    elif p.slots:
+        yield _render_slots(p)
+    else:
+        yield from _backend(p).iter_render(_display(p), _op_stage(p, p.stage), chunk_size)
+
+
+@digit_scope
+def render_stages(p: RenderParams) -> Dict[int, str]:
+    """Render every unified stage (0..3) of one problem from a single
+    trace + layout pass. `p.stage` is ignored."""
+    svgs = _render_stages(p)
+    if p.compact:
+        with phase("compact"):
+            svgs = {st: compact_svg(svg, p.precision) for st, svg in svgs.items()}
+    return {st: sized(svg, p) for st, svg in svgs.items()} if p.viewbox else svgs
+
+
+def _render_stages(p: RenderParams) -> Dict[int, str]:
+    if p.summary:
+        svg = _render_summary(p)
+        return {st: svg for st in STAGES}
+    svgs = _backend(p).render_stages(_display(p), {_op_stage(p, st) for st in STAGES})
+    return {st: svgs[_op_stage(p, st)] for st in STAGES}
+
+
+@digit_scope
+def display_list(p: RenderParams) -> DisplayList:
+    """The display list of one problem with unified stages (0..3), for
+    backends other than SVG. Options that only shape the SVG text (grid,
+    compact, slots, viewbox) do not matter; summaries have none."""
+    if p.summary:
+        raise ValueError("The summary form has no display list.")
+    dl = _display(p)
+    return dl.restaged(_ADD_UNIFIED) if p.op == "add" else dl
+
+
+@digit_scope
+def render_display_json(p: RenderParams) -> str:
+    """display_list(p) as compact JSON for client-side drawing, items up to
+    p.stage (engine.common.display.to_json)."""
+    return to_json(display_list(p), p.stage)
+
+
+@digit_scope
+def compute_trace(
+    op: str, a: Operand, b: Operand, extra_addends: Iterable[Operand] = (), summary: bool = False
+) -> Dict[str, Any]:
+    """JSON-ready step trace for a op b, straight from the algorithm modules.
+
+    No layout or SVG work happens here, so the cost is that of the arithmetic.
+    For add, `extra_addends` follow a and b. summary=True gives only the
+    operands and the result (engine.summary.summary_trace). Operands may be
+    ints or strings of decimal digits.
+    """
+    a, b = operand(a), operand(b)
+    if summary:
+        return summary_trace(op, a, b, extra_addends)
+    if op == "add":
+        return compute_egel_addition_dict([a, b, *(operand(x) for x in extra_addends)])
+    if op == "sub":
+        return compute_egel_subtraction(a, b)
+    if op == "mul":
+        return cached_egel_multiplication(a, b)
+    if op == "div":
+        if b <= 0:
+            raise ValueError("Divisor (b) must be >= 1 for division.")
+        return calculate_egel_huvaah(a, b)
+    raise ValueError(f"Unknown op: {op!r}")
+
+
+# list-of-object fields of each op's trace, for layout="columns"
+_TRACE_TABLES = {"sub": SUB_TABLES, "mul": MUL_TABLES, "div": DIV_TABLES}
+
+
+@digit_scope
+def compute_trace_bytes(
+    op: str,
+    a: Operand,
+    b: Operand,
+    extra_addends: Iterable[Operand] = (),
+    summary: bool = False,
+    layout: str = "rows",
+) -> bytes:
+    """compute_trace(...) as compact UTF-8 JSON (what /api/trace sends).
+
+    layout="columns" writes each table of the trace (steps, blocks, ...) as
+    one object of parallel arrays instead of a list of objects, see
+    engine.common.serialize.columnar. Summary traces have no tables and are
+    the same in both layouts. Addition traces are written straight from
+    their arrays (CompactAddTrace.to_json / to_columns), without building
+    the row dicts first.
+    """
+    if layout not in TRACE_LAYOUTS:
+        raise ValueError(f"Unknown layout: {layout!r} (expected {', '.join(TRACE_LAYOUTS)})")
+    if op == "add" and not summary:
+        trace = compute_egel_addition_compact([operand(a), operand(b), *(operand(x) for x in extra_addends)])
+        with phase("serialize"):
+            if layout == "rows":
+                return trace.to_json().encode("utf-8")
+            return dumps(trace.to_columns())
+    data = compute_trace(op, a, b, extra_addends, summary)
+    with phase("serialize"):
+        if layout == "columns" and not summary:
+            data = columnar(data, _TRACE_TABLES[op])
+        return dumps(data)
+
+
+@digit_scope
+def compute_trace_json(
+    op: str, a: Operand, b: Operand, extra_addends: Iterable[Operand] = (), summary: bool = False
+) -> str:
+    """compute_trace_bytes(...) (rows layout) as text."""
+    return compute_trace_bytes(op, a, b, extra_addends, summary).decode("utf-8")
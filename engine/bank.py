@@ -0,0 +1,270 @@
+"""Precomputed play-mode problem bank.
+
+Play mode asks for "a new level-N problem" far more often than for any one
+specific problem, and the set of problems per level is small and fixed by
+the level rules. The bank enumerates problems per (op, level) with the same
+rules as the frontend's `digitSpec`, renders their trace and all four stages
+once, and stores each ready-to-send /api/problem JSON body (gzipped) in a
+single file that is memory-mapped at serve time:
+
+    magic  b"EGELBNK1"
+    u32    header length, then the header as JSON:
+             engine_version, options (render options the stages were built
+             with), groups {"add:3": [first, count], "div:5:r": ...},
+             table (offset of the record table), count
+    table  `count` records of RECORD: a, b, payload offset, payload length
+    blobs  gzipped JSON payloads
+
+Records of one group are contiguous, so picking a random problem is one
+randrange and one struct unpack; serving it is a slice of the mapping.
+
+Build:  python -m engine.bank --out data/problem_bank.bin --per-level 100
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import mmap
+import os
+import random
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from engine.api import ENGINE_VERSION, OPS, RenderParams, compute_trace, normalize_render_params, render_stages
+from engine.common.serialize import dumps
+
+MAGIC = b"EGELBNK1"
+RECORD = struct.Struct("<QQQI")
+
+LEVELS = tuple(range(1, 11))
+# division problems may carry a remainder from this level on (see makeDivProblem)
+REMAINDER_MIN_LEVEL = 4
+
+# Render options of the play-mode UI (app.js state defaults).
+# A request with other options still gets a bank problem, but not its stages.
+DEFAULT_OPTIONS: Dict[str, Any] = {
+    "unit": 56,
+    "show_grid": True,
+    "show_marks": True,
+    "color_mode": 1,
+    "align": "right",
+    "sub_pos": "top",
+    "show_remainder": True,
+    "grid": "lines",
+    "compact": False,
+    "precision": 1,
+}
+
+
+# --- level rules (port of digitSpec / makeDivProblem / newProblem in app.js) ---
+
+def digits_for_level(step: int, level: int, min_digits: int, max_digits: int) -> int:
+    # every `step` levels the operands get one digit longer
+    d = min_digits + (max(1, level) - 1) // step
+    return max(min_digits, min(max_digits, d))
+
+
+def digit_spec(op: str, level: int) -> Dict[str, int]:
+    if op in ("add", "sub"):
+        d = digits_for_level(2, level, 1, 6)
+        return {"a_digits": d, "b_digits": d}
+    if op == "mul":
+        d = digits_for_level(2, level, 1, 5)
+        return {"a_digits": d, "b_digits": d}
+    if op == "div":
+        return {
+            "divisor_digits": digits_for_level(3, level, 1, 4),
+            "quotient_digits": digits_for_level(2, level, 1, 4),
+        }
+    raise ValueError(f"Unknown op: {op!r}")
+
+
+def _rand_n_digits(rng: random.Random, d: int, allow_zero: bool = True) -> int:
+    if d <= 1:
+        return rng.randint(0 if allow_zero else 1, 9)
+    return rng.randint(10 ** (d - 1), 10**d - 1)
+
+
+def sample_problem(op: str, level: int, rng: random.Random, remainder: bool = False) -> Tuple[int, int]:
+    """One random (a, b) for `op` at `level`, distributed like the frontend's generator."""
+    spec = digit_spec(op, level)
+    if op == "div":
+        d, qd = spec["divisor_digits"], spec["quotient_digits"]
+        divisor = rng.randint(2, 9) if d == 1 else _rand_n_digits(rng, d, False)
+        q = rng.randint(1, 9) if qd == 1 else _rand_n_digits(rng, qd, False)
+        r = rng.randint(0, divisor - 1) if remainder and level >= REMAINDER_MIN_LEVEL else 0
+        return divisor * q + r, divisor
+    a = _rand_n_digits(rng, spec["a_digits"], True)
+    b = _rand_n_digits(rng, spec["b_digits"], True)
+    if op == "sub":
+        a, b = max(a, b), min(a, b)
+    return a, b
+
+
+def group_key(op: str, level: int, remainder: bool = False) -> str:
+    level = max(LEVELS[0], min(LEVELS[-1], int(level)))
+    if op == "div" and remainder and level >= REMAINDER_MIN_LEVEL:
+        return f"div:{level}:r"
+    return f"{op}:{level}"
+
+
+def _groups() -> Iterator[Tuple[str, str, int, bool]]:
+    for op in OPS:
+        for level in LEVELS:
+            yield group_key(op, level), op, level, False
+            if op == "div" and level >= REMAINDER_MIN_LEVEL:
+                yield group_key(op, level, True), op, level, True
+
+
+def _template(op: str, options: Dict[str, Any]) -> RenderParams:
+    return normalize_render_params(op=op, a=0, b=0, **options)
+
+
+def _payload(job: Tuple[str, int, int, int, Dict[str, Any]]) -> bytes:
+    # module-level so the builder's process pool can pickle it
+    op, level, a, b, options = job
+    params = normalize_render_params(op=op, a=a, b=b, **options)
+    body = {
+        "op": op,
+        "level": level,
+        "a": a,
+        "b": b,
+        "trace": compute_trace(op, a, b),
+        "stages": {str(st): svg for st, svg in render_stages(params).items()},
+    }
+    return gzip.compress(dumps(body), compresslevel=9, mtime=0)
+
+
+def build_bank(
+    path: str,
+    per_level: int = 100,
+    seed: int = 1,
+    options: Optional[Dict[str, Any]] = None,
+    jobs: int = 1,
+) -> Dict[str, Any]:
+    """Sample, render and write a bank file; returns its header."""
+    options = dict(DEFAULT_OPTIONS if options is None else options)
+    rng = random.Random(seed)
+    problems: List[Tuple[str, int, int, int]] = []
+    groups: Dict[str, List[int]] = {}
+    for key, op, level, remainder in _groups():
+        seen = set()
+        # small levels have fewer distinct problems than per_level
+        for _ in range(per_level * 20):
+            if len(seen) >= per_level:
+                break
+            seen.add(sample_problem(op, level, rng, remainder))
+        groups[key] = [len(problems), len(seen)]
+        problems.extend((op, level, a, b) for a, b in sorted(seen))
+
+    header = {
+        "engine_version": ENGINE_VERSION,
+        "options": options,
+        "groups": groups,
+        "count": len(problems),
+    }
+    # the table offset depends on the header length, which contains it
+    table = 0
+    while True:
+        header["table"] = table
+        head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        want = len(MAGIC) + 4 + len(head)
+        if want == table:
+            break
+        table = want
+
+    tmp = f"{path}.tmp"
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    jobs_iter = ((op, level, a, b, options) for op, level, a, b in problems)
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(head)) + head)
+        f.write(b"\0" * (RECORD.size * len(problems)))
+        records = []
+        offset = table + RECORD.size * len(problems)
+        if jobs > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as ex:
+                blobs = ex.map(_payload, jobs_iter, chunksize=16)
+                for (op, level, a, b), blob in zip(problems, blobs):
+                    f.write(blob)
+                    records.append(RECORD.pack(a, b, offset, len(blob)))
+                    offset += len(blob)
+        else:
+            for (op, level, a, b), job in zip(problems, jobs_iter):
+                blob = _payload(job)
+                f.write(blob)
+                records.append(RECORD.pack(a, b, offset, len(blob)))
+                offset += len(blob)
+        f.seek(table)
+        f.write(b"".join(records))
+    os.replace(tmp, path)
+    return header
+
+
+class ProblemBank:
+    """Read-only view of a bank file through mmap.
+
+    Safe to share between threads: lookups only read the mapping.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[: len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a problem bank")
+        (n,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._mm[start : start + n])
+        if self.header["engine_version"] != ENGINE_VERSION:
+            self._mm.close()
+            raise ValueError(
+                f"{path} was built for engine {self.header['engine_version']}, this is {ENGINE_VERSION}; rebuild it"
+            )
+        self.groups: Dict[str, Tuple[int, int]] = {k: (v[0], v[1]) for k, v in self.header["groups"].items()}
+        self._table = self.header["table"]
+        self._templates = {op: _template(op, self.header["options"]) for op in OPS}
+
+    def __len__(self) -> int:
+        return self.header["count"]
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def pick(self, op: str, level: int, remainder: bool = False, rng: Any = random) -> Optional[int]:
+        """Index of a random problem in the group, or None if the group is empty."""
+        first, count = self.groups.get(group_key(op, level, remainder), (0, 0))
+        return first + rng.randrange(count) if count else None
+
+    def problem(self, index: int) -> Tuple[int, int]:
+        a, b, _off, _n = RECORD.unpack_from(self._mm, self._table + index * RECORD.size)
+        return a, b
+
+    def payload_gzip(self, index: int) -> bytes:
+        """The prebuilt, gzipped /api/problem JSON body for problem `index`."""
+        _a, _b, off, n = RECORD.unpack_from(self._mm, self._table + index * RECORD.size)
+        return self._mm[off : off + n]
+
+    def serves(self, params: RenderParams) -> bool:
+        """True if the stored stages were rendered with these options (a, b and stage aside)."""
+        return params._replace(a=0, b=0, stage=3) == self._templates.get(params.op)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Build the play-mode problem bank.")
+    ap.add_argument("--out", default=str(Path(__file__).resolve().parents[1] / "data" / "problem_bank.bin"))
+    ap.add_argument("--per-level", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args(argv)
+    header = build_bank(args.out, per_level=args.per_level, seed=args.seed, jobs=args.jobs)
+    size = os.path.getsize(args.out)
+    print(f"{args.out}: {header['count']} problems in {len(header['groups'])} groups, {size / 1e6:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
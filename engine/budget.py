@@ -0,0 +1,127 @@
+"""Per-op complexity budgets for incoming problems.
+
+A 5,000-digit operand turns into millions of blocks / SVG elements, so
+requests are measured before any trace or render work starts and compared
+against a Budget. The measures are upper bounds computed from the operands'
+sizes alone (no arithmetic on the operands themselves):
+
+  digits  longest operand
+  blocks  grid cells the full worked render draws; SVG size and render
+          time grow with it
+  steps   trace entries (digit additions, digit products, division steps)
+
+Over budget the caller either rejects the request (OverBudget) or renders
+the summary form instead (engine/summary.py).
+"""
+from __future__ import annotations
+
+import os
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+from engine.common.digits import Operand, ndigits
+
+OVER_BUDGET_MODES = ("reject", "summary")
+
+
+class Complexity(NamedTuple):
+    digits: int
+    blocks: int
+    steps: int
+
+
+class Budget(NamedTuple):
+    """Largest allowed Complexity per measure; 0 means unlimited."""
+
+    digits: int = 0
+    blocks: int = 0
+    steps: int = 0
+
+    def exceeded(self, c: Complexity) -> List[str]:
+        """Human-readable measures of `c` that are over this budget."""
+        return [
+            f"{name} {value} > {limit}"
+            for name, value, limit in zip(Budget._fields, c, self)
+            if limit > 0 and value > limit
+        ]
+
+
+# Renders at these limits take roughly 0.2-0.5 s on one core and produce
+# SVGs of up to ~10 MB (see `python -m bench.run`).
+DEFAULT_BUDGETS: Dict[str, Budget] = {
+    "add": Budget(digits=2000, blocks=100_000, steps=100_000),
+    "sub": Budget(digits=4000, blocks=20_000, steps=4000),
+    "mul": Budget(digits=1000, blocks=20_000, steps=25_000),
+    "div": Budget(digits=1000, blocks=250_000, steps=600),
+}
+
+
+class OverBudget(ValueError):
+    """A problem exceeds its op's budget (raised in reject mode)."""
+
+    def __init__(self, op: str, complexity: Complexity, budget: Budget) -> None:
+        self.op = op
+        self.complexity = complexity
+        self.budget = budget
+        super().__init__(f"Problem too large for {op}: {', '.join(budget.exceeded(complexity))}.")
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"error": str(self), "complexity": self.complexity._asdict(), "budget": self.budget._asdict()}
+
+
+def complexity(op: str, a: Operand, b: Operand, extra_addends: Iterable[Operand] = ()) -> Complexity:
+    """Upper bounds of the work a full render of `op` would do."""
+    if op == "add":
+        addends = [a, b, *extra_addends]
+        d = max(ndigits(x) for x in addends)
+        cells = len(addends) * (d + 1)  # one carry column on the left
+        return Complexity(d, cells, len(addends) * d)
+    da, db = ndigits(a), ndigits(b)
+    if op == "sub":
+        d = max(da, db)
+        return Complexity(d, 4 * (d + 1), d)
+    if op == "mul":
+        return Complexity(max(da, db), da * db, da * db + da + db)
+    if op == "div":
+        # at most 3 steps (5 + 2 + 2) per quotient digit, two grid rows each
+        q = max(1, da - db + 1)
+        steps = 3 * q
+        return Complexity(max(da, db), (2 * steps + 3) * (da + 1 + max(db, q)), steps)
+    raise ValueError(f"Unknown op: {op!r}")
+
+
+def check(
+    op: str,
+    a: Operand,
+    b: Operand,
+    extra_addends: Iterable[Operand] = (),
+    budgets: Mapping[str, Budget] = DEFAULT_BUDGETS,
+) -> Optional[OverBudget]:
+    """The OverBudget for this problem (not raised), or None when it fits."""
+    budget = budgets.get(op)
+    if budget is None:
+        return None
+    c = complexity(op, a, b, extra_addends)
+    return OverBudget(op, c, budget) if budget.exceeded(c) else None
+
+
+def parse_budget(text: str, default: Budget = Budget()) -> Budget:
+    """Parse "digits=200,blocks=20000"; measures not named keep `default`'s."""
+    values = default._asdict()
+    for item in text.split(","):
+        if not item.strip():
+            continue
+        name, sep, value = item.partition("=")
+        name = name.strip()
+        if not sep or name not in values:
+            raise ValueError(f"Bad budget item {item.strip()!r}; expected digits=N, blocks=N or steps=N")
+        values[name] = max(0, int(value))
+    return Budget(**values)
+
+
+def budgets_from_env(environ: Mapping[str, str] = os.environ) -> Dict[str, Budget]:
+    """DEFAULT_BUDGETS overridden by EGEL_BUDGET_ADD / _SUB / _MUL / _DIV."""
+    out = {}
+    for op, default in DEFAULT_BUDGETS.items():
+        text = environ.get(f"EGEL_BUDGET_{op.upper()}")
+        out[op] = parse_budget(text, default) if text else default
+    return out
@@ -0,0 +1,32 @@
+"""bytes.translate tables shared by the column kernels (engine/add/algo.py,
+engine/sub/algo.py) and the digit helpers (engine/common/digits.py).
+
+A table maps every byte k to one byte, so `data.translate(table)` applies a
+digit-level function to a whole bytes object in one C-level pass. Two digit
+x, y (0..9) are looked up together through the pair key 10 * x + y (at most
+99): build it with bytes(map(operator.add, X.translate(TIMES10), Y)).
+"""
+from __future__ import annotations
+
+from typing import Callable
+
+
+def byte_table(f: Callable[[int], int]) -> bytes:
+    """The table k -> f(k) for k in 0..255."""
+    return bytes(f(k) for k in range(256))
+
+
+# ASCII digit -> digit value (other bytes unchanged), and back
+DIGIT_VALUES = bytes.maketrans(b"0123456789", bytes(range(10)))
+DIGIT_ASCII = bytes.maketrans(bytes(range(10)), b"0123456789")
+
+# digit x -> 10 * x, the high half of a pair key
+TIMES10 = byte_table(lambda k: 10 * k if k < 10 else 0)
+
+# pair key 10 * x + y -> (x - y) % 10. The column kernels use it for two
+# things that look different but are the same lookup:
+#   - the digit of a - b in a column (x = a digit, y = b digit)
+#   - the carry c between two known digits: if x = (y + c) % 10 then
+#     c = (x - y) % 10. Subtraction: x = a - b digit, y = result digit,
+#     c = borrow. Addition: x = sum digit, y = column rest, c = carry-in.
+PAIR_DIFF = byte_table(lambda k: (k // 10 - k % 10) % 10)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def _default_sizeof(value: Any) -> int:
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    return 1
+
+
+class LRUCache:
+    """Thread-safe bounded LRU mapping with hit/miss/eviction counters.
+
+    Eviction happens when either `maxsize` (number of entries) or
+    `max_bytes` (sum of `sizeof(value)`) would be exceeded. Either limit
+    can be disabled with 0/None. A cache with maxsize=0 stores nothing but
+    still counts misses, so it can be switched off without code changes.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        max_bytes: Optional[int] = None,
+        sizeof: Callable[[Any], int] = _default_sizeof,
+    ) -> None:
+        self.maxsize = int(maxsize)
+        self.max_bytes = int(max_bytes) if max_bytes else 0
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        size = self._sizeof(value)
+        if self.max_bytes and size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        with self._lock:
+            if key in self._data:
+                self.bytes -= self._sizes[key]
+                self._data.move_to_end(key)
+            self._data[key] = value
+            self._sizes[key] = size
+            self.bytes += size
+            while len(self._data) > self.maxsize or (self.max_bytes and self.bytes > self.max_bytes):
+                old_key, _ = self._data.popitem(last=False)
+                self.bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value for `key`, computing and storing it on a miss.
+
+        `compute` runs outside the lock, so two threads missing on the same key
+        may both compute it; the result is deterministic, so that is harmless.
+        """
+        sentinel = _MISSING
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "maxsize": self.maxsize,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_MISSING = object()
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import re
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+DEFAULT_PRECISION = 1
+
+# Presentation attributes moved into CSS classes. Values are copied as-is,
+# except lengths that CSS needs a unit for (1px == 1 SVG user unit).
+STYLE_ATTRS = (
+    "fill",
+    "fill-opacity",
+    "stroke",
+    "stroke-width",
+    "stroke-opacity",
+    "stroke-linecap",
+    "stroke-linejoin",
+    "stroke-dasharray",
+    "opacity",
+    "font-family",
+    "font-size",
+    "font-weight",
+    "text-anchor",
+    "dominant-baseline",
+)
+_PX_ATTRS = ("font-size", "stroke-width")
+_FONT_ATTRS = frozenset(("font-family", "font-size", "font-weight", "text-anchor", "dominant-baseline"))
+# never wrapped into a run, even when self-closing
+_CONTAINERS = frozenset(("svg", "g", "defs", "pattern", "use"))
+
+# Attributes holding coordinates/lengths that are rounded to `precision`.
+_NUM_ATTRS = frozenset(
+    ("x", "y", "x1", "y1", "x2", "y2", "cx", "cy", "r", "rx", "ry", "width", "height", "stroke-width", "font-size")
+)
+_NUM_LIST_ATTRS = frozenset(("d", "viewBox", "points"))
+
+# Values equal to the SVG initial value; nothing in the renderers sets these
+# on a parent <g>, so dropping them cannot change inheritance.
+_DEFAULTS = {
+    "opacity": "1",
+    "fill-opacity": "1",
+    "stroke-opacity": "1",
+    "stroke": "none",
+    "font-weight": "normal",
+    "text-anchor": "start",
+    "dominant-baseline": "auto",
+}
+_ZERO_DEFAULT = frozenset(("x", "y", "rx", "ry"))
+
+_TOKEN_RE = re.compile(r"<[^>]*>|[^<]+")
+_TAG_RE = re.compile(r"<\s*([\w:-]+)(.*?)(/?)\s*>$", re.S)
+_ATTR_RE = re.compile(r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+_NUM_RE = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def _fmt(v: float, precision: int) -> str:
+    s = f"{v:.{precision}f}"
+    if "." in s:
+        s = s.rstrip("0").rstrip(".")
+    return "0" if s == "-0" else s
+
+
+def _round_attr(value: str, precision: int) -> str:
+    try:
+        return _fmt(float(value), precision)
+    except ValueError:
+        return value
+
+
+def _round_list(value: str, precision: int) -> str:
+    return _NUM_RE.sub(lambda m: _fmt(float(m.group(0)), precision), value)
+
+
+def _css_value(name: str, value: str) -> str:
+    if name in _PX_ATTRS and _NUM_RE.fullmatch(value):
+        return value + "px"
+    return value
+
+
+def _quote(value: str) -> str:
+    return f"'{value}'" if '"' in value else f'"{value}"'
+
+
+def _class_name(prefix: str, decl: str) -> str:
+    h = zlib.crc32(decl.encode("utf-8")) % 36 ** 5
+    digits = []
+    for _ in range(5):
+        h, r = divmod(h, 36)
+        digits.append("0123456789abcdefghijklmnopqrstuvwxyz"[r])
+    return prefix + "".join(digits)
+
+
+class SvgCompactor:
+    """Incremental SVG minifier for renderer output.
+
+    - presentation attributes are replaced by CSS classes, written in one
+      <style> block just before </svg> (CSS applies document-wide, so the
+      block can come last and the input can still be streamed);
+    - runs of sibling elements sharing a typeface (or, for shapes, a whole
+      stroke/fill combination) are wrapped in one <g> whose `.g…>*` rule
+      styles its children, so the shared part is written once per run; the
+      remaining per-element paint gets its own short class. A child rule is
+      used instead of inheritance so `opacity` keeps its per-element meaning;
+    - coordinates and lengths are rounded to `precision` decimals;
+    - attributes equal to their SVG initial value are dropped;
+    - whitespace between tags (outside <text>) is removed.
+
+    Class names are derived from the declaration text, so two compact SVGs
+    inlined in the same page never give one name two different meanings.
+
+    feed() accepts arbitrary chunks (tags may be split across chunks) and
+    returns whatever can already be emitted; close() flushes the rest.
+    """
+
+    def __init__(self, precision: int = DEFAULT_PRECISION) -> None:
+        self.precision = max(0, int(precision))
+        self._rules: Dict[str, str] = {}
+        self._pending = ""
+        # <text> element being collected: [attrs, content parts, font, paint]
+        self._text: Optional[list] = None
+        # consecutive one-glyph <text>s on one baseline: (y, font, paint, xs, glyphs)
+        self._row: Optional[Tuple[str, str, str, List[str], List[str]]] = None
+        # last leaf element (head, rest, font, paint), held back until we
+        # know whether a run starts
+        self._held: Optional[Tuple[str, str, str, str]] = None
+        self._run_key: Optional[str] = None
+
+    def _use(self, prefix: str, decl: str) -> str:
+        name = _class_name(prefix, decl)
+        if name not in self._rules:
+            selector = f".{name}>*" if prefix == "g" else f".{name}"
+            self._rules[name] = f"{selector}{{{decl}}}"
+        return name
+
+    def style_block(self) -> str:
+        if not self._rules:
+            return ""
+        return "<style>" + "".join(self._rules.values()) + "</style>"
+
+    def _parse(self, name: str, raw: str) -> Tuple[List[Tuple[str, str]], str, str]:
+        """Rewrite one start tag's attributes.
+
+        Returns (remaining attributes, font declaration, paint declaration).
+        """
+        attrs: List[Tuple[str, str]] = [(k, v1 if v1 else v2) for k, v1, v2 in _ATTR_RE.findall(raw)]
+        p = self.precision
+        values = dict(attrs)
+        out: List[Tuple[str, str]] = []
+        font: List[str] = []
+        paint: List[str] = []
+        for k, v in attrs:
+            if k in _NUM_ATTRS:
+                v = _round_attr(v, p)
+            elif k in _NUM_LIST_ATTRS:
+                v = _round_list(v, p)
+            elif k in ("opacity", "fill-opacity", "stroke-opacity"):
+                v = _round_attr(v, 2)
+            if _DEFAULTS.get(k) == v or (k in _ZERO_DEFAULT and v == "0" and name != "svg"):
+                continue
+            if k == "ry" and v == _round_attr(values.get("rx", ""), p):
+                continue  # ry defaults to rx
+            if k == "stroke-width" and values.get("stroke") == "none":
+                continue
+            if k in STYLE_ATTRS and name != "svg":
+                (font if k in _FONT_ATTRS else paint).append(f"{k}:{_css_value(k, v)}")
+            else:
+                out.append((k, v))
+        return out, ";".join(font), ";".join(paint)
+
+    def _element(self, head: str, rest: str, *decls: str) -> str:
+        names = " ".join(self._use("e", d) for d in decls if d)
+        return f'{head} class="{names}"{rest}' if names else head + rest
+
+    def _flush_row(self) -> str:
+        if self._row is None:
+            return ""
+        y, font, paint, xs, glyphs = self._row
+        self._row = None
+        head = f'<text x="{" ".join(xs)}" y="{y}"'
+        return self._leaf(head, ">" + "".join(glyphs) + "</text>", font, paint)
+
+    def _text_done(self, attrs: List[Tuple[str, str]], content: str, font: str, paint: str) -> str:
+        # A digit grid is mostly one-character <text>s in a row. SVG lets one
+        # <text> position each glyph with an x list, and every absolutely
+        # positioned glyph is anchored on its own, so a row collapses into
+        # one element that renders the same.
+        keys = [k for k, _ in attrs]
+        glyph = len(content) == 1 or (content.startswith("&") and content.endswith(";") and content.count(";") == 1)
+        if keys == ["x", "y"] and glyph and content != " ":
+            x, y = attrs[0][1], attrs[1][1]
+            row = self._row
+            if row is not None and (row[0], row[1], row[2]) == (y, font, paint):
+                row[3].append(x)
+                row[4].append(content)
+                return ""
+            out = self._flush_row()
+            self._row = (y, font, paint, [x], [content])
+            return out
+        head = "<text" + "".join(f" {k}={_quote(v)}" for k, v in attrs)
+        return self._flush_row() + self._leaf(head, ">" + content + "</text>", font, paint)
+
+    def _flush(self) -> str:
+        out = self._flush_row()
+        if self._run_key is not None:
+            out += "</g>"
+            self._run_key = None
+        if self._held is not None:
+            head, rest, font, paint = self._held
+            self._held = None
+            out += self._element(head, rest, font, paint)
+        return out
+
+    def _leaf(self, head: str, rest: str, font: str, paint: str) -> str:
+        full = ";".join(d for d in (font, paint) if d)
+        if not full:
+            return self._flush() + head + rest
+        run = self._run_key
+        if run == full:
+            return head + rest
+        if run is not None and run == font:
+            return self._element(head, rest, paint)
+        held = self._held
+        if held is not None and run is None:
+            h_head, h_rest, h_font, h_paint = held
+            # prefer a run on the whole declaration; else share just the font
+            if (h_font, h_paint) == (font, paint):
+                key, h_own, own = full, "", ""
+            elif font and h_font == font:
+                key, h_own, own = font, h_paint, paint
+            else:
+                key = None
+            if key is not None:
+                self._held = None
+                self._run_key = key
+                return (
+                    f'<g class="{self._use("g", key)}">'
+                    + self._element(h_head, h_rest, h_own)
+                    + self._element(head, rest, own)
+                )
+        out = self._flush()
+        self._held = (head, rest, font, paint)
+        return out
+
+    def _token(self, tok: str) -> str:
+        if self._text is not None:
+            if tok.startswith("</") and tok[2:-1].strip() == "text":
+                attrs, parts, font, paint = self._text
+                self._text = None
+                return self._text_done(attrs, "".join(parts), font, paint)
+            self._text[1].append(tok)
+            return ""
+        if tok[0] != "<":
+            return "" if tok.isspace() else self._flush() + tok
+        if tok.startswith("</"):
+            if tok[2:-1].strip() == "svg":
+                return self._flush() + self.style_block() + tok
+            return self._flush() + tok
+        m = _TAG_RE.match(tok)
+        if m is None or tok.startswith(("<!", "<?")):
+            return self._flush() + tok
+        name, raw, self_close = m.group(1), m.group(2), m.group(3)
+        attrs, font, paint = self._parse(name, raw)
+        if name == "text" and not self_close:
+            self._text = [attrs, [], font, paint]
+            return ""
+        head = f"<{name}" + "".join(f" {k}={_quote(v)}" for k, v in attrs)
+        if self_close and name not in _CONTAINERS:
+            return self._flush_row() + self._leaf(head, "/>", font, paint)
+        return self._flush() + self._element(head, "/>" if self_close else ">", font, paint)
+
+    def feed(self, chunk: str) -> str:
+        data = self._pending + chunk
+        cut = data.rfind(">") + 1
+        self._pending = data[cut:]
+        return "".join(self._token(tok) for tok in _TOKEN_RE.findall(data[:cut]))
+
+    def close(self) -> str:
+        rest, self._pending = self._pending, ""
+        out = "".join(self._token(tok) for tok in _TOKEN_RE.findall(rest))
+        return out + self._flush()
+
+
+def compact_svg(svg: str, precision: int = DEFAULT_PRECISION) -> str:
+    c = SvgCompactor(precision)
+    return c.feed(svg) + c.close()
+
+
+def iter_compact(chunks: Iterable[str], precision: int = DEFAULT_PRECISION) -> Iterator[str]:
+    """Streaming form of compact_svg() over already-chunked SVG text."""
+    c = SvgCompactor(precision)
+    for chunk in chunks:
+        out = c.feed(chunk)
+        if out:
+            yield out
+    tail = c.close()
+    if tail:
+        yield tail
@@ -0,0 +1,171 @@
+"""Decimal digits of long non-negative ints.
+
+Peeling digits with `n % 10; n //= 10` costs a big-int division per digit
+(quadratic in the digit count), and CPython's own int <-> str conversions
+are quadratic too and refuse ints past sys.get_int_max_str_digits() (4300
+digits by default). Here both directions split the number at 10**(c*2**k)
+(divide and conquer) and hand chunks of at most _CHUNK digits to str()/int(),
+so a 10k-digit operand costs a handful of big multiplications / divisions
+and nothing depends on the interpreter's limit.
+
+While a DigitCache is active (`with DigitCache():`, or a function wrapped in
+digit_scope) the decimal text of every long int converted or parsed is
+remembered, so the trace and the layout of one request convert each
+operand once; operands that arrive as digit strings are never converted
+back at all.
+"""
+from __future__ import annotations
+
+import functools
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from engine.common.bytetables import DIGIT_ASCII, DIGIT_VALUES
+
+# an operand as the API accepts it: an int or a string of decimal digits
+Operand = Union[int, str]
+
+_CHUNK = 1000  # digits handed to str()/int() at once, well under the limit
+_CACHE_BITS = 256  # ints shorter than this (~77 digits) are converted directly
+_LOG10_2 = 0.30102999566398120
+
+class DigitCache:
+    """Decimal text of the long ints seen while active (`with DigitCache():`)."""
+
+    def __init__(self) -> None:
+        self.text: Dict[int, str] = {}
+        self._token = None
+
+    def __enter__(self) -> "DigitCache":
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        _active.reset(self._token)
+
+
+_active: ContextVar[Optional[DigitCache]] = ContextVar("egel_digit_cache", default=None)
+
+
+def digit_scope(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorator: every call runs with a DigitCache active (the caller's, if
+    it already has one), so all conversions inside share it."""
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if _active.get() is not None:
+            return fn(*args, **kwargs)
+        with DigitCache():
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+@functools.lru_cache(maxsize=64)
+def _pow10(k: int) -> int:
+    # 10**(_CHUNK * 2**k), squared up from the previous one
+    return 10**_CHUNK if k == 0 else _pow10(k - 1) ** 2
+
+
+def _emit(x: int, k: int, pad: bool, parts: List[str]) -> None:
+    # x < _pow10(k)**2 ... as text, zero-padded to _CHUNK * 2**(k+1) if pad
+    if k < 0:
+        s = str(x)
+        parts.append(s.zfill(_CHUNK) if pad else s)
+        return
+    hi, lo = divmod(x, _pow10(k))
+    if hi or pad:
+        _emit(hi, k - 1, pad, parts)
+        _emit(lo, k - 1, True, parts)
+    else:
+        _emit(lo, k - 1, False, parts)
+
+
+def _to_text(x: int) -> str:
+    if x.bit_length() <= _CHUNK * 3:  # < 10**_CHUNK
+        return str(x)
+    k = 0
+    while _pow10(k + 1) <= x:  # until x < _pow10(k)**2
+        k += 1
+    parts: List[str] = []
+    _emit(x, k, False, parts)
+    return "".join(parts)
+
+
+def _from_text(s: str) -> int:
+    n = len(s)
+    if n <= _CHUNK:
+        return int(s)
+    # split off the low _CHUNK * 2**k digits, the largest such block below n
+    k = 0
+    while _CHUNK << (k + 1) < n:
+        k += 1
+    low = _CHUNK << k
+    return _from_text(s[: n - low]) * _pow10(k) + _from_text(s[n - low :])
+
+
+def decimal(x: int) -> str:
+    """Decimal text of a non-negative int, whatever its length."""
+    if x < 0:
+        raise ValueError("Expected a non-negative integer.")
+    x = int(x)
+    if x.bit_length() <= _CACHE_BITS:
+        return str(x)
+    cache = _active.get()
+    if cache is None:
+        return _to_text(x)
+    s = cache.text.get(x)
+    if s is None:
+        s = cache.text[x] = _to_text(x)
+    return s
+
+
+def parse(text: str) -> int:
+    """The int of a string of decimal digits ("007" is 7), whatever its length."""
+    s = text.strip()
+    if not s.isascii() or not s.isdigit():
+        raise ValueError(f"Expected decimal digits, got {text[:20]!r}{'...' if len(text) > 20 else ''}.")
+    s = s.lstrip("0") or "0"
+    x = _from_text(s)
+    cache = _active.get()
+    if cache is not None and x.bit_length() > _CACHE_BITS:
+        cache.text[x] = s
+    return x
+
+
+def operand(x: Operand) -> int:
+    """An operand given as int or digit string, as an int (ints pass through;
+    the engines check their sign with their own messages)."""
+    return parse(x) if isinstance(x, str) else int(x)
+
+
+def ndigits(x: Operand) -> int:
+    """Decimal digit count without converting to str (digit strings: their
+    length without leading zeros)."""
+    if isinstance(x, str):
+        return max(1, len(x.strip().lstrip("0")))
+    x = abs(int(x))
+    if x < 10:
+        return 1
+    d = int(x.bit_length() * _LOG10_2) + 1  # exact or one too many
+    return d - 1 if x < 10 ** (d - 1) else d
+
+
+def digit_bytes(x: int) -> bytes:
+    """Digit values (0..9), most significant first, as bytes."""
+    return decimal(x).encode("ascii").translate(DIGIT_VALUES)
+
+
+def units_first(x: int) -> List[int]:
+    """Digit values, least significant first ([0] for 0)."""
+    return list(digit_bytes(x)[::-1])
+
+
+def most_first(x: int) -> List[int]:
+    """Digit values, most significant first ([0] for 0)."""
+    return list(digit_bytes(x))
+
+
+def digits_text(values: Union[bytes, bytearray, List[int]]) -> str:
+    """Digit values (most significant first) back to their decimal text."""
+    return bytes(values).translate(DIGIT_ASCII).decode("ascii")
@@ -0,0 +1,332 @@
+"""Display lists: what a worked problem draws, independent of the output format.
+
+Each op's layout turns its trace into a DisplayList once: typed primitives
+in drawing order, each tagged with the first stage that shows it (the same
+contract as the (min_stage, fragment) streams in engine/common/slots.py):
+
+  Text  a string anchored at a point (cell digits, signs, labels)
+  Rule  a straight stroke (separators, 10-completion underlines)
+  Rect  a filled and/or stroked box (backgrounds, highlights, badges)
+  Grid  the cell grid of a box, optionally with a border
+
+Coordinates are user units, i.e. those of the SVG's viewBox. Output formats
+are passes over the list:
+
+  SvgBackend   SVG elements. CellSvg (add, sub) and TikzSvg (mul, div) are
+               the two attribute dialects the renderers have always written,
+               so their SVG stays byte for byte what it was.
+  to_json      compact JSON, one array per primitive, for drawing on a
+               client-side <canvas>
+
+so a cached list serves every stage, every grid mode, stage deltas and the
+JSON form without running the layout again.
+"""
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from itertools import chain
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
+
+from engine.common.grid import svg_grid_path, svg_grid_pattern
+from engine.common.slots import delta_svg, slotted_svg
+from engine.common.stream import DEFAULT_CHUNK_SIZE, iter_chunks
+from engine.common.timing import phase
+
+
+class Text(NamedTuple):
+    x: float
+    y: float
+    s: str
+    size: float
+    fill: str = "#000"
+    weight: str = "normal"
+    anchor: str = "middle"
+    family: str = "sans-serif"
+    baseline: str = "alphabetic"
+
+
+class Rule(NamedTuple):
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    stroke: str = "#000"
+    width: float = 2
+    opacity: float = 1.0
+    cap: str = "butt"
+
+
+class Rect(NamedTuple):
+    x: float
+    y: float
+    w: float
+    h: float
+    fill: str = "none"
+    stroke: str = "none"
+    width: float = 1
+    opacity: float = 1.0
+    rx: float = 0.0
+    ry: float = 0.0
+
+
+class Grid(NamedTuple):
+    """cols x rows cells of size `step` from (x0, y0). edges=False draws only
+    the interior lines; `border` (a stroke colour) adds an outline rect."""
+
+    x0: float
+    y0: float
+    cols: int
+    rows: int
+    step: float
+    stroke: str
+    width: float = 1
+    opacity: float = 1.0
+    edges: bool = True
+    border: Optional[str] = None
+    border_width: float = 0
+
+
+Primitive = Union[Text, Rule, Rect, Grid]
+Item = Tuple[int, Primitive]
+
+class DisplayList(NamedTuple):
+    """(min_stage, primitive) items in drawing order, plus the canvas size.
+
+    `sizes` holds (min_stage, width, height) entries in stage order; the
+    canvas of a stage is the last entry at or below it (division grows when
+    the remainder badge appears). Treat instances as read-only: they are
+    shared through the layout cache.
+    """
+
+    items: Tuple[Item, ...]
+    sizes: Tuple[Tuple[int, float, float], ...]
+
+    def size(self, stage: int) -> Tuple[float, float]:
+        width, height = self.sizes[0][1:]
+        for s, w, h in self.sizes:
+            if s <= stage:
+                width, height = w, h
+        return width, height
+
+    def restaged(self, stage_of: Dict[int, int]) -> "DisplayList":
+        """The same list with every min_stage s replaced by stage_of[s]."""
+        return DisplayList(
+            tuple((stage_of[s], prim) for s, prim in self.items),
+            tuple((stage_of[s], w, h) for s, w, h in self.sizes),
+        )
+
+
+def _esc(s: str) -> str:
+    return (s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+             .replace('"', "&quot;").replace("'", "&apos;"))
+
+
+class SvgBackend(ABC):
+    """Writes display lists as SVG.
+
+    Subclasses fix the attribute syntax (quotes, number format, attribute
+    order) in open/text/rule/rect; the grid, stage selection, streaming and
+    stage deltas are shared. `sep` goes between elements.
+    """
+
+    sep = "\n"
+
+    def __init__(self, grid_mode: str = "lines", integer: bool = False) -> None:
+        self.grid_mode = grid_mode
+        # every length is an int (engine/common/viewbox.py): write it as it is
+        self.integer = integer
+        self._emit = {Text: self.text, Rule: self.rule, Rect: self.rect, Grid: self.grid}
+
+    # --- elements ---
+    @abstractmethod
+    def open(self, width: float, height: float) -> str:
+        """The root <svg> tag (and whatever must sit right after it)."""
+
+    @abstractmethod
+    def text(self, t: Text) -> str:
+        ...
+
+    @abstractmethod
+    def rule(self, r: Rule) -> str:
+        ...
+
+    @abstractmethod
+    def rect(self, r: Rect) -> str:
+        ...
+
+    def grid_line(self, x1: float, y1: float, x2: float, y2: float, g: Grid) -> str:
+        return self.rule(Rule(x1, y1, x2, y2, g.stroke, g.width, g.opacity))
+
+    def grid(self, g: Grid) -> str:
+        """lines: one element per edge; path: a single <path>; pattern: one
+        tiled <rect> (see engine.common.grid). The border, if any, is drawn
+        over a pattern and under the lines."""
+        x0, y0, step = g.x0, g.y0, g.step
+        w, h = g.cols * step, g.rows * step
+        border = [] if g.border is None else [
+            self.rect(Rect(x0, y0, w, h, fill="none", stroke=g.border, width=g.border_width))
+        ]
+        if self.grid_mode == "pattern":
+            tiles = svg_grid_pattern(x0, y0, w, h, step, stroke=g.stroke, width=g.width, opacity=g.opacity,
+                                     edges=g.edges)
+            return self.sep.join([tiles] + border)
+        lo = 0 if g.edges else 1
+        xs = [x0 + c * step for c in range(lo, g.cols + 1 - lo)]
+        ys = [y0 + r * step for r in range(lo, g.rows + 1 - lo)]
+        if self.grid_mode == "path":
+            lines = [svg_grid_path(x0, y0, x0 + w, y0 + h, xs, ys, stroke=g.stroke, width=g.width,
+                                   opacity=g.opacity)]
+        else:
+            lines = [self.grid_line(x, y0, x, y0 + h, g) for x in xs]
+            lines.extend(self.grid_line(x0, y, x0 + w, y, g) for y in ys)
+        return self.sep.join(border + lines)
+
+    def emit(self, prim: Primitive) -> str:
+        return self._emit[type(prim)](prim)
+
+    # --- documents ---
+    def items(self, dl: DisplayList) -> Iterator[Tuple[int, str]]:
+        """(min_stage, fragment) for everything after the root tag, closing tag included."""
+        emit = self._emit
+        for s, prim in dl.items:
+            yield s, emit[type(prim)](prim)
+        yield 0, "</svg>"
+
+    def render(self, dl: DisplayList, stage: int) -> str:
+        with phase("emit"):
+            parts = [self.open(*dl.size(stage))]
+            parts.extend(frag for s, frag in self.items(dl) if s <= stage)
+        with phase("serialize"):
+            return self.sep.join(parts)
+
+    def iter_render(self, dl: DisplayList, stage: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+        frags = (frag for s, frag in self.items(dl) if s <= stage)
+        return iter_chunks(chain((self.open(*dl.size(stage)),), frags), self.sep, chunk_size)
+
+    def render_stages(self, dl: DisplayList, stages: Iterable[int]) -> Dict[int, str]:
+        """Every element is written once, then joined per stage."""
+        with phase("emit"):
+            items = list(self.items(dl))
+        with phase("serialize"):
+            return {
+                st: self.sep.join(chain((self.open(*dl.size(st)),), (frag for s, frag in items if s <= st)))
+                for st in stages
+            }
+
+    def render_slots(self, dl: DisplayList, stage: int, from_stage: Optional[int] = None) -> str:
+        """Slotted SVG of `stage`, or (from_stage given) the delta from_stage -> stage."""
+        head = self.open(*dl.size(stage))
+        with phase("emit"):
+            if from_stage is None:
+                return slotted_svg(self.items(dl), stage, self.sep, head=head)
+            from_head = self.open(*dl.size(from_stage))
+            return delta_svg(self.items(dl), from_stage, stage, self.sep, head=head, from_head=from_head)
+
+
+class CellSvg(SvgBackend):
+    """Single-quoted attributes, numbers as computed; optional attributes
+    only when they differ from the SVG defaults (addition, subtraction)."""
+
+    def open(self, width: float, height: float) -> str:
+        return f"<svg xmlns='http://www.w3.org/2000/svg' width='{width}' height='{height}' viewBox='0 0 {width} {height}'>"
+
+    def num(self, v: float) -> str:
+        return f"{v}"
+
+    def text(self, t: Text) -> str:
+        baseline = "" if t.baseline == "alphabetic" else f" dominant-baseline='{t.baseline}'"
+        weight = "" if t.weight == "normal" else f" font-weight='{t.weight}'"
+        return (
+            f"<text x='{self.num(t.x)}' y='{self.num(t.y)}' text-anchor='{t.anchor}'{baseline} "
+            f"font-family='{t.family}' font-size='{t.size}'{weight} fill='{t.fill}'>{_esc(t.s)}</text>"
+        )
+
+    def rule(self, r: Rule) -> str:
+        opacity = "" if r.opacity == 1.0 else f" opacity='{r.opacity}'"
+        cap = "" if r.cap == "butt" else f" stroke-linecap='{r.cap}'"
+        return (
+            f"<line x1='{r.x1}' y1='{r.y1}' x2='{r.x2}' y2='{r.y2}' "
+            f"stroke='{r.stroke}' stroke-width='{r.width}'{opacity}{cap}/>"
+        )
+
+    def rect(self, r: Rect) -> str:
+        stroke = "" if r.stroke == "none" else f" stroke='{r.stroke}' stroke-width='{r.width}'"
+        opacity = "" if r.opacity == 1.0 else f" opacity='{r.opacity}'"
+        rounded = "" if not (r.rx or r.ry) else f" rx='{r.rx}' ry='{r.ry}'"
+        return f"<rect x='{r.x}' y='{r.y}' width='{r.w}' height='{r.h}' fill='{r.fill}'{stroke}{opacity}{rounded}/>"
+
+
+class TikzSvg(SvgBackend):
+    """Double-quoted attributes, coordinates to 2 decimals, every attribute
+    written out (the layouts ported from the TeX/Lua drawings: mul, div)."""
+
+    def __init__(self, grid_mode: str = "lines", integer: bool = False) -> None:
+        super().__init__(grid_mode, integer)
+        self._c = "d" if integer else ".2f"
+
+    def open(self, width: float, height: float) -> str:
+        return f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+
+    def text(self, t: Text) -> str:
+        c = self._c
+        s = t.s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        return (
+            f'<text x="{t.x:{c}}" y="{t.y:{c}}" font-size="{t.size}" font-family="{t.family}" '
+            f'font-weight="{t.weight}" text-anchor="{t.anchor}" fill="{t.fill}">{s}</text>'
+        )
+
+    def rule(self, r: Rule) -> str:
+        c = self._c
+        return (
+            f'<line x1="{r.x1:{c}}" y1="{r.y1:{c}}" x2="{r.x2:{c}}" y2="{r.y2:{c}}" '
+            f'stroke="{r.stroke}" stroke-width="{r.width}" opacity="{r.opacity}"/>'
+        )
+
+    def rect(self, r: Rect) -> str:
+        c = self._c
+        return (
+            f'<rect x="{r.x:{c}}" y="{r.y:{c}}" width="{r.w:{c}}" height="{r.h:{c}}" fill="{r.fill}" '
+            f'stroke="{r.stroke}" stroke-width="{r.width}" opacity="{r.opacity}" rx="{r.rx:{c}}" ry="{r.ry:{c}}"/>'
+        )
+
+
+# [min_stage, tag, *fields] per primitive; only the geometry is rounded (to
+# 2 decimals, like the SVG), so each kind names its own coordinate fields
+def _text_row(s: int, t: Text) -> list:
+    return [s, "t", round(t[0], 2), round(t[1], 2), *t[2:]]
+
+
+def _rule_row(s: int, r: Rule) -> list:
+    return [s, "l", round(r[0], 2), round(r[1], 2), round(r[2], 2), round(r[3], 2), *r[4:]]
+
+
+def _rect_row(s: int, r: Rect) -> list:
+    return [s, "r", round(r[0], 2), round(r[1], 2), round(r[2], 2), round(r[3], 2), *r[4:8],
+            round(r[8], 2), round(r[9], 2)]
+
+
+def _grid_row(s: int, g: Grid) -> list:
+    return [s, "g", *g]
+
+
+_JSON_ROWS = {Text: _text_row, Rule: _rule_row, Rect: _rect_row, Grid: _grid_row}
+
+
+def to_json(dl: DisplayList, stage: Optional[int] = None) -> str:
+    """The list as compact JSON for client-side drawing:
+
+      {"sizes": [[min_stage, width, height], ...],
+       "items": [[min_stage, kind, *fields], ...]}
+
+    kind is "t" (Text), "l" (Rule), "r" (Rect) or "g" (Grid), followed by
+    the primitive's fields in declaration order. Items later than `stage`
+    are left out; by default every stage is sent and the client reveals
+    them itself.
+    """
+    rows = _JSON_ROWS
+    with phase("emit"):
+        items = [rows[type(prim)](s, prim) for s, prim in dl.items if stage is None or s <= stage]
+        sizes = [list(size) for size in dl.sizes]
+    with phase("serialize"):
+        return json.dumps({"sizes": sizes, "items": items}, ensure_ascii=False, separators=(",", ":"))
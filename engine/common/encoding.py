@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import gzip
+from typing import Iterable, Optional, Tuple
+
+try:  # optional: `pip install brotli`
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# server preference when the client accepts several equally
+ENCODINGS = ("br", "gzip")
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+
+def available_encodings(names: Iterable[str]) -> Tuple[str, ...]:
+    """Keep the known, importable encodings from `names` (in ENCODINGS order)."""
+    wanted = {n.strip().lower() for n in names if n.strip()}
+    unknown = wanted.difference(ENCODINGS)
+    if unknown:
+        raise ValueError(f"Unknown encoding(s): {', '.join(sorted(unknown))} (expected {', '.join(ENCODINGS)})")
+    return tuple(e for e in ENCODINGS if e in wanted and (e != "br" or brotli is not None))
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress `data` for a Content-Encoding. Output is deterministic
+    (no gzip timestamp), so equal inputs give equal bytes."""
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "br":
+        if brotli is None:
+            raise RuntimeError("brotli is not installed")
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    raise ValueError(f"Unknown encoding: {encoding!r}")
+
+
+def negotiate(accept_encoding: str, enabled: Iterable[str]) -> Optional[str]:
+    """Pick the best of `enabled` for an Accept-Encoding header, or None for identity.
+
+    Honours q-values (q=0 refuses an encoding) and `*`; ties go to the order
+    of `enabled`.
+    """
+    enabled = tuple(enabled)
+    if not enabled or not accept_encoding:
+        return None
+    q = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        q[name] = weight
+    best, best_q = None, 0.0
+    for enc in enabled:
+        weight = q.get(enc, q.get("*", 0.0))
+        if weight > best_q:
+            best, best_q = enc, weight
+    return best
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+# lines   -> one <line> per grid edge (original output)
+# path    -> all edges in a single <path d=...>
+# pattern -> one cell-sized <pattern> tile filling a single <rect>
+GRID_MODES = ("lines", "path", "pattern")
+
+
+def fmt_num(v: float) -> str:
+    """Shortest decimal form with at most 2 fractional digits (33.50 -> 33.5, 56.00 -> 56)."""
+    s = f"{v:.2f}"
+    if "." in s:
+        s = s.rstrip("0").rstrip(".")
+    return "0" if s == "-0" else s
+
+
+def grid_path_d(x0: float, y0: float, x1: float, y1: float, xs: Iterable[float], ys: Iterable[float]) -> str:
+    """Path data for vertical edges at xs (spanning y0..y1) and horizontal edges at ys (spanning x0..x1)."""
+    sy0, sy1, sx0, sx1 = fmt_num(y0), fmt_num(y1), fmt_num(x0), fmt_num(x1)
+    parts = [f"M{fmt_num(x)} {sy0}V{sy1}" for x in xs]
+    parts.extend(f"M{sx0} {fmt_num(y)}H{sx1}" for y in ys)
+    return "".join(parts)
+
+
+def svg_grid_path(
+    x0: float, y0: float, x1: float, y1: float,
+    xs: Iterable[float], ys: Iterable[float],
+    stroke: str, width: float, opacity: float = 1.0,
+) -> str:
+    op = "" if opacity == 1.0 else f' opacity="{opacity}"'
+    return (
+        f'<path d="{grid_path_d(x0, y0, x1, y1, xs, ys)}" fill="none" '
+        f'stroke="{stroke}" stroke-width="{width}"{op}/>'
+    )
+
+
+def svg_grid_pattern(
+    x0: float, y0: float, w: float, h: float, step: float,
+    stroke: str, width: float, opacity: float = 1.0, edges: bool = True,
+) -> str:
+    """Grid as a tiled <pattern> clipped to the (x0, y0, w, h) box.
+
+    Each tile strokes all four of its edges, so neighbouring tiles each paint
+    half of a shared line. With edges=True the fill box is grown by half a
+    stroke so the outer border lines get their full width as well; with
+    edges=False only interior lines are meant to show (the caller draws a
+    border on top).
+
+    The id is derived from the geometry, so identical grids in several
+    inlined SVGs share one definition instead of clashing.
+    """
+    pid = "egel-grid-" + "-".join(
+        fmt_num(v).replace(".", "_").replace("-", "m") for v in (step, x0, y0, width)
+    ) + "-" + stroke.lstrip("#")
+    s = fmt_num(step)
+    tile = f"M0 0H{s}V{s}H0Z"
+    half = width / 2 if edges else 0.0
+    op = "" if opacity == 1.0 else f' opacity="{opacity}"'
+    return (
+        f'<defs><pattern id="{pid}" x="{fmt_num(x0)}" y="{fmt_num(y0)}" width="{s}" height="{s}" '
+        f'patternUnits="userSpaceOnUse"><path d="{tile}" fill="none" stroke="{stroke}" '
+        f'stroke-width="{width}"/></pattern></defs>'
+        f'<rect x="{fmt_num(x0 - half)}" y="{fmt_num(y0 - half)}" width="{fmt_num(w + 2 * half)}" '
+        f'height="{fmt_num(h + 2 * half)}" fill="url(#{pid})"{op}/>'
+    )
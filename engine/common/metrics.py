@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Hashable, List, Sequence, Tuple, Union
+
+# seconds; covers cache-miss renders from sub-millisecond to multi-second
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_text(label: Union[str, Tuple[str, ...]], label_value: Hashable) -> str:
+    if not label:
+        return ""
+    if isinstance(label, tuple):
+        return ",".join(f'{k}="{v}"' for k, v in zip(label, label_value))
+    return f'{label}="{label_value}"'
+
+
+class Histogram:
+    """Minimal Prometheus-style histogram with optional labels.
+
+    observe("render", 0.012) adds a sample to the series whose label value
+    is "render"; prometheus_lines() renders cumulative buckets, _sum and
+    _count for every series seen so far. With label=("op", "phase") the
+    label value is a tuple: observe(("div", "trace"), 0.003).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label: Union[str, Tuple[str, ...]] = "",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Hashable, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: Hashable, value: float) -> None:
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][idx] += 1
+            series[1][0] += value
+
+    def labels(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._series)
+
+    def count(self, label_value: Hashable) -> int:
+        with self._lock:
+            series = self._series.get(label_value)
+            return sum(series[0]) if series else 0
+
+    def mean(self, label_value: Hashable) -> float:
+        with self._lock:
+            series = self._series.get(label_value)
+            if not series:
+                return 0.0
+            n = sum(series[0])
+            return series[1][0] / n if n else 0.0
+
+    def prometheus_lines(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {k: (list(v[0]), v[1][0]) for k, v in self._series.items()}
+        for label_value, (counts, total) in sorted(snapshot.items()):
+            lbl = _label_text(self.label, label_value)
+            sep = "," if lbl else ""
+            cum = 0
+            for bound, c in zip(self.buckets, counts):
+                cum += c
+                lines.append(f'{self.name}_bucket{{{lbl}{sep}le="{bound:g}"}} {cum}')
+            cum += counts[-1]
+            lines.append(f'{self.name}_bucket{{{lbl}{sep}le="+Inf"}} {cum}')
+            suffix = f"{{{lbl}}}" if lbl else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.6f}")
+            lines.append(f"{self.name}_count{suffix} {cum}")
+        return lines
+
+
+class Counter:
+    """Prometheus-style counter with optional labels, in the style of Histogram:
+    inc(("mul", "summary")) with label=("op", "action")."""
+
+    def __init__(self, name: str, help_text: str, label: Union[str, Tuple[str, ...]] = "") -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values: Dict[Hashable, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: Hashable = "", amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def value(self, label_value: Hashable = "") -> float:
+        with self._lock:
+            return self._values.get(label_value, 0)
+
+    def prometheus_lines(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for label_value, value in sorted(snapshot.items()):
+            lbl = _label_text(self.label, label_value)
+            lines.append(f"{self.name}{{{lbl}}} {value:g}" if lbl else f"{self.name} {value:g}")
+        return lines
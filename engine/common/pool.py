@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from engine.common.metrics import Histogram
+
+MODES = ("inline", "thread", "process")
+
+
+class PoolBusy(RuntimeError):
+    """Raised when the pool already holds `capacity` unfinished tasks."""
+
+
+class PoolTimeout(TimeoutError):
+    """Raised when a task does not finish within the per-call timeout."""
+
+
+def _timed_call(fn: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[Any, float]:
+    # runs in the worker; module-level so process pools can pickle it
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - t0
+
+
+class WorkerPool:
+    """Executor wrapper with a bounded backlog and per-call timeouts.
+
+    mode:
+      inline  -> run in the calling thread (no isolation, no limits)
+      thread  -> ThreadPoolExecutor; cheap, but renders still share the GIL
+      process -> ProcessPoolExecutor; CPU-heavy renders run in parallel on
+                 separate cores. Callables and arguments must be picklable
+                 (module-level functions, NamedTuples, plain data).
+
+    At most `max_workers + max_queue` tasks may be unfinished at once. A task
+    that times out is abandoned by the caller but keeps its slot until the
+    worker actually finishes it, so the backlog limit stays truthful.
+
+    Every task records how long it waited for a worker and how long the
+    worker spent on it, labelled by the callable's name.
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: Optional[int] = None,
+        max_queue: int = 64,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown pool mode: {mode!r} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.max_workers = max(1, int(max_workers or 1))
+        self.max_queue = max(0, int(max_queue))
+        self.timeout = timeout if timeout and timeout > 0 else None
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.queue_wait = Histogram(
+            "egel_pool_queue_wait_seconds", "Time tasks spent waiting for a free worker.", label="task"
+        )
+        self.compute = Histogram(
+            "egel_pool_compute_seconds", "Time workers spent running tasks.", label="task"
+        )
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        # created lazily so importing the app (or uvicorn's reload parent)
+        # does not fork workers
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.mode == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix="egel-worker"
+                        )
+        return self._executor
+
+    def _release(self, _fut: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def _submit(self, fn: Callable[..., Any], args: Tuple[Any, ...], block: bool) -> Future:
+        """Queue fn(*args) wrapped in _timed_call. With block=False a full
+        backlog raises PoolBusy; with block=True the caller waits for a slot."""
+        if not self._slots.acquire(blocking=block):
+            with self._lock:
+                self.rejected += 1
+            raise PoolBusy(f"Render queue is full ({self.capacity} tasks pending).")
+        with self._lock:
+            self.pending += 1
+        try:
+            fut = self._get_executor().submit(_timed_call, fn, args)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+            raise
+        fut.add_done_callback(self._release)
+        return fut
+
+    def _record(self, fn: Callable[..., Any], started: float, compute_s: float) -> None:
+        name = getattr(fn, "__name__", "task")
+        total = time.perf_counter() - started
+        self.queue_wait.observe(name, max(0.0, total - compute_s))
+        self.compute.observe(name, compute_s)
+
+    def _timed_out(self, fut: Future) -> PoolTimeout:
+        fut.cancel()  # only helps if it has not started yet
+        with self._lock:
+            self.timeouts += 1
+        return PoolTimeout(f"Render did not finish within {self.timeout:g}s.")
+
+    def run(self, fn: Callable[..., Any], *args: Any, block: bool = False) -> Any:
+        """Call fn(*args) on the pool and wait for the result (up to `timeout`)."""
+        if self.mode == "inline":
+            result, compute_s = _timed_call(fn, args)
+            self._record(fn, time.perf_counter() - compute_s, compute_s)
+            return result
+        started = time.perf_counter()
+        fut = self._submit(fn, args, block)
+        try:
+            result, compute_s = fut.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise self._timed_out(fut) from None
+        self._record(fn, started, compute_s)
+        return result
+
+    async def arun(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Async form of run() for event-loop handlers.
+
+        Admission is non-blocking: a full backlog raises PoolBusy at once so
+        the handler can answer 429 instead of piling up waiting coroutines.
+        In inline mode the call runs on the event loop thread itself.
+        """
+        if self.mode == "inline":
+            return self.run(fn, *args)
+        started = time.perf_counter()
+        fut = self._submit(fn, args, block=False)
+        try:
+            result, compute_s = await asyncio.wait_for(asyncio.wrap_future(fut), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise self._timed_out(fut) from None
+        self._record(fn, started, compute_s)
+        return result
+
+    def retry_after(self) -> int:
+        """Seconds a rejected client should wait: roughly the time to drain
+        the current backlog at the observed mean compute time (1..30)."""
+        with self._lock:
+            pending = self.pending
+        per_task = max((self.compute.mean(k) for k in self.compute.labels()), default=0.0)
+        return max(1, min(30, math.ceil(per_task * pending / self.max_workers)))
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            ex, self._executor = self._executor, None
+        if ex is not None:
+            ex.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "workers": self.max_workers,
+                "capacity": self.capacity,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+from json.encoder import encode_basestring
+from operator import itemgetter
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from engine.common.digits import decimal
+
+try:  # optional: `pip install orjson`
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+# which encoder dumps() tries first (reported by the bench)
+ENCODER = "orjson" if orjson is not None else "json"
+
+# rows: every table is a list of objects (the algorithm modules' own shape);
+# columns: every table is one object of parallel arrays, see columnar()
+TRACE_LAYOUTS = ("rows", "columns")
+
+_JSON = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON as UTF-8 bytes: json.dumps(obj, ensure_ascii=False,
+    separators=(",", ":")).encode("utf-8"), byte for byte.
+
+    orjson writes it when installed. It only takes 64-bit integers, so a
+    trace of long operands falls back to the standard library encoder; that
+    one refuses ints past CPython's int <-> str limit, and a trace holding
+    such an int is written by _encode, which converts them with
+    engine.common.digits.decimal (the interpreter's limit is never raised).
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:  # orjson.JSONEncodeError: an int past 64 bits
+            pass
+    try:
+        return _JSON.encode(obj).encode("utf-8")
+    except ValueError:  # an int past sys.get_int_max_str_digits()
+        parts: List[str] = []
+        _encode(obj, parts)
+        return "".join(parts).encode("utf-8")
+
+
+def _int(x: int) -> str:
+    return decimal(x) if x >= 0 else "-" + decimal(-x)
+
+
+def _key(k: Any) -> str:
+    # dict keys as json writes them: strings as they are, the rest as their JSON text
+    if isinstance(k, str):
+        return k
+    return _int(k) if isinstance(k, int) and not isinstance(k, bool) else _JSON.encode(k)
+
+
+def _encode(obj: Any, out: List[str]) -> None:
+    """_JSON.encode(obj) into `out`, with ints written by decimal()."""
+    if isinstance(obj, str):
+        out.append(encode_basestring(obj))
+    elif isinstance(obj, int) and not isinstance(obj, bool):
+        out.append(_int(obj))
+    elif isinstance(obj, dict):
+        out.append("{")
+        for i, (k, v) in enumerate(obj.items()):
+            if i:
+                out.append(",")
+            out.append(encode_basestring(_key(k)))
+            out.append(":")
+            _encode(v, out)
+        out.append("}")
+    elif isinstance(obj, (list, tuple)):
+        out.append("[")
+        for i, v in enumerate(obj):
+            if i:
+                out.append(",")
+            _encode(v, out)
+        out.append("]")
+    else:  # None, bools, floats; anything else raises TypeError like json.dumps
+        out.append(_JSON.encode(obj))
+
+
+def columnar(trace: Mapping[str, Any], tables: Mapping[str, Tuple[str, ...]]) -> Dict[str, Any]:
+    """`trace` with each table (a list of objects, fields named in `tables`)
+    turned into one object of parallel arrays: [{"x": 1, "y": 2}, ...] ->
+    {"x": [1, ...], "y": [2, ...]}. Field names are written once instead of
+    once per row. Other keys are kept as they are; `trace` is not modified."""
+    out = dict(trace)
+    for name, fields in tables.items():
+        out[name] = _columns(trace[name], fields)
+    return out
+
+
+def _columns(rows: Sequence[Mapping[str, Any]], fields: Tuple[str, ...]) -> Dict[str, list]:
+    return {f: list(map(itemgetter(f), rows)) for f in fields}
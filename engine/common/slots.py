@@ -0,0 +1,102 @@
+"""Stage deltas on top of the renderers' (min_stage, fragment) streams.
+
+Every renderer yields its fragments in document order tagged with the
+first stage that shows them, so stage N+1 is stage N plus some fragments
+at fixed places in the document. Consecutive fragments with the same
+min_stage form a run, numbered by position in the stream (the same for
+every stage of one problem):
+
+  slotted SVG  the picture of `stage`, plus an empty <g data-slot="r"/>
+               where each later run r would go
+  delta SVG    the <svg> tag of `stage` and one <g data-slot="r">...</g>
+               per run revealed after `from_stage`, nothing else
+
+A renderer whose head (what its open tag is followed by) depends on the
+stage, like division's canvas-sized background, gets that head wrapped in
+<g data-slot="h">; a delta carries the head of `stage` in the same group
+when it differs from that of `from_stage`.
+
+A client holding a slotted SVG of stage F applies the delta F -> S by
+replacing each placeholder (and the head group) with the group of the
+same name and copying the root's size attributes. The result has the
+elements of stage S in the same order, some of them inside slot groups
+(which draw nothing themselves), and still has placeholders for the
+stages after S.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+Item = Tuple[int, str]
+
+
+def _runs(items: Iterable[Item]) -> Iterator[Tuple[int, int, List[str]]]:
+    # (run number, min_stage, fragments)
+    r, stage, frags = -1, None, []
+    for s, frag in items:
+        if s != stage:
+            if frags:
+                yield r, stage, frags
+            r, stage, frags = r + 1, s, []
+        frags.append(frag)
+    if frags:
+        yield r, stage, frags
+
+
+def _split_head(items: Iterable[Item], head: Optional[str]) -> Tuple[str, Iterator[Item]]:
+    # renderers whose <svg> tag does not depend on the stage emit it as
+    # their first (stage 0) fragment
+    it = iter(items)
+    if head is None:
+        _s, head = next(it)
+    return head, it
+
+
+def _root_and_head(head: str, sep: str) -> Tuple[str, str]:
+    # the <svg ...> tag alone, and whatever the renderer put after it
+    cut = head.index(">") + 1
+    rest = head[cut:]
+    return head[:cut], rest[len(sep):] if rest.startswith(sep) else rest
+
+
+def slotted_svg(items: Iterable[Item], stage: int, sep: str = "\n", head: Optional[str] = None) -> str:
+    """The SVG of `stage` with a placeholder for every run of a later stage.
+
+    `head` is the <svg> open tag for renderers that emit it separately
+    (division, whose size depends on the stage); otherwise the first item is.
+    Anything `head` has after the tag goes into the "h" slot group.
+    """
+    head, it = _split_head(items, head)
+    root, rest = _root_and_head(head, sep)
+    parts = [root]
+    if rest:
+        parts.append(f'<g data-slot="h">{rest}</g>')
+    for r, s, frags in _runs(it):
+        parts.append(sep.join(frags) if s <= stage else f'<g data-slot="{r}"/>')
+    return sep.join(parts)
+
+
+def delta_svg(
+    items: Iterable[Item],
+    from_stage: int,
+    stage: int,
+    sep: str = "\n",
+    head: Optional[str] = None,
+    from_head: Optional[str] = None,
+) -> str:
+    """The runs revealed by going from `from_stage` to `stage`, as slot groups
+    inside the <svg> tag of `stage` (see the module docstring). `from_head`
+    is the head of `from_stage` when `head` is given; the "h" group is sent
+    if the two differ."""
+    if from_stage >= stage:
+        raise ValueError("from_stage must be below stage.")
+    head, it = _split_head(items, head)
+    root, rest = _root_and_head(head, sep)
+    parts = [root]
+    if rest and rest != _root_and_head(from_head or head, sep)[1]:
+        parts.append(f'<g data-slot="h">{rest}</g>')
+    for r, s, frags in _runs(it):
+        if from_stage < s <= stage:
+            parts.append(f'<g data-slot="{r}">' + sep.join(frags) + "</g>")
+    parts.append("</svg>")
+    return sep.join(parts)
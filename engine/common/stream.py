@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator
+
+DEFAULT_CHUNK_SIZE = 16 * 1024
+
+
+def iter_chunks(fragments: Iterable[str], sep: str = "", chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Regroup SVG fragments into chunks of roughly `chunk_size` characters.
+
+    "".join(iter_chunks(frags, sep)) == sep.join(frags), but at most one
+    chunk is held in memory at a time, and a response writer is not asked to
+    flush once per <text> element.
+    """
+    buf = []
+    size = 0
+    first = True
+    for frag in fragments:
+        if first:
+            first = False
+        elif sep:
+            buf.append(sep)
+            size += len(sep)
+        buf.append(frag)
+        size += len(frag)
+        if size >= chunk_size:
+            yield "".join(buf)
+            buf = []
+            size = 0
+    if buf:
+        yield "".join(buf)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Pipeline phases, in the order they run:
+#   trace      the arithmetic (calculate_egel_huvaah, compute_egel_multiplication, ...)
+#   layout     digits -> grid cells / pixel positions / display list
+#   emit       display list -> SVG fragments (or JSON rows)
+#   serialize  joining fragments into the document
+#   compact    the compact=true post-pass (engine.common.compact)
+# The web app adds "compress" for Content-Encoding work.
+PHASES = ("trace", "layout", "emit", "serialize", "compact")
+
+# seconds; phases are often well under a millisecond
+PHASE_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+
+
+class PhaseTimer:
+    """Collects exclusive wall time per phase while active (`with PhaseTimer() as t:`).
+
+    Phases may nest (a layout that computes its own trace); the outer phase
+    is charged only for the time not spent in inner ones, so the values add
+    up to the instrumented part of the call.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+        self._stack: List[List[Any]] = []  # [name, start, time spent in children]
+        self._token = None
+
+    def __enter__(self) -> "PhaseTimer":
+        self._token = _active.set(self)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        _active.reset(self._token)
+
+    def _push(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _pop(self) -> None:
+        name, start, children = self._stack.pop()
+        total = time.perf_counter() - start
+        self.seconds[name] = self.seconds.get(name, 0.0) + total - children
+        if self._stack:
+            self._stack[-1][2] += total
+
+
+_active: ContextVar[Optional[PhaseTimer]] = ContextVar("egel_phase_timer", default=None)
+
+
+class _Phase:
+    __slots__ = ("name", "timer")
+
+    def __init__(self, name: str, timer: PhaseTimer) -> None:
+        self.name = name
+        self.timer = timer
+
+    def __enter__(self) -> None:
+        self.timer._push(self.name)
+
+    def __exit__(self, *exc: Any) -> None:
+        self.timer._pop()
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(name: str) -> Any:
+    """`with phase("emit"): ...` charges the block to `name` on the active
+    PhaseTimer; without one (the default) it costs a ContextVar lookup."""
+    timer = _active.get()
+    return _NO_PHASE if timer is None else _Phase(name, timer)
+
+
+def timed_phase(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of phase(): every call of the function is charged to `name`."""
+
+    def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            timer = _active.get()
+            if timer is None:
+                return fn(*args, **kwargs)
+            timer._push(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                timer._pop()
+
+        return wrapper
+
+    return decorate
+
+
+class Instrumented:
+    """`fn` run under a fresh PhaseTimer, optionally also under cProfile.
+
+    Calling it returns (fn's result, {phase: seconds}). Instances are
+    picklable when `fn` is a module-level function, so they can be handed
+    to a process pool; the timer and the profile both live in the worker.
+    `__name__` is fn's, so pool metrics keep their task labels.
+
+    whole:        charge the entire call to this phase (for functions
+                  without phase() hooks of their own, e.g. compress)
+    profile_path: dump cProfile stats of the call here (pstats format).
+                  Skipped if another profiler is already running in the
+                  worker; a failed dump is logged, not raised.
+    """
+
+    def __init__(self, fn: Callable[..., Any], whole: Optional[str] = None, profile_path: Optional[str] = None) -> None:
+        self.fn = fn
+        self.whole = whole
+        self.profile_path = profile_path
+        self.__name__ = getattr(fn, "__name__", "task")
+
+    def __call__(self, *args: Any) -> Tuple[Any, Dict[str, float]]:
+        prof = None
+        if self.profile_path:
+            prof = cProfile.Profile()
+            try:
+                prof.enable()
+            except ValueError:  # another profiler is active (e.g. a concurrent sampled request)
+                prof = None
+        try:
+            with PhaseTimer() as timer:
+                if self.whole:
+                    with phase(self.whole):
+                        result = self.fn(*args)
+                else:
+                    result = self.fn(*args)
+        finally:
+            if prof is not None:
+                prof.disable()
+                try:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.profile_path)), exist_ok=True)
+                    prof.dump_stats(self.profile_path)
+                except OSError as e:  # a failed dump must not fail the request
+                    logging.getLogger(__name__).warning("cProfile dump to %s failed: %s", self.profile_path, e)
+        return result, timer.seconds
+
+
+def server_timing(seconds: Dict[str, float]) -> str:
+    """Server-Timing header value (durations in milliseconds)."""
+    return ", ".join(f"{name};dur={1000 * s:.3f}" for name, s in seconds.items())
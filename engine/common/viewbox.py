@@ -0,0 +1,97 @@
+"""Unit-independent SVGs: one drawing, any display size.
+
+Every renderer multiplies its layout by `unit`, so each zoom level used to
+be a different document (and cache entry) with every coordinate formatted
+again. In viewbox mode the drawing is always laid out at LAYOUT_UNIT and
+then written in integer user units, SCALE of them per pixel of that layout
+(hundredths: the precision the renderers round to). Only the root's
+width/height follow the requested unit; the viewBox keeps the integer
+coordinate system, so the browser scales the picture:
+
+  <svg ... width='W*u/(L*S)' height='H*u/(L*S)' viewBox='0 0 W H'>
+
+The body after the root tag is the same for every unit, and no coordinate
+in it is a float.
+"""
+from __future__ import annotations
+
+import re
+from typing import Iterable, Iterator
+
+from engine.common.display import DisplayList, Grid, Rect, Rule, Text
+from engine.common.grid import fmt_num
+
+# the unit viewbox renders are laid out at: the default unit, so the drawing
+# is the one the default page shows
+LAYOUT_UNIT = 56
+# user units per pixel of the layout
+SCALE = 100
+
+_SIZE_RE = re.compile(r"""(\s)(width|height)=(["'])[^"']*\3""")
+_VIEWBOX_RE = re.compile(r"""viewBox=(["'])([^"']*)\1""")
+
+
+def _i(v: float) -> int:
+    return round(v * SCALE)
+
+
+def _text(t: Text) -> Text:
+    return t._replace(x=_i(t.x), y=_i(t.y), size=_i(t.size))
+
+
+def _rule(r: Rule) -> Rule:
+    return r._replace(x1=_i(r.x1), y1=_i(r.y1), x2=_i(r.x2), y2=_i(r.y2), width=_i(r.width))
+
+
+def _rect(r: Rect) -> Rect:
+    return r._replace(x=_i(r.x), y=_i(r.y), w=_i(r.w), h=_i(r.h), width=_i(r.width), rx=_i(r.rx), ry=_i(r.ry))
+
+
+def _grid(g: Grid) -> Grid:
+    return g._replace(x0=_i(g.x0), y0=_i(g.y0), step=_i(g.step), width=_i(g.width), border_width=_i(g.border_width))
+
+
+_SCALED = {Text: _text, Rule: _rule, Rect: _rect, Grid: _grid}
+
+
+def integer_units(dl: DisplayList) -> DisplayList:
+    """`dl` (laid out at LAYOUT_UNIT) with every length, stroke widths and
+    font sizes included, in integer user units. Write it with an
+    `integer=True` backend."""
+    scaled = _SCALED
+    return DisplayList(
+        tuple((s, scaled[type(prim)](prim)) for s, prim in dl.items),
+        tuple((s, _i(w), _i(h)) for s, w, h in dl.sizes),
+    )
+
+
+def resize_root(svg: str, unit: int) -> str:
+    """`svg` (written in integer user units) with the root's width/height
+    set for `unit`; nothing else changes, and resizing again is harmless."""
+    end = svg.index(">") + 1
+    root = svg[:end]
+    m = _VIEWBOX_RE.search(root)
+    if m is None:
+        raise ValueError("SVG root has no viewBox to scale.")
+    _x, _y, w, h = (float(v) for v in m.group(2).replace(",", " ").split())
+    k = unit / (LAYOUT_UNIT * SCALE)
+    size = {"width": fmt_num(w * k), "height": fmt_num(h * k)}
+    root = _SIZE_RE.sub(lambda t: f"{t.group(1)}{t.group(2)}={t.group(3)}{size[t.group(2)]}{t.group(3)}", root, count=2)
+    return root + svg[end:]
+
+
+def iter_resize_root(chunks: Iterable[str], unit: int) -> Iterator[str]:
+    """resize_root over a chunked SVG: the root tag may span chunks, so they
+    are held back only until it is complete."""
+    it = iter(chunks)
+    head = ""
+    for chunk in it:
+        head += chunk
+        if ">" in head:
+            yield resize_root(head, unit)
+            break
+    else:
+        if head:
+            yield head
+        return
+    yield from it
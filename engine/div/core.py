@@ -1,8 +1,13 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Iterator
 import math
 
+from engine.common.digits import Operand, decimal, digit_bytes, digits_text, operand
+from engine.common.display import DisplayList, Grid, Item, Rect, Rule, SvgBackend, Text, TikzSvg
+from engine.common.timing import timed_phase
+from engine.common.viewbox import SCALE
+
 TIKZ_TO_HEX = {
     "red": "#cc0000",
     "blue": "#005bbb",
@@ -20,6 +25,9 @@ TIKZ_TO_HEX = {
 
 STEP_COLORS = ["red", "blue", "teal", "orange", "purple"]
 
+# list-of-object fields of a trace and their keys (engine.common.serialize.columnar)
+TRACE_TABLES = {"steps": ("rem_before", "sub", "factor", "msg"), "sub_vals": ("k", "val")}
+
 
 def css_color(token: str) -> str:
     token = (token or "").strip()
@@ -33,77 +41,97 @@ def css_color(token: str) -> str:
 # =========================
 # Algorithm (matches TeX Lua)
 # =========================
-def calculate_egel_huvaah(dividend: int, divisor: int) -> dict[str, Any]:
-    """Python port of calculate_egel_huvaah() from EGEL HUVAAH 4_0 OK.tex."""
+@timed_phase("trace")
+def calculate_egel_huvaah(dividend: Operand, divisor: Operand) -> dict[str, Any]:
+    """Python port of calculate_egel_huvaah() from EGEL HUVAAH 4_0 OK.tex.
+
+    Each step reads the shortest prefix of the remainder that is >= divisor,
+    subtracts 5/2/1 x divisor x 10^p from it and records the chunk. The
+    remainder is kept as a digit array and only the prefix digits touched by
+    the step are rewritten, so a step costs O(len(divisor)) digit work instead
+    of re-stringifying and re-parsing the whole remainder.
+    """
+    dividend, divisor = operand(dividend), operand(divisor)
     if divisor <= 0:
         raise ValueError("divisor must be positive")
     if dividend < 0:
         raise ValueError("dividend must be non-negative")
 
     steps: list[dict[str, Any]] = []
-    remainder = int(dividend)
     q_list: list[int] = []
-    div_str = str(int(divisor))
+    div_str = decimal(divisor)
 
     # helper "hürd"
     sub_vals = [
-        {"k": 1, "val": int(divisor)},
-        {"k": 2, "val": int(divisor) * 2},
-        {"k": 5, "val": int(divisor) * 5},
+        {"k": 1, "val": divisor},
+        {"k": 2, "val": divisor * 2},
+        {"k": 5, "val": divisor * 5},
     ]
 
-    while remainder >= divisor:
-        r_val = int(remainder)
-        r_str = str(r_val)
-
-        factor = 0
-        multiplier = 1
-        p10 = 0
-        read_digits = ""
-
-        # find earliest prefix >= divisor, set multiplier=10^p10
-        for i in range(1, len(r_str) + 1):
-            read_digits = r_str[:i]
-            if int(read_digits) >= divisor:
-                p10 = len(r_str) - i
-                multiplier = 10 ** p10
-                break
-
-        # choose 5/2/1
-        if remainder >= divisor * 5 * multiplier:
+    digits = bytearray(digit_bytes(dividend))  # most significant first
+    n = len(digits)
+    lead = 0  # index of the remainder's first non-zero digit
+    while lead < n and digits[lead] == 0:
+        lead += 1
+
+    remainder = dividend
+    pow10: dict[int, int] = {}
+
+    while True:
+        # shortest prefix >= divisor; it is always < 10 * divisor
+        prefix = 0
+        end = lead
+        while end < n and prefix < divisor:
+            prefix = prefix * 10 + digits[end]
+            end += 1
+        if prefix < divisor:
+            break  # the whole remainder is < divisor
+
+        p10 = n - end
+        read_digits = digits_text(digits[lead:end])
+
+        # choose 5/2/1: remainder >= divisor*k*10^p10  <=>  prefix >= divisor*k
+        if prefix >= divisor * 5:
             factor = 5
-        elif remainder >= divisor * 2 * multiplier:
+        elif prefix >= divisor * 2:
             factor = 2
         else:
             factor = 1
 
-        subtract_val = int((divisor * factor) * multiplier)
-        current_q = int(factor * multiplier)
+        # write prefix - factor*divisor back into digits[lead:end]
+        rest = prefix - divisor * factor
+        for k in range(end - 1, lead - 1, -1):
+            digits[k] = rest % 10
+            rest //= 10
+        while lead < n and digits[lead] == 0:
+            lead += 1
+
+        multiplier = pow10.get(p10)
+        if multiplier is None:
+            multiplier = pow10[p10] = 10 ** p10
+        subtract_val = divisor * factor * multiplier
+        current_q = factor * multiplier
 
         msg = f"Уншсан тоо {read_digits}-д {div_str} нь {factor} удаа багтана. "
         if p10 > 0:
-            msg += f"{p10} тэгээр орон гүйцээж {current_q} болов."
+            msg += f"{p10} тэгээр орон гүйцээж {factor}{'0' * p10} болов."
 
         steps.append(
             {
-                "rem_before": r_val,
+                "rem_before": remainder,
                 "sub": subtract_val,
                 "factor": current_q,  # this is the step quotient chunk (factor*10^p10)
                 "msg": msg,
             }
         )
-        remainder = remainder - subtract_val
+        remainder -= subtract_val
         q_list.append(current_q)
 
-        # safety: avoid infinite loop if something goes wrong
-        if len(steps) > 200:
-            break
-
-    total_q = int(sum(q_list))
-    final_rem = int(remainder)
+    # the steps are an exact long division, so the chunks sum to the quotient
+    total_q, final_rem = divmod(dividend, divisor)
     return {
-        "dividend": int(dividend),
-        "divisor": int(divisor),
+        "dividend": dividend,
+        "divisor": divisor,
         "steps": steps,
         "q_list": q_list,
         "total_q": total_q,
@@ -113,63 +141,45 @@ def calculate_egel_huvaah(dividend: int, divisor: int) -> dict[str, Any]:
 
 
 # =========================
-# SVG primitives
+# Display-list primitives (defaults of the TeX drawing)
 # =========================
-def svg_text(x, y, s, size=22, weight="700", fill="#000", anchor="middle", family="Times New Roman, serif"):
-    s = str(s).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-    return (
-        f'<text x="{x:.2f}" y="{y:.2f}" font-size="{size}" font-family="{family}" '
-        f'font-weight="{weight}" text-anchor="{anchor}" fill="{fill}">{s}</text>'
-    )
+_SERIF = "Times New Roman, serif"
 
 
-def svg_line(x1, y1, x2, y2, stroke="#000", width=2, opacity=1.0):
-    return (
-        f'<line x1="{x1:.2f}" y1="{y1:.2f}" x2="{x2:.2f}" y2="{y2:.2f}" '
-        f'stroke="{stroke}" stroke-width="{width}" opacity="{opacity}"/>'
-    )
+def _text(x, y, s, size=22, weight="700", fill="#000", anchor="middle", family=_SERIF) -> Text:
+    return Text(x, y, str(s), size, fill=fill, weight=weight, anchor=anchor, family=family)
 
 
-def svg_rect(x, y, w, h, fill="none", stroke="none", width=1, opacity=1.0, rx=0.0, ry=0.0):
-    return (
-        f'<rect x="{x:.2f}" y="{y:.2f}" width="{w:.2f}" height="{h:.2f}" fill="{fill}" '
-        f'stroke="{stroke}" stroke-width="{width}" opacity="{opacity}" rx="{rx:.2f}" ry="{ry:.2f}"/>'
-    )
+def _line(x1, y1, x2, y2, stroke="#000", width=2, opacity=1.0) -> Rule:
+    return Rule(x1, y1, x2, y2, stroke=stroke, width=width, opacity=opacity)
 
 
-def svg_grid(x0, y0, cols, rows, unit, stroke="#35b7c8", width=1, opacity=0.22):
-    parts = []
-    for c in range(cols + 1):
-        x = x0 + c * unit
-        parts.append(svg_line(x, y0, x, y0 + rows * unit, stroke=stroke, width=width, opacity=opacity))
-    for r in range(rows + 1):
-        y = y0 + r * unit
-        parts.append(svg_line(x0, y, x0 + cols * unit, y, stroke=stroke, width=width, opacity=opacity))
-    return "\n".join(parts)
+def _rect(x, y, w, h, fill="none", stroke="none", width=1, opacity=1.0, rx=0.0, ry=0.0) -> Rect:
+    return Rect(x, y, w, h, fill=fill, stroke=stroke, width=width, opacity=opacity, rx=rx, ry=ry)
+
+
+class _DivSvg(TikzSvg):
+    def open(self, width: float, height: float) -> str:
+        # the (invisible) background sits with the root tag: both follow the
+        # height of the stage. Integer backends get it in integer units too
+        # (engine/common/viewbox.py).
+        stroke = SCALE if self.integer else 1
+        background = _rect(0, 0, width, height, fill="white", width=stroke, opacity=0.0, rx=0, ry=0)
+        return super().open(width, height) + "\n" + self.rect(background)
 
 
 # =========================
 # Renderer (grid layout inspired by TeX)
 # =========================
-def render_division_svg(
-    dividend: int,
-    divisor: int,
-    unit: int = 56,
-    stage: int = 3,
-    show_grid: bool = True,
-    color_mode: int = 1,
-    align_mode: str = "right",  # left|right for step quotient chunks on right side
-    sub_pos: str = "top",      # top|side|none
-    black: bool = False,
-    show_remainder: bool = True,
-):
+@timed_phase("layout")
+def _division_layout(dividend: Operand, divisor: Operand, unit: int, sub_pos: str) -> dict[str, Any]:
     data = calculate_egel_huvaah(dividend, divisor)
     steps = data["steps"]
 
-    s_dividend = str(int(dividend))
-    s_divisor = str(int(divisor))
-    s_total_q = str(int(data["total_q"]))
-    s_final_rem = str(int(data["final_rem"]))
+    s_dividend = decimal(data["dividend"])
+    s_divisor = decimal(data["divisor"])
+    s_total_q = decimal(data["total_q"])
+    s_final_rem = decimal(data["final_rem"])
 
     max_digits = len(s_dividend)
     right_side_width = max(len(s_divisor), len(s_total_q))
@@ -180,6 +190,38 @@ def render_division_svg(
     pad_x = int(unit * 1.2)
     pad_y = int(unit * 1.4)
 
+    width = int(pad_x * 2 + cols * unit + (unit * 5 if sub_pos == "side" else 0))
+    height = int(pad_y * 2 + rows * unit)
+    # the remainder badge (stage 3) needs extra room below the grid
+    height_badge = int(pad_y * 2 + rows * unit + unit * 2.2)
+
+    return {
+        "data": data, "steps": steps,
+        "s_dividend": s_dividend, "s_divisor": s_divisor,
+        "s_total_q": s_total_q, "s_final_rem": s_final_rem,
+        "max_digits": max_digits, "right_side_width": right_side_width,
+        "cols": cols, "rows": rows, "unit": unit, "pad_x": pad_x, "pad_y": pad_y,
+        "width": width, "height": height, "height_badge": height_badge,
+    }
+
+
+def _division_elements(
+    L: dict[str, Any],
+    show_grid: bool = True,
+    color_mode: int = 1,
+    align_mode: str = "right",
+    sub_pos: str = "top",
+    black: bool = False,
+    show_remainder: bool = True,
+) -> Iterator[Item]:
+    """Yield (min_stage, primitive) for everything after the <svg> open tag."""
+    data, steps = L["data"], L["steps"]
+    s_dividend, s_divisor = L["s_dividend"], L["s_divisor"]
+    s_total_q, s_final_rem = L["s_total_q"], L["s_final_rem"]
+    max_digits, right_side_width = L["max_digits"], L["right_side_width"]
+    cols, rows, unit = L["cols"], L["rows"], L["unit"]
+    pad_x, pad_y = L["pad_x"], L["pad_y"]
+
     def X(col: float) -> float:
         return pad_x + col * unit
 
@@ -190,126 +232,173 @@ def render_division_svg(
         """Right-align x inside a grid cell with a small inner padding."""
         return X(col) + unit * pad
 
-    width = int(pad_x * 2 + cols * unit + (unit * 5 if sub_pos == "side" else 0))
-    height = int(pad_y * 2 + rows * unit + (unit * 2.2 if (stage >= 3 and show_remainder) else 0))
-
     ink = "#000" if black else "#111827"
     grid_stroke = "#000000" if black else "#35b7c8"
     main_line = css_color("black" if black else "green!50!black")
 
-    parts = []
-    parts.append(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">')
-    parts.append(svg_rect(0, 0, width, height, fill="white", opacity=0.0))
-
     # subtle rounded "paper"
-    parts.append(svg_rect(pad_x * 0.55, pad_y * 0.55, cols * unit + pad_x * 0.9, rows * unit + pad_y * 0.6,
-                          fill="#ffffff", stroke="#e5e7eb" if not black else "#111111", width=1, opacity=1.0, rx=18, ry=18))
+    yield 0, _rect(pad_x * 0.55, pad_y * 0.55, cols * unit + pad_x * 0.9, rows * unit + pad_y * 0.6,
+                      fill="#ffffff", stroke="#e5e7eb" if not black else "#111111", width=1, opacity=1.0, rx=18, ry=18)
 
     # helper hürd (top)
-    if stage >= 1 and sub_pos == "top":
+    if sub_pos == "top":
         box_w = cols * unit
         box_h = unit * 0.72
         bx = X(0) - unit * 0.0
         by = Y(-1.05)
-        parts.append(svg_rect(bx, by, box_w, box_h,
-                              fill="#ffffff", stroke=main_line, width=2, opacity=1.0, rx=12, ry=12))
-        txt = f"Туслах хүрд: {s_divisor}×1={data['sub_vals'][0]['val']}, {s_divisor}×2={data['sub_vals'][1]['val']}, {s_divisor}×5={data['sub_vals'][2]['val']}"
-        parts.append(svg_text(bx + 10, by + box_h * 0.62, txt, size=int(unit * 0.26), weight="800", fill=ink, anchor="start",
-                              family="ui-sans-serif, system-ui, Segoe UI, Roboto, Arial, sans-serif"))
+        yield 1, _rect(bx, by, box_w, box_h,
+                          fill="#ffffff", stroke=main_line, width=2, opacity=1.0, rx=12, ry=12)
+        txt = f"Туслах хүрд: {s_divisor}×1={decimal(data['sub_vals'][0]['val'])}, {s_divisor}×2={decimal(data['sub_vals'][1]['val'])}, {s_divisor}×5={decimal(data['sub_vals'][2]['val'])}"
+        yield 1, _text(bx + 10, by + box_h * 0.62, txt, size=int(unit * 0.26), weight="800", fill=ink, anchor="start",
+                          family="ui-sans-serif, system-ui, Segoe UI, Roboto, Arial, sans-serif")
 
     # grid
     if show_grid:
-        parts.append(svg_grid(X(0), Y(0), cols, rows, unit, stroke=grid_stroke, width=1, opacity=0.22 if not black else 0.28))
+        yield 0, Grid(X(0), Y(0), cols, rows, unit, stroke=grid_stroke, width=1, opacity=0.22 if not black else 0.28)
 
     # main vertical line
-    parts.append(svg_line(X(max_digits), Y(0), X(max_digits), Y(rows), stroke=main_line, width=3, opacity=1.0))
+    yield 0, _line(X(max_digits), Y(0), X(max_digits), Y(rows), stroke=main_line, width=3, opacity=1.0)
 
     # header line under divisor
-    parts.append(svg_line(X(max_digits), Y(1), X(cols), Y(1), stroke=main_line, width=3, opacity=1.0))
+    yield 0, _line(X(max_digits), Y(1), X(cols), Y(1), stroke=main_line, width=3, opacity=1.0)
 
-    # header numbers
-    if stage >= 1:
-        # dividend digits (right-aligned within left area)
-        for i, ch in enumerate(s_dividend):
-            col = max_digits - (len(s_dividend) - i)
-            parts.append(svg_text(X(col) + unit * 0.5, Y(0) + unit * 0.72, ch, size=int(unit * 0.44), weight="800", fill=ink))
+    # header numbers (stage 1)
+    # dividend digits (right-aligned within left area)
+    for i, ch in enumerate(s_dividend):
+        col = max_digits - (len(s_dividend) - i)
+        yield 1, _text(X(col) + unit * 0.5, Y(0) + unit * 0.72, ch, size=int(unit * 0.44), weight="800", fill=ink)
 
-        # divisor digits (left area of right side)
-        for i, ch in enumerate(s_divisor):
-            col = max_digits + 1 + i
-            parts.append(svg_text(X(col) + unit * 0.5, Y(0) + unit * 0.72, ch, size=int(unit * 0.44), weight="800", fill=ink))
+    # divisor digits (left area of right side)
+    for i, ch in enumerate(s_divisor):
+        col = max_digits + 1 + i
+        yield 1, _text(X(col) + unit * 0.5, Y(0) + unit * 0.72, ch, size=int(unit * 0.44), weight="800", fill=ink)
 
     # side helper box
-    if stage >= 1 and sub_pos == "side":
+    if sub_pos == "side":
         bx = X(cols) + unit * 0.45
         by = Y(0)
         bw = unit * 3.4
         bh = unit * 2.6
-        parts.append(svg_rect(bx, by, bw, bh, fill="#ffffff", stroke="#111827" if black else main_line, width=2, rx=16, ry=16))
-        parts.append(svg_text(bx + bw * 0.5, by + unit * 0.6, "Туслах", size=int(unit * 0.34), weight="900", fill=ink,
-                              family="ui-sans-serif, system-ui, Segoe UI, Roboto, Arial, sans-serif"))
+        yield 1, _rect(bx, by, bw, bh, fill="#ffffff", stroke="#111827" if black else main_line, width=2, rx=16, ry=16)
+        yield 1, _text(bx + bw * 0.5, by + unit * 0.6, "Туслах", size=int(unit * 0.34), weight="900", fill=ink,
+                          family="ui-sans-serif, system-ui, Segoe UI, Roboto, Arial, sans-serif")
         for r, item in enumerate(data["sub_vals"]):
-            parts.append(svg_text(bx + unit * 0.28, by + unit * (1.15 + r * 0.55),
-                                  f"{s_divisor}×{item['k']}={item['val']}",
-                                  size=int(unit * 0.28), weight="800", fill=ink, anchor="start",
-                                  family="ui-sans-serif, system-ui, Segoe UI, Roboto, Arial, sans-serif"))
-
-    # steps (subtract rows + remainder rows)
-    if stage >= 2:
-        for idx, st in enumerate(steps):
-            color = ink if (black or color_mode == 0) else css_color(STEP_COLORS[idx % len(STEP_COLORS)])
-
-            # subtract row
-            sub_row = 1 + 2 * idx
-            # minus sign outside grid (like TeX x=-0.4)
-            parts.append(svg_text(X(-0.7) + unit * 0.5, Y(sub_row) + unit * 0.72, "−", size=int(unit * 0.52), weight="900", fill=color))
-
-            s_sub = str(int(st["sub"]))
-            for j, ch in enumerate(s_sub):
-                col = max_digits - (len(s_sub) - j)
-                parts.append(svg_text(X(col) + unit * 0.5, Y(sub_row) + unit * 0.72, ch, size=int(unit * 0.44), weight="800", fill=color))
-
-            # step quotient chunk on right side
-            q_s = str(int(st["factor"]))
-            for j, ch in enumerate(q_s):
-                if align_mode == "left":
-                    col = max_digits + 1 + j
-                else:
-                    col = max_digits + 1 + right_side_width - (len(q_s) - j)
-                parts.append(svg_text(XR(col), Y(sub_row) + unit * 0.72, ch, size=int(unit * 0.44), weight="800", fill=color, anchor="end"))
-
-            # line under subtract row across left side
-            line_y = Y(sub_row + 1)
-            parts.append(svg_line(X(0), line_y, X(max_digits), line_y, stroke="#111827" if black else "#111827", width=2, opacity=0.95))
-
-            # remainder row
-            rem_val = int(st["rem_before"]) - int(st["sub"])
-            s_rem = str(rem_val)
-            rem_row = sub_row + 1
-            for j, ch in enumerate(s_rem):
-                col = max_digits - (len(s_rem) - j)
-                parts.append(svg_text(X(col) + unit * 0.5, Y(rem_row) + unit * 0.72, ch, size=int(unit * 0.44), weight="800", fill=ink))
-
-    # footer: total quotient
-    if stage >= 3:
-        footer_y = 1 + 2 * len(steps) + 1
-        parts.append(svg_line(X(max_digits), Y(footer_y), X(cols), Y(footer_y), stroke=main_line, width=3, opacity=1.0))
-
-        for j, ch in enumerate(s_total_q):
-            col = max_digits + 1 + right_side_width - (len(s_total_q) - j)
-            parts.append(svg_text(XR(col), Y(footer_y) + unit * 0.72, ch, size=int(unit * 0.46), weight="900", fill=ink, anchor="end"))
-
-        # remainder badge
-        if show_remainder:
-            rx = X(0)
-            ry = Y(rows) + unit * 0.35
-            parts.append(svg_rect(rx, ry, unit * 4.8, unit * 0.86, fill="#ffffff", stroke=main_line, width=2, rx=14, ry=14))
-            parts.append(svg_text(rx + unit * 0.28, ry + unit * 0.58, f"Үлдэгдэл: {s_final_rem}", size=int(unit * 0.30),
-                                  weight="900", fill=ink, anchor="start",
-                                  family="ui-sans-serif, system-ui, Segoe UI, Roboto, Arial, sans-serif"))
-
-    parts.append("</svg>")
-    return "\n".join(parts), data
+            yield 1, _text(bx + unit * 0.28, by + unit * (1.15 + r * 0.55),
+                              f"{s_divisor}×{item['k']}={decimal(item['val'])}",
+                              size=int(unit * 0.28), weight="800", fill=ink, anchor="start",
+                              family="ui-sans-serif, system-ui, Segoe UI, Roboto, Arial, sans-serif")
+
+    # steps (subtract rows + remainder rows), stage 2
+    for idx, st in enumerate(steps):
+        color = ink if (black or color_mode == 0) else css_color(STEP_COLORS[idx % len(STEP_COLORS)])
+
+        # subtract row
+        sub_row = 1 + 2 * idx
+        # minus sign outside grid (like TeX x=-0.4)
+        yield 2, _text(X(-0.7) + unit * 0.5, Y(sub_row) + unit * 0.72, "−", size=int(unit * 0.52), weight="900", fill=color)
+
+        s_sub = decimal(st["sub"])
+        for j, ch in enumerate(s_sub):
+            col = max_digits - (len(s_sub) - j)
+            yield 2, _text(X(col) + unit * 0.5, Y(sub_row) + unit * 0.72, ch, size=int(unit * 0.44), weight="800", fill=color)
+
+        # step quotient chunk on right side
+        q_s = decimal(st["factor"])
+        for j, ch in enumerate(q_s):
+            if align_mode == "left":
+                col = max_digits + 1 + j
+            else:
+                col = max_digits + 1 + right_side_width - (len(q_s) - j)
+            yield 2, _text(XR(col), Y(sub_row) + unit * 0.72, ch, size=int(unit * 0.44), weight="800", fill=color, anchor="end")
+
+        # line under subtract row across left side
+        line_y = Y(sub_row + 1)
+        yield 2, _line(X(0), line_y, X(max_digits), line_y, stroke="#111827" if black else "#111827", width=2, opacity=0.95)
+
+        # remainder row
+        rem_val = int(st["rem_before"]) - int(st["sub"])
+        s_rem = decimal(rem_val)
+        rem_row = sub_row + 1
+        for j, ch in enumerate(s_rem):
+            col = max_digits - (len(s_rem) - j)
+            yield 2, _text(X(col) + unit * 0.5, Y(rem_row) + unit * 0.72, ch, size=int(unit * 0.44), weight="800", fill=ink)
+
+    # footer: total quotient, stage 3
+    footer_y = 1 + 2 * len(steps) + 1
+    yield 3, _line(X(max_digits), Y(footer_y), X(cols), Y(footer_y), stroke=main_line, width=3, opacity=1.0)
+
+    for j, ch in enumerate(s_total_q):
+        col = max_digits + 1 + right_side_width - (len(s_total_q) - j)
+        yield 3, _text(XR(col), Y(footer_y) + unit * 0.72, ch, size=int(unit * 0.46), weight="900", fill=ink, anchor="end")
+
+    # remainder badge
+    if show_remainder:
+        rx = X(0)
+        ry = Y(rows) + unit * 0.35
+        yield 3, _rect(rx, ry, unit * 4.8, unit * 0.86, fill="#ffffff", stroke=main_line, width=2, rx=14, ry=14)
+        yield 3, _text(rx + unit * 0.28, ry + unit * 0.58, f"Үлдэгдэл: {s_final_rem}", size=int(unit * 0.30),
+                          weight="900", fill=ink, anchor="start",
+                          family="ui-sans-serif, system-ui, Segoe UI, Roboto, Arial, sans-serif")
+
+@timed_phase("layout")
+def _division_display(
+    L: dict[str, Any],
+    show_grid: bool = True,
+    color_mode: int = 1,
+    align_mode: str = "right",
+    sub_pos: str = "top",
+    black: bool = False,
+    show_remainder: bool = True,
+) -> DisplayList:
+    """_division_elements as a display list; the canvas grows by the
+    remainder badge at stage 3."""
+    items = tuple(_division_elements(L, show_grid=show_grid, color_mode=color_mode, align_mode=align_mode,
+                                     sub_pos=sub_pos, black=black, show_remainder=show_remainder))
+    sizes = [(0, L["width"], L["height"])]
+    if show_remainder:
+        sizes.append((3, L["width"], L["height_badge"]))
+    return DisplayList(items, tuple(sizes))
+
+
+def division_display_list(
+    dividend: Operand,
+    divisor: Operand,
+    unit: int = 56,
+    show_grid: bool = True,
+    color_mode: int = 1,
+    align_mode: str = "right",
+    sub_pos: str = "top",
+    black: bool = False,
+    show_remainder: bool = True,
+) -> DisplayList:
+    """The drawing behind render_division_svg (all stages), for any backend."""
+    L = _division_layout(dividend, divisor, unit, sub_pos)
+    return _division_display(L, show_grid=show_grid, color_mode=color_mode, align_mode=align_mode,
+                             sub_pos=sub_pos, black=black, show_remainder=show_remainder)
+
+
+def division_svg_backend(grid_mode: str = "lines", integer: bool = False) -> SvgBackend:
+    """The SVG writer for division display lists."""
+    return _DivSvg(grid_mode, integer)
+
+
+def render_division_svg(
+    dividend: Operand,
+    divisor: Operand,
+    unit: int = 56,
+    stage: int = 3,
+    show_grid: bool = True,
+    color_mode: int = 1,
+    align_mode: str = "right",  # left|right for step quotient chunks on right side
+    sub_pos: str = "top",      # top|side|none
+    black: bool = False,
+    show_remainder: bool = True,
+    grid_mode: str = "lines",
+):
+    L = _division_layout(dividend, divisor, unit, sub_pos)
+    dl = _division_display(L, show_grid=show_grid, color_mode=color_mode, align_mode=align_mode,
+                             sub_pos=sub_pos, black=black, show_remainder=show_remainder)
+    return _DivSvg(grid_mode).render(dl, stage), L["data"]
 
 
 # =========================
@@ -1,7 +1,139 @@
 from __future__ import annotations
-from typing import Dict, Any
+from operator import itemgetter
+from typing import Dict, Any, List
 
-def compute_egel_multiplication(a: int, b: int) -> Dict[str, Any]:
+from engine.common.cache import LRUCache
+from engine.common.digits import Operand, operand, units_first
+from engine.common.timing import timed_phase
+
+# (tens, ones) of every single-digit product
+_PRODUCTS = [[divmod(x * y, 10) for y in range(10)] for x in range(10)]
+_TENS = itemgetter("t")
+_ONES = itemgetter("u")
+
+# list-of-object fields of a trace and their keys (engine.common.serialize.columnar)
+TRACE_TABLES = {
+    "blocks": ("i", "j", "x", "y", "t", "u"),
+    "columns": ("x", "place", "carry_in", "rows", "digits", "result_digit", "carry_out"),
+    "underlines": ("x", "y", "count"),
+    "carries": ("x", "value", "src"),
+}
+
+
+@timed_phase("trace")
+def compute_egel_multiplication(a: Operand, b: Operand) -> Dict[str, Any]:
+    """'Эгэл үржих' trace on the grid of the Lua-match layout (engine.mul.render).
+
+    Grid coordinates (x to the right, y down):
+      a_digits[i] (units first)         at (-2-i, i)
+      b_digits[j] (most significant first) at (2+j, j)
+      block (i, j) = a_digits[i] * b_digits[j] in row y = 2+i+j:
+        tens digit t at x = j-i, ones digit u at x+1
+    The blocks are then added column by column, right (x = len(b_digits),
+    the units) to left, top to bottom, Egel style: whenever the running
+    sum reaches ten the cell that did it is underlined (`count` tens at once
+    when a large carry-in is involved) and the tens go to the next column.
+
+    Returns a JSON-ready dict:
+      op, a, b, result
+      a_digits, b_digits
+      blocks      [{i, j, x, y, t, u}] (i outer, j inner)
+      columns     [{x, place, carry_in, rows, digits, result_digit, carry_out}]
+                  right to left; rows/digits are the column's cells top to bottom
+      underlines  [{x, y, count}] grouped by row, rows in order of first mark
+      carries     [{x, value, src}] tens of column `src` written above column x
+      product     the result's digits as they appear in the answer row
+    """
+    a, b = operand(a), operand(b)
     if a < 0 or b < 0:
         raise ValueError("A and B must be non-negative integers.")
-    return {"op":"mul","a":int(a),"b":int(b),"result":int(a)*int(b)}
+    A = units_first(a)
+    B = units_first(b)
+    m, n = len(A), len(B)
+    Bms = B[::-1]
+
+    blocks = []
+    for i in range(m):
+        row = _PRODUCTS[A[i]]
+        for j in range(n):
+            t, u = row[Bms[j]]
+            blocks.append({"i": i, "j": j, "x": j - i, "y": 2 + i + j, "t": t, "u": u})
+
+    # Column x holds the ones of block (i, i+x-1) at y = x+1+2i and the tens
+    # of block (i, i+x) at y = x+2+2i. Both are diagonals of `blocks` (a
+    # stride of n+1 in the flat list), interleaved ones/tens per i, so the
+    # cells fill consecutive rows y0, y0+1, ... and come out row-sorted: each
+    # column is a preallocated list filled by two strided slice copies, and
+    # the Egel pass then walks it once.
+    columns = []
+    marks_by_row: Dict[int, List[Dict[str, int]]] = {}  # y -> underlines, rows in order of first mark
+    carries = []
+    carry_in = 0
+    step = n + 1
+    for x in range(n, -m, -1):
+        o0, o1 = max(0, 1 - x), min(m - 1, n - x)  # i range of the ones
+        t0, t1 = max(0, -x), min(m - 1, n - 1 - x)  # i range of the tens
+        y0 = x + 1 + 2 * o0 if o0 <= t0 else x + 2 + 2 * t0
+        digits = [0] * (max(o1 - o0 + 1, 0) + max(t1 - t0 + 1, 0))
+        if o1 >= o0:
+            k = x + 1 + 2 * o0 - y0
+            digits[k:k + 2 * (o1 - o0) + 1:2] = map(_ONES, blocks[o0 * step + x - 1:o1 * step + x:step])
+        if t1 >= t0:
+            k = x + 2 + 2 * t0 - y0
+            digits[k:k + 2 * (t1 - t0) + 1:2] = map(_TENS, blocks[t0 * step + x:t1 * step + x + 1:step])
+
+        s = carry_in
+        tens = 0
+        y = y0
+        for d in digits:
+            s += d
+            if s >= 10:
+                produced = s // 10
+                tens += produced
+                s %= 10
+                row = marks_by_row.get(y)
+                if row is None:
+                    marks_by_row[y] = row = []
+                row.append({"x": x, "y": y, "count": produced})
+            y += 1
+        columns.append({
+            "x": x, "place": n - x, "carry_in": carry_in, "rows": list(range(y0, y)), "digits": digits,
+            "result_digit": s, "carry_out": tens,
+        })
+        if tens > 0:
+            carries.append({"x": x - 1, "value": tens, "src": x})
+        carry_in = tens
+
+    # answer row: the final carry, then the column digits, left to right
+    product = (str(carry_in) if carry_in else "") + "".join(str(c["result_digit"]) for c in reversed(columns))
+    product = product.lstrip("0") or "0"
+
+    return {
+        "op": "mul",
+        "a": a,
+        "b": b,
+        "result": a * b,
+        "a_digits": A,
+        "b_digits": Bms,
+        "blocks": blocks,
+        "columns": columns,
+        "underlines": [mark for row in marks_by_row.values() for mark in row],
+        "carries": carries,
+        "product": product,
+    }
+
+
+def _trace_size(trace: Dict[str, Any]) -> int:
+    # rough bytes held by a trace: a few hundred per block/cell dict
+    return 300 * (len(trace["blocks"]) + len(trace["columns"])) + 200 * len(trace["underlines"])
+
+
+# Traces are independent of render options (stage, colors, unit, grid, ...),
+# so re-renders of one problem reuse the trace. Per process.
+TRACE_CACHE = LRUCache(maxsize=256, max_bytes=32 * 1024 * 1024, sizeof=_trace_size)
+
+
+def cached_egel_multiplication(a: Operand, b: Operand) -> Dict[str, Any]:
+    """compute_egel_multiplication through TRACE_CACHE; treat the result as read-only."""
+    key = (operand(a), operand(b))
+    return TRACE_CACHE.get_or_compute(key, lambda: compute_egel_multiplication(*key))
@@ -3,6 +3,11 @@ from __future__ import annotations
 import math
 from typing import Tuple, Dict, Any, List
 
+from engine.common.digits import ndigits, operand, units_first
+from engine.common.display import DisplayList, Grid, Item, Rect, Rule, SvgBackend, Text, TikzSvg
+from engine.common.timing import timed_phase
+from engine.mul.algo import cached_egel_multiplication
+
 TIKZ_TO_HEX = {
     "red": "#cc0000",
     "blue": "#005bbb",
@@ -38,33 +43,11 @@ def col_color(total_cols: int, col_index: int) -> str:
     ones_index = total_cols - col_index + 1  # rightmost=1
     return PV_COLORS[(ones_index - 1) % len(PV_COLORS)]
 
-def ndigits(v: int) -> int:
-    v = abs(int(v))
-    if v == 0:
-        return 1
-    return int(math.floor(math.log10(v))) + 1
-
-def digits_rev(v: int):
-    v = int(v)
-    if v == 0:
-        return [0]
-    out = []
-    while v > 0:
-        out.append(v % 10)
-        v //= 10
-    return out  # least->most
-
-
-def parse_digits_units_first(x: int):
-    x = abs(int(x))
-    if x == 0:
-        return [0]
-    ds = []
-    while x > 0:
-        ds.append(x % 10)
-        x //= 10
-    return ds  # units first
+# digit lists, units first (engine.common.digits; kept under their old names)
+digits_rev = units_first
+parse_digits_units_first = units_first
 
+@timed_phase("trace")
 def multiply_digits(A, B):
     # A,B: units-first
     m = len(A)
@@ -94,29 +77,13 @@ def checker_digit_color(x_int: int, y_int: int, Ccolors: tuple[str,str]):
     by = y_int
     return c1 if ((bx + by) % 2) == 0 else c2
 
-# ---------- SVG primitives ----------
-def svg_text(x, y, s, size=22, weight="bold", fill="#000", anchor="middle", family="Times New Roman, serif"):
-    return f'<text x="{x:.2f}" y="{y:.2f}" font-size="{size}" font-family="{family}" font-weight="{weight}" text-anchor="{anchor}" fill="{fill}">{s}</text>'
-
-def svg_line(x1, y1, x2, y2, stroke="#000", width=2, opacity=1.0):
-    return f'<line x1="{x1:.2f}" y1="{y1:.2f}" x2="{x2:.2f}" y2="{y2:.2f}" stroke="{stroke}" stroke-width="{width}" opacity="{opacity}"/>'
-
-def svg_rect(x, y, w, h, fill="none", stroke="none", width=1, opacity=1.0, rx=0.0, ry=0.0):
-    return f'<rect x="{x:.2f}" y="{y:.2f}" width="{w:.2f}" height="{h:.2f}" fill="{fill}" stroke="{stroke}" stroke-width="{width}" opacity="{opacity}" rx="{rx:.2f}" ry="{ry:.2f}"/>'
-
-def svg_grid(x0, y0, x1, y1, step, stroke="#35b7c8", width=1, opacity=0.22):
-    parts = []
-    x = x0
-    while x <= x1 + 1e-9:
-        parts.append(svg_line(x, y0, x, y1, stroke=stroke, width=width, opacity=opacity))
-        x += step
-    y = y0
-    while y <= y1 + 1e-9:
-        parts.append(svg_line(x0, y, x1, y, stroke=stroke, width=width, opacity=opacity))
-        y += step
-    return "\n".join(parts)
-
-def highlight_cell_svg(X, Y, unit, x_int, y_int, col_token):
+# ---------- display-list primitives ----------
+_SERIF = "Times New Roman, serif"
+
+def mul_text(x, y, s, size=22, weight="bold", fill="#000"):
+    return Text(x, y, str(s), size, fill=fill, weight=weight, family=_SERIF)
+
+def highlight_cell(X, Y, unit, x_int, y_int, col_token) -> Rect:
     # matches TikZ: (x+0.10, y+0.10) to (x+0.90, y+0.90), opacity=0.20, rounded corners
     fill = css_color(col_token)
     x = X(x_int) + 0.10 * unit
@@ -124,9 +91,9 @@ def highlight_cell_svg(X, Y, unit, x_int, y_int, col_token):
     w = 0.80 * unit
     h = 0.80 * unit
     r = 0.18 * unit
-    return svg_rect(x, y, w, h, fill=fill, opacity=0.20, rx=r, ry=r)
+    return Rect(x, y, w, h, fill=fill, opacity=0.20, rx=r, ry=r)
 
-def highlight_block2_svg(X, Y, unit, x_int, y_int, col_token):
+def highlight_block2(X, Y, unit, x_int, y_int, col_token) -> Rect:
     # matches TikZ: (x+0.08, y+0.08) to (x+1.92, y+0.92)
     fill = css_color(col_token)
     x = X(x_int) + 0.08 * unit
@@ -134,65 +101,22 @@ def highlight_block2_svg(X, Y, unit, x_int, y_int, col_token):
     w = 1.84 * unit
     h = 0.84 * unit
     r = 0.18 * unit
-    return svg_rect(x, y, w, h, fill=fill, opacity=0.20, rx=r, ry=r)
+    return Rect(x, y, w, h, fill=fill, opacity=0.20, rx=r, ry=r)
 
 # ---------- renderer ----------
-def render_svg_lua_match(
-    a: int, b: int,
-    unit: int = 56,
-    show_grid: bool = True,
-    add_mode: str = "egel",
-    show_marks: bool = True,
-    show_carry: bool = True,
-    carry_scale: float = 1.0,
-    mark_len_factor: float = 0.70,
-    mark_stack_step: float = 0.08,
-    color_mode: int = 0,
-    reveal_stage: int = 3,
-    Acolors: list[str] | None = None,
-    Ccolors: tuple[str,str] = ("red","blue"),
-):
-    """
-    Lua-match layout:
-      A digits at (-2-i, i)
-      dot-times-dot at (-1,0),(0,0),(1,0)
-      B digits at (2+j, j) with Bms (most->least)
-      blocks: x=j-i, y=2+i+j, tens at (x,y), ones at (x+1,y)
-    Color modes:
-      0: all digits black
-      1: byA MARKER (background markers on A digits + corresponding blocks)
-      2: byA COLOR (A digits + corresponding block digits colored)
-      3: CHECKER COLOR (block digits colored by checkerboard using Ccolors)
-    """
-    A = parse_digits_units_first(a)  # units->...
-    B = parse_digits_units_first(b)
+@timed_phase("layout")
+def _lua_match_layout(a: int, b: int, unit: int, add_mode: str) -> Dict[str, Any]:
+    """Bounding box and pixel mapping around the trace; shared by all stages."""
+    trace = cached_egel_multiplication(a, b)
+    A, Bms = trace["a_digits"], trace["b_digits"]
     m = len(A)
-    n = len(B)
+    n = len(Bms)
+    blocks = trace["blocks"]
 
-    # B placement order: MS->LS
-    Bms = [B[n - 1 - j] for j in range(n)]
-    show_digits = (reveal_stage >= 1)
-    show_blocks = (reveal_stage >= 2)
-    show_egel   = (reveal_stage >= 3)
-
-    # blocks + ranges
-    blocks = []
-    yMax = -10**9
-    xMin = 10**9
-    xMax = -10**9
-    for i in range(m):
-        for j in range(n):
-            ad = A[i]
-            bd = Bms[j]
-            p = ad * bd
-            t = p // 10
-            u = p % 10
-            x_int = j - i
-            y_int = 2 + i + j
-            yMax = max(yMax, y_int)
-            xMin = min(xMin, x_int)
-            xMax = max(xMax, x_int + 1)
-            blocks.append({"i": i, "x": x_int, "y": y_int, "t": t, "u": u})
+    # ranges of the block digits (= the Egel addition columns)
+    xMin = 1 - m
+    xMax = n
+    yMax = m + n
 
     # rows
     if add_mode == "egel":
@@ -204,78 +128,37 @@ def render_svg_lua_match(
     yLine = yRes
 
     # product digits
-    P = multiply_digits(A, B)  # units-first
-    chars = [str(d) for d in reversed(P)]
-    while len(chars) > 1 and chars[0] == "0":
-        chars.pop(0)
+    chars = list(trace["product"])
 
     xRight = n
     startX = xRight - (len(chars) - 1)
 
-    # bbox
-    xmin, xmax, ymin, ymax = 10**9, -10**9, 10**9, -10**9
-    def upd(x, y):
-        nonlocal xmin, xmax, ymin, ymax
-        xmin = min(xmin, x)
-        xmax = max(xmax, x)
-        ymin = min(ymin, y)
-        ymax = max(ymax, y)
-
-    for i in range(m): upd(-2 - i, i)
-    upd(-1, 0); upd(0, 0); upd(1, 0)
-    for j in range(n): upd(2 + j, j)
-    for b0 in blocks:
-        upd(b0["x"], b0["y"])
-        upd(b0["x"] + 1, b0["y"])
-    for k in range(len(chars)): upd(startX + k, yRes)
-    upd(startX, yLine); upd(xRight + 1, yLine)
-
-    # egel add computations (underline + carry row)
-    underline = {}  # underline[y][x]=count
-    carry_at = {}
-    carry_src = {}
-    if add_mode == "egel":
-        add_xMin, add_xMax = xMin, xMax
-        add_cols = add_xMax - add_xMin + 1
-
-        def x_to_colindex(x): return (x - add_xMin + 1)
+    # bbox: A digits, "· × ·", B digits, blocks, answer row and line
+    xmin = min(-1 - m, 1 - m, startX)
+    xmax = max(1 + n, n, startX + len(chars) - 1, xRight + 1)
+    ymin = 0
+    ymax = max(m - 1, n - 1, yMax, yRes)
 
-        digits_by_col = {x: [] for x in range(add_xMin, add_xMax + 1)}
-        for b0 in blocks:
-            digits_by_col[b0["x"]].append({"x": b0["x"], "y": b0["y"], "d": b0["t"]})
-            digits_by_col[b0["x"] + 1].append({"x": b0["x"] + 1, "y": b0["y"], "d": b0["u"]})
-
-        carry_in = 0
-        for x in range(add_xMax, add_xMin - 1, -1):
-            u = carry_in
-            tens_counter = 0
-            col_list = digits_by_col.get(x, [])
-            col_list.sort(key=lambda it: it["y"])  # top->bottom
-            for it in col_list:
-                u += it["d"]
-                if u >= 10:
-                    produced = u // 10
-                    tens_counter += produced
-                    u = u % 10
-                    underline.setdefault(it["y"], {})
-                    underline[it["y"]][it["x"]] = underline[it["y"]].get(it["x"], 0) + produced
-            if tens_counter > 0:
-                carry_at[x - 1] = tens_counter
-                carry_src[x - 1] = x
-            carry_in = tens_counter
+    # egel add marks (underline + carry row)
+    underline: List[Dict[str, int]] = []
+    carry_at: List[Dict[str, int]] = []
+    if add_mode == "egel":
+        underline = trace["underlines"]
+        carry_at = trace["carries"]
 
         # bbox expand for multi-digit carry
         extra_left = xmin
-        for tx, v in carry_at.items():
-            k = ndigits(v)
-            leftmost = tx - (k - 1)
+        for c in carry_at:
+            k = ndigits(c["value"])
+            leftmost = c["x"] - (k - 1)
             extra_left = min(extra_left, leftmost)
         if extra_left < xmin:
             xmin = extra_left - 1
 
         # allow a bit for carry row
-        upd(add_xMin - ndigits(999), yCarry)
-        upd(add_xMax, yCarry)
+        xmin = min(xmin, xMin - ndigits(999))
+        xmax = max(xmax, xMax)
+        ymax = max(ymax, yCarry)
 
     # pad bbox
     xmin -= 1; xmax += 1; ymin -= 1; ymax += 1
@@ -285,115 +168,198 @@ def render_svg_lua_match(
     W = (xmax - xmin + 1) * unit + pad * 2
     H = (ymax - ymin + 1) * unit + pad * 2
 
+    return {
+        "trace": trace,
+        "A": A, "Bms": Bms, "m": m, "n": n,
+        "blocks": blocks, "xMin": xMin, "xMax": xMax,
+        "yCarry": yCarry, "yRes": yRes, "yLine": yLine,
+        "chars": chars, "xRight": xRight, "startX": startX,
+        "underline": underline, "carry_at": carry_at,
+        "xmin": xmin, "xmax": xmax, "ymin": ymin, "ymax": ymax,
+        "unit": unit, "pad": pad, "W": W, "H": H, "add_mode": add_mode,
+    }
+
+
+@timed_phase("layout")
+def _lua_match_display(
+    L: Dict[str, Any],
+    show_grid: bool = True,
+    show_marks: bool = True,
+    show_carry: bool = True,
+    carry_scale: float = 1.0,
+    mark_len_factor: float = 0.70,
+    mark_stack_step: float = 0.08,
+    color_mode: int = 0,
+    Acolors: list[str] | None = None,
+    Ccolors: tuple[str,str] = ("red","blue"),
+) -> DisplayList:
+    """The drawing as a display list.
+
+    reveal stage 1 shows digits, 2 adds blocks, 3 adds the Egel-add pass.
+    """
+    A, Bms, m, n = L["A"], L["Bms"], L["m"], L["n"]
+    blocks = L["blocks"]
+    xMin, xMax = L["xMin"], L["xMax"]
+    yCarry, yRes, yLine = L["yCarry"], L["yRes"], L["yLine"]
+    chars, xRight, startX = L["chars"], L["xRight"], L["startX"]
+    underline, carry_at = L["underline"], L["carry_at"]
+    xmin, xmax, ymin, ymax = L["xmin"], L["xmax"], L["ymin"], L["ymax"]
+    unit, pad, W, H, add_mode = L["unit"], L["pad"], L["W"], L["H"], L["add_mode"]
+
     def X(x): return pad + (x - xmin) * unit
     def Y(y): return pad + (y - ymin) * unit
     def Cx(x): return pad + (x - xmin + 0.5) * unit
     def Cy(y): return pad + (y - ymin + 0.5) * unit
 
-    parts = []
-    parts.append(f'<svg xmlns="http://www.w3.org/2000/svg" width="{W}" height="{H}" viewBox="0 0 {W} {H}">')
+    items: List[Item] = []
+    add = items.append
 
     # grid (cyan)
     if show_grid:
-        parts.append(svg_grid(X(xmin), Y(ymin), X(xmax + 1), Y(ymax + 1), step=unit, stroke="#35b7c8", width=1, opacity=0.22))
+        add((0, Grid(X(xmin), Y(ymin), xmax + 1 - xmin, ymax + 1 - ymin, unit, stroke="#35b7c8", width=1, opacity=0.22)))
 
     # --- color=1 markers (background) ---
     if color_mode == 1:
         # A digit markers
-        if show_digits:
-            for i in range(m):
-                col = acolor(i, Acolors)
-                parts.append(highlight_cell_svg(X, Y, unit, -2 - i, i, col))
+        for i in range(m):
+            col = acolor(i, Acolors)
+            add((1, highlight_cell(X, Y, unit, -2 - i, i, col)))
         # Block markers for each block, colored by its A digit index (i)
-        if show_blocks:
-            for b0 in blocks:
-                col = acolor(b0["i"], Acolors)
-                parts.append(highlight_block2_svg(X, Y, unit, b0["x"], b0["y"], col))
+        for b0 in blocks:
+            col = acolor(b0["i"], Acolors)
+            add((2, highlight_block2(X, Y, unit, b0["x"], b0["y"], col)))
 
-    if show_digits:
-        # A digits (color=2 -> colored; otherwise black)
-        for i in range(m):
-            x = -2 - i
-            y = i
-            d = A[i]
-            fill = "#000000"
-            if color_mode == 2:
-                fill = css_color(acolor(i, Acolors))
-            parts.append(svg_text(Cx(x), Cy(y) + 8, d, size=26, weight="bold", fill=fill))
-
-        # • × •
-        parts.append(svg_text(Cx(-1), Cy(0) + 8, "·", size=28, weight="bold", fill="#000"))
-        parts.append(svg_text(Cx(0),  Cy(0) + 8, "×", size=28, weight="bold", fill="#000"))
-        parts.append(svg_text(Cx(1),  Cy(0) + 8, "·", size=28, weight="bold", fill="#000"))
-
-        # B digits (always black, matching engine)
-        for j in range(n):
-            x = 2 + j
-            y = j
-            d = Bms[j]
-            parts.append(svg_text(Cx(x), Cy(y) + 8, d, size=26, weight="bold", fill="#000000"))
+    # A digits (color=2 -> colored; otherwise black)
+    for i in range(m):
+        x = -2 - i
+        y = i
+        d = A[i]
+        fill = "#000000"
+        if color_mode == 2:
+            fill = css_color(acolor(i, Acolors))
+        add((1, mul_text(Cx(x), Cy(y) + 8, d, size=26, weight="bold", fill=fill)))
+
+    # • × •
+    add((1, mul_text(Cx(-1), Cy(0) + 8, "·", size=28, weight="bold", fill="#000")))
+    add((1, mul_text(Cx(0),  Cy(0) + 8, "×", size=28, weight="bold", fill="#000")))
+    add((1, mul_text(Cx(1),  Cy(0) + 8, "·", size=28, weight="bold", fill="#000")))
+
+    # B digits (always black, matching engine)
+    for j in range(n):
+        x = 2 + j
+        y = j
+        d = Bms[j]
+        add((1, mul_text(Cx(x), Cy(y) + 8, d, size=26, weight="bold", fill="#000000")))
+
+    # Block digits
+    for b0 in blocks:
+        tcol = "#000000"
+        if color_mode == 2:
+            tcol = css_color(acolor(b0["i"], Acolors))
+        elif color_mode == 3:
+            tcol = css_color(checker_digit_color(b0["x"], b0["y"], Ccolors))
+        add((2, mul_text(Cx(b0["x"]),   Cy(b0["y"]) + 8, b0["t"], size=26, weight="bold", fill=tcol)))
+        add((2, mul_text(Cx(b0["x"]+1), Cy(b0["y"]) + 8, b0["u"], size=26, weight="bold", fill=tcol)))
+
+    add_xMin, add_xMax = xMin, xMax
+    add_cols = add_xMax - add_xMin + 1
+    def x_to_colindex(x): return (x - add_xMin + 1)
+
+    # Egel underlines (place-value coloring)
+    if add_mode == "egel" and show_marks:
+        for ul in underline:
+            x, y, cnt = ul["x"], ul["y"], ul["count"]
+            colidx = x_to_colindex(x)
+            color_name = col_color(add_cols, colidx)
+            stroke = css_color(color_name)
+            if cnt > 8:
+                add((3, mul_text(Cx(x), Cy(y) - 6, cnt, size=14, weight="bold", fill=stroke)))
+                continue
+            y_bottom = Y(y + 1)  # exact grid line
+            x1 = Cx(x) - (mark_len_factor * unit) / 2
+            x2 = Cx(x) + (mark_len_factor * unit) / 2
+            for k in range(cnt):
+                yy = y_bottom - (mark_stack_step * unit) * (k)
+                add((3, Rule(x1, yy, x2, yy, stroke=stroke, width=3, opacity=1.0)))
+
+    # Carry-count row (place-value coloring)
+    if add_mode == "egel" and show_carry:
+        for c in carry_at:
+            tx, v, src = c["x"], c["value"], c["src"]
+            src_colidx = x_to_colindex(src)
+            color_name = col_color(add_cols, src_colidx)
+            fill = css_color(color_name)
+            digs = digits_rev(v)  # least->most
+            for i, d in enumerate(digs):
+                x = tx - i
+                add((3, mul_text(Cx(x), Cy(yCarry) + 8, d, size=int(22 * carry_scale), weight="bold", fill=fill)))
+
+    # underline above answer row
+    y_line = Y(yLine)
+    add((3, Rule(X(startX), y_line, X(xRight + 1), y_line, stroke="#000", width=3, opacity=1.0)))
+
+    # result row
+    for k, ch in enumerate(chars):
+        x = startX + k
+        add((3, mul_text(Cx(x), Cy(yRes) + 10, ch, size=28, weight="bold", fill="#000")))
+
+    return DisplayList(tuple(items), ((0, W, H),))
+
+
+def render_svg_lua_match(
+    a: int, b: int,
+    unit: int = 56,
+    show_grid: bool = True,
+    add_mode: str = "egel",
+    show_marks: bool = True,
+    show_carry: bool = True,
+    carry_scale: float = 1.0,
+    mark_len_factor: float = 0.70,
+    mark_stack_step: float = 0.08,
+    color_mode: int = 0,
+    reveal_stage: int = 3,
+    Acolors: list[str] | None = None,
+    Ccolors: tuple[str,str] = ("red","blue"),
+    grid_mode: str = "lines",
+):
+    """
+    Lua-match layout:
+      A digits at (-2-i, i)
+      dot-times-dot at (-1,0),(0,0),(1,0)
+      B digits at (2+j, j) with Bms (most->least)
+      blocks: x=j-i, y=2+i+j, tens at (x,y), ones at (x+1,y)
+    Color modes:
+      0: all digits black
+      1: byA MARKER (background markers on A digits + corresponding blocks)
+      2: byA COLOR (A digits + corresponding block digits colored)
+      3: CHECKER COLOR (block digits colored by checkerboard using Ccolors)
+    """
+    L = _lua_match_layout(a, b, unit, add_mode)
+    dl = _lua_match_display(
+        L, show_grid=show_grid, show_marks=show_marks, show_carry=show_carry,
+        carry_scale=carry_scale, mark_len_factor=mark_len_factor, mark_stack_step=mark_stack_step,
+        color_mode=color_mode, Acolors=Acolors, Ccolors=Ccolors,
+    )
+    return TikzSvg(grid_mode).render(dl, reveal_stage)
+
+
+def display_list(
+    a: int,
+    b: int,
+    unit: int = 56,
+    show_grid: bool = True,
+    show_marks: bool = True,
+    color_mode: int = 0,
+) -> DisplayList:
+    """The drawing behind render_svg (all unified stages), for any backend."""
+    L = _lua_match_layout(operand(a), operand(b), int(unit), "egel")
+    return _lua_match_display(L, show_grid=bool(show_grid), show_marks=bool(show_marks),
+                              show_carry=bool(show_marks), color_mode=int(color_mode))
 
-    if show_blocks:
-        # Block digits
-        for b0 in blocks:
-            tcol = "#000000"
-            if color_mode == 2:
-                tcol = css_color(acolor(b0["i"], Acolors))
-            elif color_mode == 3:
-                tcol = css_color(checker_digit_color(b0["x"], b0["y"], Ccolors))
-            parts.append(svg_text(Cx(b0["x"]),   Cy(b0["y"]) + 8, b0["t"], size=26, weight="bold", fill=tcol))
-            parts.append(svg_text(Cx(b0["x"]+1), Cy(b0["y"]) + 8, b0["u"], size=26, weight="bold", fill=tcol))
-
-    if show_egel:
-        # Egel underlines (place-value coloring)
-        if add_mode == "egel" and show_marks:
-            add_xMin, add_xMax = xMin, xMax
-            add_cols = add_xMax - add_xMin + 1
-            def x_to_colindex(x): return (x - add_xMin + 1)
-
-            for y, row in underline.items():
-                for x, cnt in row.items():
-                    colidx = x_to_colindex(x)
-                    color_name = col_color(add_cols, colidx)
-                    stroke = css_color(color_name)
-                    if cnt > 8:
-                        parts.append(svg_text(Cx(x), Cy(y) - 6, cnt, size=14, weight="bold", fill=stroke))
-                        continue
-                    y_bottom = Y(y + 1)  # exact grid line
-                    x1 = Cx(x) - (mark_len_factor * unit) / 2
-                    x2 = Cx(x) + (mark_len_factor * unit) / 2
-                    for k in range(cnt):
-                        yy = y_bottom - (mark_stack_step * unit) * (k)
-                        parts.append(svg_line(x1, yy, x2, yy, stroke=stroke, width=3, opacity=1.0))
-
-        # Carry-count row (place-value coloring)
-        if add_mode == "egel" and show_carry:
-            add_xMin, add_xMax = xMin, xMax
-            add_cols = add_xMax - add_xMin + 1
-            def x_to_colindex(x): return (x - add_xMin + 1)
-
-            for tx, v in carry_at.items():
-                src = carry_src.get(tx, tx + 1)
-                src_colidx = x_to_colindex(src)
-                color_name = col_color(add_cols, src_colidx)
-                fill = css_color(color_name)
-                digs = digits_rev(v)  # least->most
-                for i, d in enumerate(digs):
-                    x = tx - i
-                    parts.append(svg_text(Cx(x), Cy(yCarry) + 8, d, size=int(22 * carry_scale), weight="bold", fill=fill))
-
-        # underline above answer row
-        y_line = Y(yLine)
-        parts.append(svg_line(X(startX), y_line, X(xRight + 1), y_line, stroke="#000", width=3, opacity=1.0))
-
-        # result row
-        for k, ch in enumerate(chars):
-            x = startX + k
-            parts.append(svg_text(Cx(x), Cy(yRes) + 10, ch, size=28, weight="bold", fill="#000"))
-
-    parts.append("</svg>")
-    return "\n".join(parts)
 
+def svg_backend(grid_mode: str = "lines", integer: bool = False) -> SvgBackend:
+    """The SVG writer for multiplication display lists."""
+    return TikzSvg(grid_mode, integer)
 
 
 def render_svg(
@@ -404,6 +370,7 @@ def render_svg(
     show_grid: bool = True,
     show_marks: bool = True,
     color_mode: int = 0,
+    grid_mode: str = "lines",
 ) -> Tuple[str, Dict[str, Any]]:
     """Unified wrapper around Lua-match multiplication renderer.
 
@@ -415,8 +382,8 @@ def render_svg(
     """
     reveal_stage = max(0, min(3, int(stage)))
     svg = render_svg_lua_match(
-        a=int(a),
-        b=int(b),
+        a=operand(a),
+        b=operand(b),
         unit=int(unit),
         show_grid=bool(show_grid),
         add_mode="egel",
@@ -424,6 +391,6 @@ def render_svg(
         show_carry=bool(show_marks),
         color_mode=int(color_mode),
         reveal_stage=reveal_stage,
+        grid_mode=grid_mode,
     )
-    # basic trace
-    return svg, {"trace": {"op": "mul", "a": int(a), "b": int(b), "result": int(a)*int(b)}}
+    return svg, {"trace": cached_egel_multiplication(a, b)}
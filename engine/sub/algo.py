@@ -1,8 +1,104 @@
 from __future__ import annotations
 
-from typing import Dict, Any, List
+from operator import add
+from typing import Dict, Any, List, Sequence, Tuple
 
-def compute_egel_subtraction(a: int, b: int) -> Dict[str, Any]:
+from engine.common.bytetables import DIGIT_VALUES, PAIR_DIFF, TIMES10, byte_table
+from engine.common.digits import Operand, decimal, operand
+from engine.common.timing import timed_phase
+
+
+def _step(carry: int, ad: int, bd: int) -> Dict[str, Any]:
+    # one column of the rules in compute_egel_subtraction's docstring
+    sub_val = bd + carry
+    if sub_val > ad:
+        comp = 10 - sub_val
+        return {"a": ad, "b": bd, "carry_in": carry, "sub_val": sub_val, "rule": "complete",
+                "comp": comp, "res": comp + ad, "carry_out": 1}
+    return {"a": ad, "b": bd, "carry_in": carry, "sub_val": sub_val, "rule": "fit",
+            "comp": None, "res": ad - sub_val, "carry_out": 0}
+
+
+# Lookup tables for _subtract_columns (see engine.common.bytetables); step
+# keys are pair keys (a digit, b digit) plus 100 * carry_in.
+_TIMES100 = byte_table(lambda k: 100 * k if k < 2 else 0)
+_STEPS = [_step(k // 100, k // 10 % 10, k % 10) if k < 200 else None for k in range(256)]
+
+# list-of-object fields of a trace and their keys (engine.common.serialize.columnar)
+TRACE_TABLES = {"steps": ("pos", "a", "b", "carry_in", "sub_val", "rule", "comp", "res", "carry_out")}
+
+
+def _subtract_columns(pairs: Sequence[Tuple[int, int]]) -> List[Tuple[str, str, int, bytes, bytes, List[Dict[str, Any]]]]:
+    """Padded texts, result, carries-in, result digits and steps of many
+    subtractions at once.
+
+    The carry into a column is what makes (a digit - b digit - carry) come
+    out as the result digit mod 10, and the result digits of every column
+    are those of (a - b) mod 10**n, so the carries need no column-by-column
+    walk: with all problems' digits concatenated into bytes, two byte-table
+    lookups give every carry-in, and a third key (carry, a digit, b digit)
+    picks each step's fields from _STEPS.
+    """
+    a_texts: List[str] = []
+    b_texts: List[str] = []
+    r_texts: List[str] = []
+    results: List[int] = []
+    for a, b in pairs:
+        a_str, b_str = decimal(a), decimal(b)
+        n = max(len(a_str), len(b_str))
+        r = a - b if a >= b else a - b + 10**n
+        a_texts.append(a_str.zfill(n))
+        b_texts.append(b_str.zfill(n))
+        r_texts.append(decimal(r).zfill(n))
+        results.append(r)
+
+    A = "".join(a_texts).encode("ascii").translate(DIGIT_VALUES)
+    B = "".join(b_texts).encode("ascii").translate(DIGIT_VALUES)
+    R = "".join(r_texts).encode("ascii").translate(DIGIT_VALUES)
+    pair = bytes(map(add, A.translate(TIMES10), B))
+    # PAIR_DIFF twice: the a - b digit, then the borrow between it and R
+    carry = bytes(map(add, pair.translate(PAIR_DIFF).translate(TIMES10), R)).translate(PAIR_DIFF)
+    keys = bytes(map(add, carry.translate(_TIMES100), pair))
+
+    out = []
+    start = 0
+    for a_p, b_p, r in zip(a_texts, b_texts, results):
+        n = len(a_p)
+        end = start + n
+        steps = [{"pos": pos, **_STEPS[k]} for pos, k in enumerate(keys[start:end])]
+        out.append((a_p, b_p, r, carry[start:end], R[start:end], steps))
+        start = end
+    return out
+
+
+def _checked(a: Operand, b: Operand) -> Tuple[int, int]:
+    a, b = operand(a), operand(b)
+    if a < 0 or b < 0:
+        raise ValueError("A and B must be non-negative integers.")
+    return a, b
+
+
+def _trace(a: int, b: int, columns: Tuple[str, str, int, bytes, bytes, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    a_p, b_p, r, carries_in, result, steps = columns
+    result_str = decimal(r)
+    return {
+        "op": "sub",
+        "a": a,
+        "b": b,
+        "a_padded": a_p,
+        "b_padded": b_p,
+        "digits": len(a_p),
+        "carries_in": list(carries_in),
+        "steps": steps,
+        "result_digits": list(result),
+        "result": r,
+        "result_str": result_str,
+        "final_carry": int(a < b),
+    }
+
+
+@timed_phase("trace")
+def compute_egel_subtraction(a: Operand, b: Operand) -> Dict[str, Any]:
     """Completion-based subtraction ("гүйцээх" логик) producing a trace.
 
     This follows the same rules as the user's existing egel_hasah_web:
@@ -16,60 +112,16 @@ def compute_egel_subtraction(a: int, b: int) -> Dict[str, Any]:
           carry_out = 0
 
     Note: Classroom usage usually assumes a >= b. If final_carry==1, it indicates mismatch.
+    A and B may be ints or strings of decimal digits.
     """
-    if a < 0 or b < 0:
-        raise ValueError("A and B must be non-negative integers.")
-    a_str=str(a)
-    b_str=str(b)
-    n=max(len(a_str), len(b_str))
-    a_p=a_str.zfill(n)
-    b_p=b_str.zfill(n)
-
-    carry=0
-    result=[0]*n
-    carries_in=[0]*n
-    raw_steps: List[Dict[str, Any]]=[]
-    for pos in range(n-1, -1, -1):
-        ad=int(a_p[pos]); bd=int(b_p[pos])
-        carries_in[pos]=carry
-        sub_val=bd+carry
-        if sub_val>ad:
-            comp=10-sub_val
-            res=comp+ad
-            carry_out=1
-            rule="complete"
-        else:
-            comp=None
-            res=ad-sub_val
-            carry_out=0
-            rule="fit"
-        result[pos]=res
-        raw_steps.append({
-            "pos": pos,
-            "a": ad,
-            "b": bd,
-            "carry_in": carry,
-            "sub_val": sub_val,
-            "rule": rule,
-            "comp": comp,
-            "res": res,
-            "carry_out": carry_out,
-        })
-        carry=carry_out
-
-    result_str="".join(str(d) for d in result).lstrip("0") or "0"
-    steps_lr=list(reversed(raw_steps))
-    return {
-        "op": "sub",
-        "a": a,
-        "b": b,
-        "a_padded": a_p,
-        "b_padded": b_p,
-        "digits": n,
-        "carries_in": carries_in,
-        "steps": steps_lr,
-        "result_digits": result,
-        "result": int(result_str),
-        "result_str": result_str,
-        "final_carry": carry,
-    }
+    a, b = _checked(a, b)
+    return _trace(a, b, _subtract_columns([(a, b)])[0])
+
+
+@timed_phase("trace")
+def compute_egel_subtraction_batch(pairs: Sequence[Tuple[Operand, Operand]]) -> List[Dict[str, Any]]:
+    """compute_egel_subtraction for many (a, b) pairs, in one table pass."""
+    checked = [_checked(a, b) for a, b in pairs]
+    if not checked:
+        return []
+    return [_trace(a, b, cols) for (a, b), cols in zip(checked, _subtract_columns(checked))]
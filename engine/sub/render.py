@@ -2,29 +2,22 @@ from __future__ import annotations
 
 from typing import Dict, Any, Tuple, List
 
+from engine.common.digits import Operand
+from engine.common.display import CellSvg, DisplayList, Grid, Item, Rect, Rule, SvgBackend, Text
+from engine.common.timing import timed_phase
 from engine.sub.algo import compute_egel_subtraction
 
-def _esc(s: str) -> str:
-    return (s.replace("&","&amp;").replace("<","&lt;").replace(">","&gt;")
-             .replace('"',"&quot;").replace("'","&apos;"))
+_FONT = "ui-sans-serif, system-ui, -apple-system, Segoe UI, Roboto, Arial"
 
-def render_svg(
-    a: int,
-    b: int,
-    unit: int = 56,
-    stage: int = 3,
-    show_grid: bool = True,
-    show_marks: bool = True,
-) -> Tuple[str, Dict[str, Any]]:
-    """Render subtraction (completion method) as SVG.
 
-    Unified stage:
-      0: grid only
-      1: show A,B and '-' sign
-      2: + borrowed row + underline (if show_marks)
-      3: + result row
-    """
-    trace = compute_egel_subtraction(a, b)
+class _SubSvg(CellSvg):
+    def num(self, v: float) -> str:
+        return f"{v}" if self.integer else f"{v:.2f}"
+
+
+@timed_phase("layout")
+def _display(trace: Dict[str, Any], unit: int, show_grid: bool, show_marks: bool) -> DisplayList:
+    """The drawing as a display list (stages as in render_svg)."""
     n = trace["digits"]
 
     # Layout similar to addition: one sign column + n digit columns
@@ -36,27 +29,22 @@ def render_svg(
     pad = int(unit * 0.45)
     width = pad*2 + cols*unit
     height = pad*2 + rows*unit
+    items: List[Item] = []
+    add = items.append
 
     def X(c: int) -> int:
         return pad + c*unit
     def Y(r: int) -> int:
         return pad + r*unit
 
-    def text(x: float, y: float, s: str, size: int, weight: str="800", fill: str="#000", anchor: str="middle"):
-        return f"<text x='{x:.2f}' y='{y:.2f}' text-anchor='{anchor}' dominant-baseline='middle' font-family='ui-sans-serif, system-ui, -apple-system, Segoe UI, Roboto, Arial' font-size='{size}' font-weight='{weight}' fill='{fill}'>" + _esc(s) + "</text>"
+    def text(x: float, y: float, s: str, size: int, weight: str="800", fill: str="#000", anchor: str="middle") -> Text:
+        return Text(x, y, s, size, fill=fill, weight=weight, anchor=anchor, family=_FONT, baseline="middle")
 
-    parts: List[str]=[]
-    parts.append(f"<svg xmlns='http://www.w3.org/2000/svg' width='{width}' height='{height}' viewBox='0 0 {width} {height}'>")
-    parts.append(f"<rect x='0' y='0' width='{width}' height='{height}' fill='white'/>")
+    add((0, Rect(0, 0, width, height, fill="white")))
 
-    if show_grid and stage >= 0:
-        x0,y0 = pad,pad
-        w,h = cols*unit, rows*unit
-        parts.append(f"<rect x='{x0}' y='{y0}' width='{w}' height='{h}' fill='none' stroke='#b3d1ff' stroke-width='2'/>")
-        for c in range(1, cols):
-            parts.append(f"<line x1='{X(c)}' y1='{y0}' x2='{X(c)}' y2='{y0+h}' stroke='#cfe3ff' stroke-width='1.5'/>")
-        for r in range(1, rows):
-            parts.append(f"<line x1='{x0}' y1='{Y(r)}' x2='{x0+w}' y2='{Y(r)}' stroke='#cfe3ff' stroke-width='1.5'/>")
+    if show_grid:
+        add((0, Grid(pad, pad, cols, rows, unit, stroke="#cfe3ff", width=1.5, edges=False,
+                     border="#b3d1ff", border_width=2)))
 
     font_big = int(unit*0.50)
     font_small = int(unit*0.36)
@@ -65,20 +53,19 @@ def render_svg(
     def col_for_place(place: int) -> int:
         return cols-1 - place
 
-    if stage >= 1:
-        # '-' sign in sign column, aligned with B row (row 1)
-        parts.append(text(X(0)+unit*0.5, Y(1)+unit*0.5, "−", size=font_big, weight="900"))
-        # A digits on row 0, B digits on row 1
-        a_p = trace["a_padded"]
-        b_p = trace["b_padded"]
-        for i,ch in enumerate(reversed(a_p)):  # units first
-            c = col_for_place(i)
-            parts.append(text(X(c)+unit*0.5, Y(0)+unit*0.5, ch, size=font_big))
-        for i,ch in enumerate(reversed(b_p)):
-            c = col_for_place(i)
-            parts.append(text(X(c)+unit*0.5, Y(1)+unit*0.5, ch, size=font_big))
-
-    if stage >= 2 and show_marks:
+    # stage 1: '-' sign in sign column, aligned with B row (row 1)
+    add((1, text(X(0)+unit*0.5, Y(1)+unit*0.5, "−", size=font_big, weight="900")))
+    # A digits on row 0, B digits on row 1
+    a_p = trace["a_padded"]
+    b_p = trace["b_padded"]
+    for i,ch in enumerate(reversed(a_p)):  # units first
+        c = col_for_place(i)
+        add((1, text(X(c)+unit*0.5, Y(0)+unit*0.5, ch, size=font_big)))
+    for i,ch in enumerate(reversed(b_p)):
+        c = col_for_place(i)
+        add((1, text(X(c)+unit*0.5, Y(1)+unit*0.5, ch, size=font_big)))
+
+    if show_marks:
         # Borrowed/carry digits:
         # (User request) Put them in the cells directly below the input numbers,
         # i.e., in the dedicated "borrowed" row (row 2).
@@ -87,29 +74,67 @@ def render_svg(
             if cv:
                 place = (n-1) - pos
                 c = col_for_place(place)
-                parts.append(text(
+                add((2, text(
                     X(c)+unit*0.5,
                     Y(2)+unit*0.5,   # borrowed row center
                     str(cv),
                     size=font_small,
                     weight="800",
                     fill="#e53935",
-                ))
+                )))
         # underline between borrowed and result (under borrowed row)
         x1 = X(0)
         x2 = X(cols)
         y = Y(3)  # top of result row
-        parts.append(f"<line x1='{x1}' y1='{y}' x2='{x2}' y2='{y}' stroke='#1e88e5' stroke-width='{max(2,int(unit*0.06))}'/>")
-
-    if stage >= 3:
-        # result digits row 3
-        res_digits = trace["result_digits"]
-        for i,d in enumerate(reversed(res_digits)):
-            c = col_for_place(i)
-            parts.append(text(X(c)+unit*0.5, Y(3)+unit*0.5, str(d), size=font_big, fill="#0b5d1e"))
+        add((2, Rule(x1, y, x2, y, stroke="#1e88e5", width=max(2,int(unit*0.06)))))
+
+    # stage 3: result digits row 3
+    res_digits = trace["result_digits"]
+    for i,d in enumerate(reversed(res_digits)):
+        c = col_for_place(i)
+        add((3, text(X(c)+unit*0.5, Y(3)+unit*0.5, str(d), size=font_big, fill="#0b5d1e")))
     # warning if final_carry == 1 (a < b)
     if trace.get("final_carry",0)==1:
-        parts.append(text(width - pad, pad*0.55, "⚠ A < B байж магадгүй", size=int(unit*0.28), weight="700", fill="#cc0000", anchor="end"))
+        add((0, text(width - pad, pad*0.55, "⚠ A < B байж магадгүй", size=int(unit*0.28), weight="700", fill="#cc0000", anchor="end")))
+
+    return DisplayList(tuple(items), ((0, width, height),))
+
+
+def display_list(
+    a: Operand,
+    b: Operand,
+    unit: int = 56,
+    show_grid: bool = True,
+    show_marks: bool = True,
+) -> DisplayList:
+    """The drawing behind render_svg (all stages), for any backend."""
+    return _display(compute_egel_subtraction(a, b), unit, show_grid, show_marks)
+
 
-    parts.append("</svg>")
-    return "\n".join(parts), {"trace": trace}
+def svg_backend(grid_mode: str = "lines", integer: bool = False) -> SvgBackend:
+    """The SVG writer for subtraction display lists."""
+    return _SubSvg(grid_mode, integer)
+
+
+def render_svg(
+    a: Operand,
+    b: Operand,
+    unit: int = 56,
+    stage: int = 3,
+    show_grid: bool = True,
+    show_marks: bool = True,
+    grid_mode: str = "lines",
+) -> Tuple[str, Dict[str, Any]]:
+    """Render subtraction (completion method) as SVG.
+
+    Unified stage:
+      0: grid only
+      1: show A,B and '-' sign
+      2: + borrowed row + underline (if show_marks)
+      3: + result row
+
+    grid_mode: "lines" | "path" | "pattern" (see engine.common.grid)
+    """
+    trace = compute_egel_subtraction(a, b)
+    svg = _SubSvg(grid_mode).render(_display(trace, unit, show_grid, show_marks), stage)
+    return svg, {"trace": trace}
@@ -0,0 +1,108 @@
+"""Summary ("collapsed") form of a problem, for problems over their budget.
+
+Instead of the worked Egel layout the SVG holds one text row per operand,
+the sign, a rule and the result, and the trace holds only the operands and
+the result. Both are linear in the number of digits, whatever the op.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+from engine.common.digits import Operand, decimal, ndigits, operand
+from engine.common.timing import phase, timed_phase
+
+SIGNS = {"add": "+", "sub": "−", "mul": "×", "div": ":"}
+CAPTION = "Хураангуй: бүтэн бодолт хэт том"  # summary: the full working is too large
+
+# text metrics as fractions of the unit (digits are tabular in the font)
+_FONT = 0.50
+_CHAR = 0.56 * _FONT
+_ROW = 0.80
+
+
+@timed_phase("trace")
+def summary_trace(op: str, a: Operand, b: Operand, extra_addends: Iterable[Operand] = ()) -> Dict[str, Any]:
+    """Operands and result only; `"summary": true` marks the reduced form."""
+    a, b = operand(a), operand(b)
+    if op == "add":
+        addends = [a, b, *(operand(x) for x in extra_addends)]
+        return {"op": op, "addends": addends, "result": sum(addends), "summary": True}
+    if op == "sub":
+        # same completion semantics as compute_egel_subtraction for a < b
+        n = max(ndigits(a), ndigits(b))
+        return {"op": op, "a": a, "b": b, "result": (a - b) % 10**n, "final_carry": int(a < b), "summary": True}
+    if op == "mul":
+        return {"op": op, "a": a, "b": b, "result": a * b, "summary": True}
+    if op == "div":
+        if b <= 0:
+            raise ValueError("Divisor (b) must be >= 1 for division.")
+        q, r = divmod(a, b)
+        return {"op": op, "dividend": a, "divisor": b, "total_q": q, "final_rem": r, "summary": True}
+    raise ValueError(f"Unknown op: {op!r}")
+
+
+def _rows(trace: Dict[str, Any], show_remainder: bool) -> Tuple[List[Tuple[str, str]], List[str]]:
+    # (sign, digits) above the rule, result lines below it
+    op = trace["op"]
+    if op == "add":
+        xs = trace["addends"]
+        above = [("", decimal(x)) for x in xs[:-1]] + [(SIGNS[op], decimal(xs[-1]))]
+        return above, [decimal(trace["result"])]
+    if op == "div":
+        below = [decimal(trace["total_q"])]
+        if show_remainder and trace["final_rem"]:
+            below.append(f"үлдэгдэл {decimal(trace['final_rem'])}")
+        return [("", decimal(trace["dividend"])), (SIGNS[op], decimal(trace["divisor"]))], below
+    return [("", decimal(trace["a"])), (SIGNS[op], decimal(trace["b"]))], [decimal(trace["result"])]
+
+
+def render_summary_svg(
+    op: str,
+    a: Operand,
+    b: Operand,
+    extra_addends: Iterable[Operand] = (),
+    unit: int = 56,
+    show_remainder: bool = True,
+) -> str:
+    """Right-aligned operand rows, rule and result as plain text rows."""
+    trace = summary_trace(op, a, b, extra_addends)
+    with phase("layout"):
+        above, below = _rows(trace, show_remainder)
+        font = int(unit * _FONT)
+        row = unit * _ROW
+        pad = int(unit * 0.45)
+        longest = max(len(s) for s in [*(d for _, d in above), *below, CAPTION])
+        sign_w = unit * 0.6
+        width = int(2 * pad + sign_w + longest * unit * _CHAR)
+        height = int(2 * pad + row * (len(above) + len(below) + 1) + unit * 0.25)
+        right = width - pad
+
+    with phase("emit"):
+        parts = [
+            f"<svg xmlns='http://www.w3.org/2000/svg' width='{width}' height='{height}' viewBox='0 0 {width} {height}'>",
+            f"<rect x='0' y='0' width='{width}' height='{height}' fill='white'/>",
+            f"<text x='{pad}' y='{pad + row * 0.5:.2f}' dominant-baseline='middle' font-family='ui-sans-serif, system-ui, "
+            f"-apple-system, Segoe UI, Roboto, Arial' font-size='{int(unit * 0.30)}' fill='#777'>{CAPTION}</text>",
+        ]
+        y = pad + row * 1.5
+        for sign, digits in above:
+            if sign:
+                parts.append(_text(pad + sign_w * 0.5, y, sign, font, "middle"))
+            parts.append(_text(right, y, digits, font, "end"))
+            y += row
+        rule_y = y - row * 0.5 + unit * 0.1
+        parts.append(f"<line x1='{pad}' y1='{rule_y:.2f}' x2='{right}' y2='{rule_y:.2f}' stroke='#000' stroke-width='2'/>")
+        y += unit * 0.25
+        for text in below:
+            parts.append(_text(right, y, text, font, "end"))
+            y += row
+        parts.append("</svg>")
+    with phase("serialize"):
+        return "\n".join(parts)
+
+
+def _text(x: float, y: float, s: str, size: int, anchor: str) -> str:
+    return (
+        f"<text x='{x:.2f}' y='{y:.2f}' text-anchor='{anchor}' dominant-baseline='middle' "
+        f"font-family='Times New Roman, serif' font-size='{size}' font-weight='700' fill='#000'>{s}</text>"
+    )
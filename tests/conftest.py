@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from engine.common.cache import LRUCache  # noqa: E402
+from engine.common.pool import WorkerPool  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    """apps/web/backend/app.py, imported once (needs fastapi and httpx)."""
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from bench.cases import load_app
+
+    return load_app("inline")
+
+
+@pytest.fixture
+def app(app_module, monkeypatch):
+    """The app module with empty caches and an inline pool for this test;
+    tests monkeypatch further settings (BUDGETS, OVER_BUDGET, ...) on it."""
+    monkeypatch.setattr(app_module, "RENDER_CACHE", LRUCache(maxsize=4096))
+    monkeypatch.setattr(app_module, "TRACE_BYTES_CACHE", LRUCache(maxsize=4096))
+    monkeypatch.setattr(app_module, "RENDER_POOL", WorkerPool(mode="inline"))
+    return app_module
+
+
+@pytest.fixture
+def client(app):
+    from fastapi.testclient import TestClient
+
+    # identity, so no precompressed variants enter the caches
+    with TestClient(app.app, headers={"Accept-Encoding": "identity"}) as c:
+        yield c
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from engine.add.algo import (
+    TABLE_MAX_ADDENDS,
+    TABLE_MIN_DIGITS,
+    VECTOR_MIN_CELLS,
+    _columns_scalar,
+    _columns_table,
+    _columns_vector,
+    _compact_trace,
+    compute_egel_addition_batch,
+    compute_egel_addition_compact,
+)
+
+
+def _random_problem(rng: random.Random, n: int, max_digits: int):
+    # each addend has its own length, so most are zero-padded
+    return [rng.randrange(10 ** rng.randint(1, max_digits)) for _ in range(n)]
+
+
+def _problems():
+    rng = random.Random(22)
+    for n in range(1, TABLE_MAX_ADDENDS + 1):
+        for digits in (1, TABLE_MIN_DIGITS - 1, TABLE_MIN_DIGITS, 40):
+            for _ in range(5):
+                yield _random_problem(rng, n, digits)
+        # carry chains across the full width, and the most a column can carry
+        yield [10**TABLE_MIN_DIGITS - 1] * n
+        yield [10**30 - 1] * (n - 1) + [1]
+        yield [0] * n
+    yield [10**50 - 1, 1]  # the carry runs into a final column of its own
+    yield [5, 10**20, 0, 7]  # short addends padded to the longest
+
+
+PROBLEMS = list(_problems())
+
+
+def _trace(addends, cols):
+    return _compact_trace(addends, cols).to_dict()
+
+
+@pytest.mark.parametrize("addends", PROBLEMS, ids=lambda p: f"{len(p)}x{max(len(str(x)) for x in p)}")
+def test_table_matches_scalar(addends):
+    assert _trace(addends, _columns_table([addends])[0]) == _trace(addends, _columns_scalar(addends))
+
+
+def test_table_over_many_problems():
+    # problems with the same addend count share one pass; offsets must not leak
+    for n in range(1, TABLE_MAX_ADDENDS + 1):
+        group = [p for p in PROBLEMS if len(p) == n]
+        for addends, cols in zip(group, _columns_table(group)):
+            assert _trace(addends, cols) == _trace(addends, _columns_scalar(addends))
+
+
+@pytest.mark.parametrize("mode", ["auto", "scalar", "table"])
+def test_batch_matches_single_calls(mode):
+    rng = random.Random(5)
+    problems = PROBLEMS + [_random_problem(rng, TABLE_MAX_ADDENDS + 2, 12) for _ in range(5)]  # past the table
+    batch = compute_egel_addition_batch(problems, mode)
+    assert [t.to_dict() for t in batch] == [compute_egel_addition_compact(p, mode).to_dict() for p in problems]
+    assert [t.to_json() for t in batch] == [compute_egel_addition_compact(p, "scalar").to_json() for p in problems]
+
+
+def _mode_problems():
+    rng = random.Random(15)
+    for n in (1, 2, TABLE_MAX_ADDENDS, 12, 40):
+        for digits in (3, 60):  # n x digits below VECTOR_MIN_CELLS
+            yield [rng.randrange(10**digits) for _ in range(n)]
+        # at least VECTOR_MIN_CELLS cells, which auto sends to the vector pass
+        width = VECTOR_MIN_CELLS // n + 1
+        yield [rng.randrange(10 ** rng.randint(1, width)) for _ in range(n - 1)] + [10**width - 1]
+    yield [9] * 40  # carries of 10 and more: column warnings
+    yield [10**VECTOR_MIN_CELLS - 1, 1]
+
+
+@pytest.mark.parametrize("addends", list(_mode_problems()), ids=lambda p: f"{len(p)}x{max(len(str(x)) for x in p)}")
+def test_modes_agree(addends):
+    pytest.importorskip("numpy")
+    scalar = compute_egel_addition_compact(addends, "scalar")
+    for mode in ("table", "vector", "auto"):
+        trace = compute_egel_addition_compact(addends, mode)
+        assert trace.to_dict() == scalar.to_dict(), mode
+        assert trace.to_json() == scalar.to_json(), mode
+    # the vector pass itself, whatever auto would pick
+    assert _trace(addends, _columns_vector(addends)) == scalar.to_dict()
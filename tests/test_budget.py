@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import pytest
+
+from engine.budget import DEFAULT_BUDGETS, Budget, OverBudget, check, complexity, parse_budget
+from engine.common.metrics import Counter
+from engine.summary import CAPTION
+
+# mul at most 3 digits: 999 x 999 is the largest problem that fits
+MUL_BUDGET = {**DEFAULT_BUDGETS, "mul": Budget(digits=3)}
+FITS = {"op": "mul", "a": "999", "b": "999"}
+OVER = {"op": "mul", "a": "1000", "b": "999"}
+
+
+def test_boundary():
+    assert check("mul", 999, 999, budgets=MUL_BUDGET) is None
+    over = check("mul", 1000, 999, budgets=MUL_BUDGET)
+    assert isinstance(over, OverBudget)
+    assert over.to_dict()["complexity"] == {"digits": 4, "blocks": 12, "steps": 19}
+    assert "digits 4 > 3" in str(over)
+
+
+@pytest.mark.parametrize("op", ["add", "sub", "mul", "div"])
+def test_default_budgets_at_their_limit(op):
+    d = DEFAULT_BUDGETS[op].digits
+    b = "9" * d if op == "div" else "9"  # keep the other measures small (div: a one-digit quotient)
+    assert check(op, "9" * d, b) is None
+    assert check(op, "9" * (d + 1), b) is not None
+
+
+def test_every_measure_counts():
+    c = complexity("mul", 10**9, 10**9)
+    assert check("mul", 10**9, 10**9, budgets={"mul": Budget(blocks=c.blocks)}) is None
+    assert check("mul", 10**9, 10**9, budgets={"mul": Budget(blocks=c.blocks - 1)}) is not None
+    assert check("mul", 10**9, 10**9, budgets={"mul": Budget(steps=c.steps - 1)}) is not None
+    assert check("mul", 10**9, 10**9, budgets={"mul": Budget()}) is None  # 0 = unlimited
+
+
+def test_parse_budget():
+    assert parse_budget("digits=5, steps=0", Budget(1, 2, 3)) == Budget(5, 2, 0)
+    with pytest.raises(ValueError):
+        parse_budget("cells=5")
+
+
+@pytest.fixture
+def budgeted(app, monkeypatch):
+    monkeypatch.setattr(app, "BUDGETS", MUL_BUDGET)
+    monkeypatch.setattr(app, "OVER_BUDGET_TOTAL", Counter("egel_over_budget_total", "", label=("op", "action")))
+    return app
+
+
+def test_summary_mode(budgeted, client, monkeypatch):
+    monkeypatch.setattr(budgeted, "OVER_BUDGET", "summary")
+    full = client.get("/api/render", params=FITS)
+    assert full.status_code == 200 and "X-Egel-Summary" not in full.headers
+    assert CAPTION not in full.text
+
+    r = client.get("/api/render", params=OVER)
+    assert r.status_code == 200 and r.headers["X-Egel-Summary"] == "1"
+    assert CAPTION in r.text and "999000" in r.text  # 1000 x 999
+
+    trace = client.get("/api/trace", params=OVER).json()
+    assert trace == {"op": "mul", "a": 1000, "b": 999, "result": 999000, "summary": True}
+    assert "summary" not in client.get("/api/trace", params=FITS).json()
+
+    stages = client.get("/api/stages", params=OVER).json()
+    assert stages["summary"] is True and len(set(stages["stages"].values())) == 1
+
+    batch = client.post("/api/batch", json={"items": [{**OVER}, {**OVER, "kind": "trace"}]}).json()["results"]
+    assert CAPTION in batch[0]["svg"] and batch[1]["trace"]["summary"] is True
+
+    # the display list has no summary form
+    assert client.get("/api/display", params=OVER).status_code == 413
+    assert budgeted.OVER_BUDGET_TOTAL.value(("mul", "summary")) == 5
+    assert budgeted.OVER_BUDGET_TOTAL.value(("mul", "reject")) == 1
+
+
+def test_reject_mode(budgeted, client, monkeypatch):
+    monkeypatch.setattr(budgeted, "OVER_BUDGET", "reject")
+    assert client.get("/api/render", params=FITS).status_code == 200
+    for path in ("/api/render", "/api/stages", "/api/trace", "/api/display"):
+        r = client.get(path, params=OVER)
+        assert r.status_code == 413, path
+        body = r.json()
+        assert body["complexity"]["digits"] == 4 and body["budget"]["digits"] == 3
+    batch = client.post("/api/batch", json={"items": [OVER, FITS]}).json()["results"]
+    assert batch[0]["ok"] is False and "too large" in batch[0]["error"]
+    assert batch[1]["ok"] is True
+    assert budgeted.OVER_BUDGET_TOTAL.value(("mul", "reject")) == 5
+    assert 'egel_over_budget_total{op="mul",action="reject"} 5' in client.get("/metrics").text
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from engine.common.cache import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now the oldest
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_put_of_existing_key_refreshes_it():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 10)
+    cache.put("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 10 and cache.get("c") == 3
+
+
+def test_byte_limit():
+    cache = LRUCache(maxsize=100, max_bytes=10)
+    cache.put("a", "xxxx")
+    cache.put("b", "yyyy")
+    cache.put("c", "zzzz")  # 12 bytes > 10: "a" goes
+    assert "a" not in cache and len(cache) == 2
+    assert cache.bytes == 8
+    cache.put("b", "y")  # replacing an entry updates the byte count
+    assert cache.bytes == 5
+    cache.put("big", "x" * 11)  # larger than the whole cache: not stored, nothing evicted
+    assert "big" not in cache and len(cache) == 2
+    assert cache.evictions == 1
+
+
+def test_counters():
+    cache = LRUCache(maxsize=1)
+    assert cache.get("a") is None
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    cache.put("b", 2)
+    assert cache.get("a", "default") == "default"
+    assert cache.stats() == {
+        "entries": 1, "bytes": 1, "maxsize": 1, "max_bytes": 0, "hits": 1, "misses": 2, "evictions": 1,
+    }
+
+
+def test_disabled_cache_counts_misses():
+    cache = LRUCache(maxsize=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0 and cache.misses == 1
+
+
+def test_get_or_compute():
+    cache = LRUCache(maxsize=4)
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute("k", lambda: calls.append(1) or "v") == "v"
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_clear_keeps_counters():
+    cache = LRUCache(maxsize=4)
+    cache.put("a", "abc")
+    cache.get("a")
+    cache.clear()
+    assert len(cache) == 0 and cache.bytes == 0 and cache.hits == 1
+
+
+def _metric(text: str, name: str) -> str:
+    return next(line.split()[1] for line in text.splitlines() if line.startswith(name + " "))
+
+
+def test_metrics_exposition(app, client, monkeypatch):
+    monkeypatch.setattr(app, "RENDER_CACHE", LRUCache(maxsize=1))
+    for a in (12, 12, 13):  # miss, hit, miss that evicts the first render
+        assert client.get("/api/render", params={"op": "mul", "a": a, "b": 34}).status_code == 200
+    text = client.get("/metrics").text
+    assert "# TYPE egel_render_cache_hits_total counter" in text
+    assert "# TYPE egel_render_cache_entries gauge" in text
+    assert _metric(text, "egel_render_cache_hits_total") == "1"
+    assert _metric(text, "egel_render_cache_misses_total") == "2"
+    assert _metric(text, "egel_render_cache_evictions_total") == "1"
+    assert _metric(text, "egel_render_cache_entries") == "1"
+    assert int(_metric(text, "egel_render_cache_bytes")) > 0
+    assert _metric(text, "egel_trace_cache_hits_total") == "0"
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import random
+import sys
+
+import pytest
+
+from engine.common.digits import (
+    _CHUNK,
+    DigitCache,
+    decimal,
+    digit_scope,
+    ndigits,
+    parse,
+)
+
+needs_limit = pytest.mark.skipif(not hasattr(sys, "set_int_max_str_digits"), reason="no int <-> str limit")
+
+
+@pytest.fixture
+def no_limit(monkeypatch):
+    """CPython's own conversions, unlimited, as the reference."""
+    if hasattr(sys, "set_int_max_str_digits"):
+        old = sys.get_int_max_str_digits()
+        sys.set_int_max_str_digits(0)
+        yield
+        sys.set_int_max_str_digits(old)
+    else:
+        yield
+
+
+def _texts():
+    rng = random.Random(21)
+    for n in sorted({1, 2, 77, 78, 999, 1000, 1001, 1999, 2000, 2001, 4000, 4001, 8000, 8001, 16000, 16001}):
+        yield "9" * n
+        yield "1" + "0" * (n - 1)  # 10**(n-1)
+        yield str(rng.randint(1, 9)) + "".join(rng.choice("0123456789") for _ in range(n - 1))
+    # zero runs across chunk boundaries
+    for k in (1, 2, 4, 8):
+        yield "1" + "0" * (_CHUNK * k - 1) + "1"
+        yield "5" + "0" * _CHUNK * k
+        yield "9" * _CHUNK + "0" * _CHUNK * k + "9" * _CHUNK
+
+
+@pytest.mark.parametrize("text", list(_texts()), ids=lambda s: f"{len(s)}:{s[:2]}..{s[-2:]}")
+def test_round_trip(text, no_limit):
+    x = int(text)
+    assert decimal(x) == str(x) == text
+    assert parse(text) == x
+    assert parse("000" + text) == x
+
+
+def test_parse_rejects():
+    for bad in ("", "12a", "-5", "1_000", "١٢"):
+        with pytest.raises(ValueError):
+            parse(bad)
+    with pytest.raises(ValueError):
+        decimal(-1)
+
+
+@needs_limit
+def test_past_the_interpreter_limit():
+    text = "7" * 20000
+    x = parse(text)
+    assert decimal(x) == text
+    with pytest.raises(ValueError):
+        str(x)  # the interpreter's limit is still in force
+
+
+def test_ndigits(no_limit):
+    for n in (1, 2, 9, 10, 11, 99, 100, 10**15 - 1, 10**15, 10**300, 10**300 - 1):
+        assert ndigits(n) == len(str(n)), n
+    assert ndigits(0) == 1
+    assert ndigits("000") == 1 and ndigits("00123") == 3
+
+
+def test_digit_cache():
+    x = 7**600  # > _CACHE_BITS bits
+    with DigitCache() as cache:
+        text = decimal(x)
+        assert cache.text == {x: text}
+        assert decimal(x) is text  # converted once
+        assert decimal(12345) == "12345" and 12345 not in cache.text  # short ints are not cached
+        y = parse("0042" + "3" * 200)
+        assert cache.text[y] == "42" + "3" * 200  # parsed text is kept, without its leading zeros
+    assert decimal(x) == text and decimal(x) is not text  # inactive again
+
+
+def test_digit_scope():
+    seen = []
+
+    @digit_scope
+    def inner():
+        decimal(7**600)
+        return seen.append(len(_cache_of()))
+
+    @digit_scope
+    def outer():
+        decimal(11**500)
+        inner()  # runs in the caller's cache
+        return _cache_of()
+
+    cache = outer()
+    assert seen == [2] and len(cache) == 2
+    inner()  # a fresh cache of its own
+    assert seen == [2, 1]
+
+
+def _cache_of():
+    from engine.common.digits import _active
+
+    return _active.get().text
+
+
+def test_operands_as_digit_strings(client):
+    r = client.get("/api/render", params={"op": "mul", "a": "000123", "b": "0045"})
+    assert r.status_code == 200
+    assert r.text == client.get("/api/render", params={"op": "mul", "a": 123, "b": 45}).text
+    assert client.get("/api/trace", params={"op": "add", "a": "007", "b": "0"}).json()["sum_value"] == 7
+    assert client.get("/api/render", params={"op": "mul", "a": "12x", "b": "3"}).status_code in (400, 422)
+
+
+def test_long_operands_leave_the_limit_alone(app, client, monkeypatch):
+    monkeypatch.setattr(app, "OVER_BUDGET", "summary")
+    limit = sys.get_int_max_str_digits() if hasattr(sys, "get_int_max_str_digits") else None
+    a, b = "9" * 20000, "8" * 20000
+    r = client.get("/api/render", params={"op": "mul", "a": a, "b": b})
+    assert r.status_code == 200 and r.headers["X-Egel-Summary"] == "1"
+    trace = client.get("/api/trace", params={"op": "add", "a": a, "b": b})
+    # the client's json.loads would hit the limit itself: look at the bytes
+    assert trace.status_code == 200 and b'"summary":true' in trace.content
+    batch = client.post("/api/batch", json={"items": [{"op": "add", "a": a, "b": b, "kind": "trace"}]})
+    assert batch.status_code == 200
+    assert batch.content.startswith(b'{"results":[{') and b'"result":1' + b"8" * 19999 + b"7" in batch.content
+    assert client.get("/api/render", params={"op": "mul", "a": "9" * 20001, "b": "1"}).status_code in (400, 422)
+    if limit is not None:
+        assert sys.get_int_max_str_digits() == limit
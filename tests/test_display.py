@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from engine.add.render import svg_backend as add_svg_backend
+from engine.api import display_list, normalize_render_params, render, render_display_json
+from engine.common.display import Grid, Rect, Rule, Text
+from engine.div.core import division_svg_backend
+from engine.mul.render import svg_backend as mul_svg_backend
+from engine.sub.render import svg_backend as sub_svg_backend
+
+PROBLEMS = [
+    ("add", 8541, 1973, ()),
+    ("add", 987, 65, (4321, 9)),
+    ("sub", 8541, 1973, ()),
+    ("mul", 8541, 1973, ()),
+    ("div", 98765, 43, ()),
+]
+KINDS = {"t": Text, "l": Rule, "r": Rect, "g": Grid}
+# the geometry fields to_json rounds, per kind
+ROUNDED = {"t": (0, 1), "l": (0, 1, 2, 3), "r": (0, 1, 2, 3, 8, 9), "g": ()}
+SVG = "{http://www.w3.org/2000/svg}"
+# a row is [min_stage, kind, *fields]
+TEXT = 2 + Text._fields.index("s")
+BORDER = 2 + Grid._fields.index("border")
+BACKENDS = {"add": add_svg_backend, "sub": sub_svg_backend, "mul": mul_svg_backend, "div": division_svg_backend}
+
+
+def _params(op, a, b, extra, **kw):
+    return normalize_render_params(op=op, a=a, b=b, extra_addends=extra, **kw)
+
+
+def _ids(problem):
+    return f"{problem[0]}-{len(problem[3]) + 2}"
+
+
+@pytest.mark.parametrize("problem", PROBLEMS, ids=_ids)
+def test_json_matches_display_list(problem):
+    p = _params(*problem)
+    dl = display_list(p)
+    doc = json.loads(render_display_json(p))
+    assert doc["sizes"] == [list(size) for size in dl.sizes]
+    assert len(doc["items"]) == len(dl.items)
+    for row, (s, prim) in zip(doc["items"], dl.items):
+        stage, kind, *fields = row
+        assert stage == s and KINDS[kind] is type(prim)
+        expected = [round(v, 2) if i in ROUNDED[kind] else v for i, v in enumerate(prim)]
+        # JSON has no tuples: Grid's optional border comes back as null
+        assert fields == [list(v) if isinstance(v, tuple) else v for v in expected]
+
+
+@pytest.mark.parametrize("problem", PROBLEMS, ids=_ids)
+def test_stage_items_agree_with_svg(problem):
+    everything = json.loads(render_display_json(_params(*problem)))["items"]
+    for stage in range(4):
+        # grid="path": one <path> per Grid, so <line> counts only the Rules
+        p = _params(*problem, stage=stage, grid="path")
+        doc = json.loads(render_display_json(p))
+        assert doc["items"] == [row for row in everything if row[0] <= stage]
+        rows = doc["items"]
+        root = ET.fromstring(render(p))
+        width, height = next(size[1:] for size in reversed(doc["sizes"]) if size[0] <= stage)
+        assert (float(root.get("width")), float(root.get("height"))) == (width, height)
+        # what the backend writes with the root tag (div: a background) is not an item
+        head = ET.fromstring(BACKENDS[p.op](p.grid).open(width, height) + "</svg>")
+
+        def count(tag):
+            return len(list(root.iter(SVG + tag))) - len(list(head.iter(SVG + tag)))
+
+        assert [el.text for el in root.iter(SVG + "text")] == [row[TEXT] for row in rows if row[1] == "t"]
+        assert count("line") == sum(row[1] == "l" for row in rows)
+        grids = [row for row in rows if row[1] == "g"]
+        assert count("path") == len(grids)
+        bordered = sum(g[BORDER] is not None for g in grids)
+        assert count("rect") == sum(row[1] == "r" for row in rows) + bordered
+
+
+def test_api_display(client):
+    query = {"op": "mul", "a": "8541", "b": "1973", "stage": "1"}
+    r = client.get("/api/display", params=query)
+    assert r.status_code == 200 and r.headers["content-type"] == "application/json"
+    assert r.content == render_display_json(normalize_render_params(op="mul", a=8541, b=1973, stage=1)).encode()
+    assert all(row[0] <= 1 for row in r.json()["items"])
+    assert client.get("/api/display", params=query, headers={"If-None-Match": r.headers["etag"]}).status_code == 304
+    other = client.get("/api/display", params={**query, "stage": "3"})
+    assert other.headers["etag"] != r.headers["etag"]
+    assert len(other.json()["items"]) > len(r.json()["items"])
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import random
+from typing import Any
+
+import pytest
+
+from engine.common.digits import decimal
+from engine.div.core import calculate_egel_huvaah
+
+OLD_STEP_CAP = 200
+
+
+def reference_egel_huvaah(dividend: int, divisor: int) -> dict[str, Any]:
+    """The pre-digit-array implementation (string prefixes, 200-step cap),
+    kept as the reference for problems within that cap."""
+    steps: list[dict[str, Any]] = []
+    remainder = dividend
+    q_list: list[int] = []
+    div_str = str(divisor)
+    sub_vals = [{"k": 1, "val": divisor}, {"k": 2, "val": divisor * 2}, {"k": 5, "val": divisor * 5}]
+
+    while remainder >= divisor:
+        r_str = str(remainder)
+        multiplier = 1
+        p10 = 0
+        read_digits = ""
+        for i in range(1, len(r_str) + 1):
+            read_digits = r_str[:i]
+            if int(read_digits) >= divisor:
+                p10 = len(r_str) - i
+                multiplier = 10**p10
+                break
+
+        if remainder >= divisor * 5 * multiplier:
+            factor = 5
+        elif remainder >= divisor * 2 * multiplier:
+            factor = 2
+        else:
+            factor = 1
+
+        subtract_val = divisor * factor * multiplier
+        current_q = factor * multiplier
+        msg = f"Уншсан тоо {read_digits}-д {div_str} нь {factor} удаа багтана. "
+        if p10 > 0:
+            msg += f"{p10} тэгээр орон гүйцээж {current_q} болов."
+        steps.append({"rem_before": remainder, "sub": subtract_val, "factor": current_q, "msg": msg})
+        remainder -= subtract_val
+        q_list.append(current_q)
+        if len(steps) > OLD_STEP_CAP:
+            break
+
+    return {
+        "dividend": dividend,
+        "divisor": divisor,
+        "steps": steps,
+        "q_list": q_list,
+        "total_q": sum(q_list),
+        "final_rem": remainder,
+        "sub_vals": sub_vals,
+    }
+
+
+def _random_problems(seed: int, count: int):
+    rng = random.Random(seed)
+    for _ in range(count):
+        divisor = rng.randint(1, 10 ** rng.randint(1, 6))
+        dividend = rng.randint(0, 10 ** rng.randint(1, 40))
+        yield dividend, divisor
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_reference_within_old_cap(seed):
+    checked = 0
+    for dividend, divisor in _random_problems(seed, 300):
+        ref = reference_egel_huvaah(dividend, divisor)
+        if len(ref["steps"]) > OLD_STEP_CAP:
+            continue  # the reference was truncated here
+        assert calculate_egel_huvaah(dividend, divisor) == ref, (dividend, divisor)
+        checked += 1
+    assert checked > 250
+
+
+@pytest.mark.parametrize(
+    "dividend, divisor",
+    [(0, 7), (6, 7), (7, 7), (100, 1), (10**30, 3), (999999, 999999), (1000000, 999999), (10**12 + 5, 10**6)],
+)
+def test_matches_reference_edge_cases(dividend, divisor):
+    assert calculate_egel_huvaah(dividend, divisor) == reference_egel_huvaah(dividend, divisor)
+
+
+def _check_properties(dividend: int, divisor: int) -> dict[str, Any]:
+    trace = calculate_egel_huvaah(dividend, divisor)
+    q, r = divmod(dividend, divisor)
+    assert sum(trace["q_list"]) == trace["total_q"] == q
+    assert trace["final_rem"] == r
+    remainder = dividend
+    for step, chunk in zip(trace["steps"], trace["q_list"]):
+        assert step["rem_before"] == remainder
+        assert step["factor"] == chunk and step["sub"] == chunk * divisor
+        assert decimal(chunk).rstrip("0") in ("1", "2", "5")
+        remainder -= step["sub"]
+        assert 0 <= remainder < step["rem_before"]
+    assert remainder == r
+    return trace
+
+
+@pytest.mark.parametrize("digits, divisor_digits", [(300, 1), (1000, 3), (6000, 4)])
+def test_long_dividends(digits, divisor_digits):
+    rng = random.Random(f"{digits}:{divisor_digits}")
+    dividend = rng.randint(10 ** (digits - 1), 10**digits - 1)
+    divisor = rng.randint(10 ** (divisor_digits - 1), 10**divisor_digits - 1)
+    trace = _check_properties(dividend, divisor)
+    assert len(trace["steps"]) > OLD_STEP_CAP  # the old cap would have stopped early
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import pytest
+
+from engine.common.encoding import compress
+
+LARGE = {"op": "mul", "a": "8541", "b": "1973"}  # well past PRECOMPRESS_MIN_BYTES
+SMALL = {"op": "add", "a": "1", "b": "2"}  # sent as is when below PRECOMPRESS_MIN_BYTES
+
+
+@pytest.fixture(params=["gzip", "br"])
+def encoding(request, app, monkeypatch):
+    """Each precompressed encoding in turn, enabled on the app."""
+    if request.param == "br":
+        pytest.importorskip("brotli")
+    monkeypatch.setattr(app, "PRECOMPRESS", (request.param,))
+    return request.param
+
+
+def _get(client, params, accept, if_none_match=None):
+    headers = {"Accept-Encoding": accept}
+    if if_none_match:
+        headers["If-None-Match"] = if_none_match
+    with client.stream("GET", "/api/render", params=params, headers=headers) as r:
+        raw = b"".join(r.iter_raw())
+    return r, raw
+
+
+def test_identity_etag(client):
+    r, plain = _get(client, LARGE, "identity")
+    etag = r.headers["etag"]
+    assert "content-encoding" not in r.headers
+    assert _get(client, LARGE, "identity", etag)[0].status_code == 304
+    assert _get(client, LARGE, "identity", f"W/{etag}")[0].status_code == 304
+    assert _get(client, LARGE, "identity", f'"other", {etag}')[0].status_code == 304
+    assert _get(client, LARGE, "identity", "*")[0].status_code == 304
+    assert _get(client, LARGE, "identity", '"other"')[0].status_code == 200
+
+
+def test_variant_etag_per_encoding(client, encoding):
+    r, plain = _get(client, LARGE, "identity")
+    base = r.headers["etag"]
+
+    r, body = _get(client, LARGE, encoding)
+    assert r.headers["content-encoding"] == encoding
+    assert r.headers["vary"] == "Accept-Encoding"
+    assert r.headers["etag"] == f'"{base[1:-1]}-{encoding}"'
+    assert body == compress(plain, encoding)
+
+    # a 304 only for the tag of the representation being selected
+    r304, _ = _get(client, LARGE, encoding, r.headers["etag"])
+    assert r304.status_code == 304 and r304.headers["etag"] == r.headers["etag"]
+    assert _get(client, LARGE, encoding, base)[0].status_code == 200
+    assert _get(client, LARGE, "identity", r.headers["etag"])[0].status_code == 200
+    other = "br" if encoding == "gzip" else "gzip"
+    assert _get(client, LARGE, encoding, f'"{base[1:-1]}-{other}"')[0].status_code == 200
+
+
+def test_precompressed_body_is_reused(client, app, encoding, monkeypatch):
+    calls = []
+
+    def counting(data, enc):
+        calls.append(enc)
+        return compress(data, enc)
+
+    monkeypatch.setattr(app, "compress", counting)
+    first, body = _get(client, LARGE, encoding)
+    again, cached = _get(client, LARGE, encoding)
+    assert calls == [encoding]
+    assert cached == body
+    assert again.headers["etag"] == first.headers["etag"]
+    assert again.headers["content-encoding"] == encoding
+
+
+def test_small_body_keeps_identity_tag(client, app, encoding, monkeypatch):
+    r, plain = _get(client, SMALL, "identity")
+    monkeypatch.setattr(app, "PRECOMPRESS_MIN_BYTES", len(plain) + 1)
+    r2, body = _get(client, SMALL, encoding)
+    assert "content-encoding" not in r2.headers
+    assert body == plain and r2.headers["etag"] == r.headers["etag"]
+    assert _get(client, SMALL, encoding, r.headers["etag"])[0].status_code == 304
+
+
+def test_streamed_miss_keeps_identity_tag(client, app, encoding):
+    streamed = {**LARGE, "stream": "true"}
+    r, plain = _get(client, streamed, encoding)
+    assert "content-encoding" not in r.headers
+    base = r.headers["etag"]
+    # now cached: the encoded copy is selected, under its own tag
+    r2, body = _get(client, streamed, encoding, base)
+    assert r2.status_code == 200 and r2.headers["content-encoding"] == encoding
+    assert r2.headers["etag"] == f'"{base[1:-1]}-{encoding}"'
+    assert body == compress(plain, encoding)
+    app.RENDER_CACHE.clear()
+    assert _get(client, streamed, encoding, base)[0].status_code == 304
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from engine.common.pool import MODES, PoolBusy, WorkerPool
+
+
+@pytest.fixture
+def use_pool(app, monkeypatch):
+    pools = []
+
+    def install(**kwargs) -> WorkerPool:
+        pool = WorkerPool(**kwargs)
+        pools.append(pool)
+        monkeypatch.setattr(app, "RENDER_POOL", pool)
+        return pool
+
+    yield install
+    for pool in pools:
+        pool.shutdown()
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_modes_serve_renders_and_traces(client, use_pool, mode):
+    pool = use_pool(mode=mode, max_workers=2, timeout=30)
+    render = client.get("/api/render", params={"op": "div", "a": 1234, "b": 7})
+    trace = client.get("/api/trace", params={"op": "div", "a": 1234, "b": 7})
+    assert render.status_code == 200 and render.text.startswith("<svg")
+    assert trace.status_code == 200 and trace.json()["total_q"] == 1234 // 7
+    assert pool.compute.count("render") == 1
+    assert pool.compute.count("compute_trace_bytes") == 1
+    # repeats are cache hits and never reach the pool
+    client.get("/api/render", params={"op": "div", "a": 1234, "b": 7})
+    assert pool.compute.count("render") == 1
+    if mode != "inline":
+        assert pool.stats()["completed"] == 2
+
+
+def test_full_backlog_is_429_with_retry_after(client, use_pool):
+    pool = use_pool(mode="thread", max_workers=1, max_queue=0, timeout=30)
+    release = threading.Event()
+    holder = threading.Thread(target=pool.run, args=(release.wait,))
+    holder.start()
+    try:
+        deadline = time.monotonic() + 5
+        while pool.pending < 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        r = client.get("/api/render", params={"op": "mul", "a": 12, "b": 34})
+        assert r.status_code == 429
+        assert 1 <= int(r.headers["Retry-After"]) <= 30
+        assert "full" in r.json()["error"]
+        assert pool.stats()["rejected"] == 1
+        with pytest.raises(PoolBusy):
+            pool.run(len, "x")
+    finally:
+        release.set()
+        holder.join()
+    assert client.get("/api/render", params={"op": "mul", "a": 12, "b": 34}).status_code == 200
+
+
+def test_slow_render_is_504(app, client, use_pool, monkeypatch):
+    pool = use_pool(mode="thread", max_workers=1, timeout=0.05)
+    release = threading.Event()
+    real_render = app.render
+
+    def render(p):
+        release.wait(5)
+        return real_render(p)
+
+    monkeypatch.setattr(app, "render", render)
+    try:
+        r = client.get("/api/render", params={"op": "mul", "a": 12, "b": 34})
+    finally:
+        release.set()
+    assert r.status_code == 504
+    assert "did not finish" in r.json()["error"]
+    assert pool.stats()["timeouts"] == 1
+    assert len(app.RENDER_CACHE) == 0
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import sys
+
+import pytest
+
+from engine.add.algo import compute_egel_addition_compact
+from engine.api import _TRACE_TABLES, compute_trace, compute_trace_bytes
+from engine.common import serialize
+from engine.common.digits import parse
+from engine.common.serialize import columnar, dumps
+
+LONG = int("9" * 30)  # past 64 bits: orjson refuses it, the stdlib encoder takes over
+PROBLEMS = [
+    ("add", 8541, 1973, ()),
+    ("add", LONG, 1, (LONG, 7)),
+    ("sub", 8541, 1973, ()),
+    ("sub", LONG, 12345, ()),
+    ("mul", 8541, 1973, ()),
+    ("mul", LONG, LONG, ()),
+    ("div", 98765, 43, ()),  # Mongolian step messages: non-ASCII text
+    ("div", LONG, 987, ()),
+]
+
+
+def _ids(problem):
+    return f"{problem[0]}-{'long' if problem[1] == LONG else 'short'}"
+
+
+def _stdlib(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _rows(table, fields):
+    return [dict(zip(fields, values)) for values in zip(*(table[f] for f in fields))]
+
+
+@pytest.fixture(params=["orjson", "json"])
+def encoder(request, monkeypatch):
+    """dumps() through orjson (when installed) and through the stdlib fallback."""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialize, "orjson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("problem", PROBLEMS, ids=_ids)
+def test_dumps_matches_stdlib(problem, encoder):
+    op, a, b, extra = problem
+    trace = compute_trace(op, a, b, extra)
+    assert dumps(trace) == _stdlib(trace)
+    if op == "add":
+        cols = compute_egel_addition_compact([a, b, *extra]).to_columns()
+    else:
+        cols = columnar(trace, _TRACE_TABLES[op])
+    assert dumps(cols) == _stdlib(cols)
+    assert compute_trace_bytes(op, a, b, extra, layout="rows") == _stdlib(trace)
+    assert compute_trace_bytes(op, a, b, extra, layout="columns") == _stdlib(cols)
+
+
+@pytest.mark.parametrize("problem", PROBLEMS, ids=_ids)
+def test_encoders_agree(problem, monkeypatch):
+    pytest.importorskip("orjson")
+    op, a, b, extra = problem
+    expected = {layout: compute_trace_bytes(op, a, b, extra, layout=layout) for layout in ("rows", "columns")}
+    monkeypatch.setattr(serialize, "orjson", None)
+    assert {layout: compute_trace_bytes(op, a, b, extra, layout=layout) for layout in expected} == expected
+
+
+@pytest.mark.parametrize("problem", PROBLEMS, ids=_ids)
+def test_columns_round_trip_to_rows(problem):
+    op, a, b, extra = problem
+    rows = json.loads(compute_trace_bytes(op, a, b, extra, layout="rows"))
+    cols = json.loads(compute_trace_bytes(op, a, b, extra, layout="columns"))
+    if op == "add":
+        table = cols["columns"]
+        fields = ("col", "digits", "carry_in", "carry_out", "result_digit", "underlines")
+        cols["columns"] = [
+            {**row, "underlines": [{"row": r, "col": row["col"]} for r in row["underlines"]]}
+            for row in _rows(table, fields)
+        ]
+    else:
+        for name, fields in _TRACE_TABLES[op].items():
+            assert set(cols[name]) == set(fields)
+            cols[name] = _rows(cols[name], fields)
+    assert cols == rows
+
+
+def test_columnar_keeps_its_input():
+    trace = {"steps": [{"x": 1, "y": 2}, {"x": 3, "y": 4}], "result": 5}
+    assert columnar(trace, {"steps": ("x", "y")}) == {"steps": {"x": [1, 3], "y": [2, 4]}, "result": 5}
+    assert trace == {"steps": [{"x": 1, "y": 2}, {"x": 3, "y": 4}], "result": 5}
+
+
+def test_ints_past_the_str_limit(encoder):
+    text = "9" * 5000 + "1"  # past CPython's 4300-digit int <-> str limit
+    x = parse(text)
+    obj = {"a": x, "rows": [{"v": -x, "s": "ünit", "ok": True, "f": 0.5, "n": None}], x: [1, 2]}
+    expected = f'{{"a":{text},"rows":[{{"v":-{text},"s":"ünit","ok":true,"f":0.5,"n":null}}],"{text}":[1,2]}}'
+    limit = sys.get_int_max_str_digits() if hasattr(sys, "get_int_max_str_digits") else None
+    assert dumps(obj) == expected.encode("utf-8")
+    if limit is not None:
+        assert sys.get_int_max_str_digits() == limit
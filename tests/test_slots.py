@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from itertools import combinations
+
+import pytest
+
+from engine.api import normalize_render_params, render
+
+SVG = "{http://www.w3.org/2000/svg}"
+SIZE_ATTRS = ("width", "height", "viewBox")
+
+PROBLEMS = [
+    ("add", 8541, 1973),
+    ("sub", 8541, 1973),
+    ("mul", 8541, 1973),
+    ("div", 98765, 43),  # has a remainder: the stage-3 canvas is taller
+    ("div", 1000, 8),
+]
+
+
+def apply_delta(slotted: str, delta: str) -> ET.Element:
+    """What the client's applyDelta (apps/web/static/app.js) does."""
+    doc = ET.fromstring(slotted)
+    patch = ET.fromstring(delta)
+    for node in list(patch):
+        slot = node.get("data-slot")
+        if slot is None:
+            doc.append(node)
+            continue
+        target = next(el for el in doc if el.tag == SVG + "g" and el.get("data-slot") == slot)
+        doc[list(doc).index(target)] = node
+    for k in SIZE_ATTRS:
+        if k in patch.attrib:
+            doc.set(k, patch.get(k))
+    return doc
+
+
+def elements(el: ET.Element):
+    """Drawn elements in document order; slot groups and placeholders unwrapped."""
+    for child in el:
+        if child.tag == SVG + "g" and "data-slot" in child.attrib:
+            yield from elements(child)
+            continue
+        yield child.tag, sorted(child.attrib.items()), (child.text or "").strip()
+        yield from elements(child)
+
+
+@pytest.mark.parametrize("grid", ["lines", "pattern"])
+@pytest.mark.parametrize("op, a, b", PROBLEMS)
+def test_delta_matches_direct_render(op, a, b, grid):
+    def svg(**kw) -> str:
+        return render(normalize_render_params(op=op, a=a, b=b, grid=grid, **kw))
+
+    for f, s in combinations(range(4), 2):
+        patched = apply_delta(svg(stage=f, slots=True), svg(stage=s, from_stage=f))
+        direct = ET.fromstring(svg(stage=s))
+        assert list(elements(patched)) == list(elements(direct)), (f, s)
+        assert {k: patched.get(k) for k in SIZE_ATTRS} == {k: direct.get(k) for k in SIZE_ATTRS}
+        # the patched document still works for the next step
+        if s < 3:
+            again = apply_delta(ET.tostring(patched, encoding="unicode"), svg(stage=3, from_stage=s))
+            assert list(elements(again)) == list(elements(ET.fromstring(svg(stage=3))))
+
+
+def test_division_head_slot():
+    p = normalize_render_params(op="div", a=98765, b=43, show_remainder=True)
+    slotted = render(p._replace(stage=0, slots=True))
+    assert '<g data-slot="h">' in slotted
+    # the background follows the canvas: resent when the size changes, not otherwise
+    assert '<g data-slot="h">' in render(p._replace(stage=3, slots=True, from_stage=2))
+    assert '<g data-slot="h">' not in render(p._replace(stage=2, slots=True, from_stage=1))
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from engine.sub.algo import _step, compute_egel_subtraction, compute_egel_subtraction_batch
+
+
+def reference(a: int, b: int):
+    """The column walk of compute_egel_subtraction's docstring, digit by digit."""
+    n = max(len(str(a)), len(str(b)))
+    a_p, b_p = str(a).zfill(n), str(b).zfill(n)
+    carry = 0
+    carries, steps = [], []
+    for pos in range(n - 1, -1, -1):
+        step = _step(carry, int(a_p[pos]), int(b_p[pos]))
+        carries.append(carry)
+        steps.append({"pos": pos, **step})
+        carry = step["carry_out"]
+    return {
+        "carries_in": carries[::-1],
+        "result_digits": [s["res"] for s in steps][::-1],
+        "steps": sorted(steps, key=lambda s: s["pos"]),
+        "final_carry": carry,
+    }
+
+
+def _pairs():
+    rng = random.Random(22)
+    for _ in range(60):
+        a = rng.randrange(10 ** rng.randint(1, 30))
+        b = rng.randrange(10 ** rng.randint(1, 30))
+        yield a, b
+    # borrow chains across the full width, zero-padded b, a < b
+    yield 10**25, 1
+    yield 10**25, 10**25 - 1
+    yield 1000000, 999999
+    yield 5, 0
+    yield 0, 0
+    yield 123, 98765
+
+
+PAIRS = list(_pairs())
+
+
+@pytest.mark.parametrize("a, b", PAIRS)
+def test_table_matches_column_walk(a, b):
+    trace = compute_egel_subtraction(a, b)
+    ref = reference(a, b)
+    assert trace["carries_in"] == ref["carries_in"]
+    assert trace["result_digits"] == ref["result_digits"]
+    assert sorted(trace["steps"], key=lambda s: s["pos"]) == ref["steps"]
+    assert trace["final_carry"] == ref["final_carry"]
+    if a >= b:
+        assert trace["result"] == a - b
+
+
+def test_batch_matches_single_calls():
+    assert compute_egel_subtraction_batch(PAIRS) == [compute_egel_subtraction(a, b) for a, b in PAIRS]
+    assert compute_egel_subtraction_batch([]) == []
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import re
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from engine.api import iter_render, normalize_render_params, render, render_stages
+from engine.common.viewbox import LAYOUT_UNIT, SCALE
+
+PROBLEMS = [
+    ("add", 8541, 1973),
+    ("sub", 8541, 1973),
+    ("mul", 8541, 1973),
+    ("div", 98765, 43),
+]
+# attributes holding lengths; everything else (opacity, colours, text) is kept as is
+GEOMETRY = {"x", "y", "x1", "y1", "x2", "y2", "width", "height", "rx", "ry", "font-size", "stroke-width", "d"}
+NUM = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _body(svg: str) -> str:
+    return svg[svg.index(">") + 1:]
+
+
+def drawing(svg: str, scale: float = 1.0):
+    """(tag, attributes, text) per element below the root, lengths divided by `scale`."""
+    out = []
+    for el in ET.fromstring(svg).iter():
+        attrs = []
+        for k, v in sorted(el.attrib.items()):
+            if k == "id" or v.startswith("url(#"):
+                continue  # pattern ids are derived from the geometry
+            if k in GEOMETRY:
+                v = tuple(round(float(n) / scale, 2) for n in NUM.findall(v))
+            attrs.append((k, v))
+        out.append((el.tag, attrs, (el.text or "").strip()))
+    return out[1:]
+
+
+@pytest.mark.parametrize("grid", ["lines", "path", "pattern"])
+@pytest.mark.parametrize("op, a, b", PROBLEMS)
+def test_one_body_for_every_unit(op, a, b, grid):
+    def svg(unit: int, **kw) -> str:
+        return render(normalize_render_params(op=op, a=a, b=b, grid=grid, unit=unit, viewbox=True, **kw))
+
+    base = svg(LAYOUT_UNIT)
+    plain = render(normalize_render_params(op=op, a=a, b=b, grid=grid))
+    root, plain_root = ET.fromstring(base), ET.fromstring(plain)
+    assert (root.get("width"), root.get("height")) == (plain_root.get("width"), plain_root.get("height"))
+    w, h = (float(v) for v in root.get("viewBox").split()[2:])
+    for unit in (20, 57, 112):
+        other = svg(unit)
+        assert _body(other) == _body(base)
+        r = ET.fromstring(other)
+        assert float(r.get("width")) == pytest.approx(w * unit / (LAYOUT_UNIT * SCALE), abs=0.01)
+        assert float(r.get("height")) == pytest.approx(h * unit / (LAYOUT_UNIT * SCALE), abs=0.01)
+        assert "".join(iter_render(normalize_render_params(op=op, a=a, b=b, grid=grid, unit=unit, viewbox=True))) == other
+
+    # the plain drawing, in hundredths of its pixels
+    assert drawing(base, SCALE) == drawing(plain)
+    assert r.get("viewBox") == root.get("viewBox")
+
+
+@pytest.mark.parametrize("op, a, b", PROBLEMS)
+def test_integer_coordinates(op, a, b):
+    for st, svg in render_stages(normalize_render_params(op=op, a=a, b=b, unit=90, viewbox=True)).items():
+        root = ET.fromstring(svg)
+        for el in root.iter():
+            if el is root:
+                continue  # width/height follow the unit
+            for k, v in el.attrib.items():
+                if k in GEOMETRY:
+                    assert all("." not in n for n in NUM.findall(v)), (st, el.tag, k, v)
+
+
+def test_summary_ignores_viewbox():
+    p = normalize_render_params(op="mul", a=123, b=45, unit=80, viewbox=True, summary=True)
+    assert p.viewbox is False